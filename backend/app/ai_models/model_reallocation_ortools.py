@@ -1,11 +1,35 @@
 # model_reallocation_ortools.py
 from ortools.sat.python import cp_model
 
-def build_reallocation_model(affected_classes, candidate_moves):
+def conflict_groups(affected_classes, candidate_moves, class_sections=None):
+    """
+    Sparse conflict graph between candidate moves, stored as cliques: moves of
+    different classes landing on the same (timeslot, room), (timeslot, faculty)
+    or (timeslot, section) are pairwise incompatible. Only cells claimed by two
+    or more classes are returned, as lists of (class_id, k).
+    """
+    cells = {}
+    for cls in affected_classes:
+        section = (class_sections or {}).get(cls)
+        for k, move in enumerate(candidate_moves[cls]):
+            timeslot, room, faculty = move[0], move[1], move[2]
+            keys = [("room", timeslot, room)]
+            if faculty is not None:
+                keys.append(("faculty", timeslot, faculty))
+            if section is not None:
+                keys.append(("section", timeslot, section))
+            for key in keys:
+                cells.setdefault(key, []).append((cls, k))
+
+    return [members for members in cells.values() if len({cls for cls, _ in members}) > 1]
+
+def build_reallocation_model(affected_classes, candidate_moves, class_sections=None):
     """
     affected_classes: list of class_ids that need reassignment
     candidate_moves: dict class_id -> list of possible moves
         move example: (new_timeslot, new_room, new_faculty, penalty_cost)
+    class_sections: optional dict class_id -> section, so two classes of the
+        same section are not moved into the same timeslot
     """
 
     model = cp_model.CpModel()
@@ -19,6 +43,10 @@ def build_reallocation_model(affected_classes, candidate_moves):
         # Each affected class must pick exactly one reassignment option
         model.Add(sum(choose[(cls, k)] for k in range(len(candidate_moves[cls]))) == 1)
 
+    # Chosen moves must not double-book a room, faculty member or section
+    for members in conflict_groups(affected_classes, candidate_moves, class_sections):
+        model.AddAtMostOne(choose[m] for m in members)
+
     # Objective: minimize disruption cost
     model.Minimize(
         sum(choose[(cls, k)] * candidate_moves[cls][k][3]  # penalty_cost
@@ -54,3 +54,347 @@ def build_timetable_csp(courses, timeslots, rooms, faculty_map, room_cap, batch_
     # model.Minimize(0)
     
     return model, x
+
+
+def compatible_rooms(courses, rooms, room_cap, batch_size, room_type=None, course_room_type=None):
+    """
+    Precompute course_id -> list of room_ids that pass the capacity/room-type check.
+    room_type: optional dict room_id -> room type (e.g., "Classroom", "Lab")
+    course_room_type: optional dict course_id -> required room type (None = any)
+    """
+    room_type = room_type or {}
+    course_room_type = course_room_type or {}
+
+    # Sort rooms once by capacity so each course only scans the big-enough tail
+    by_cap = sorted(rooms, key=lambda r: room_cap[r])
+    caps = [room_cap[r] for r in by_cap]
+
+    compat = {}
+    for c in courses:
+        need = batch_size[c]
+        lo = 0
+        hi = len(caps)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if caps[mid] < need:
+                lo = mid + 1
+            else:
+                hi = mid
+        required = course_room_type.get(c)
+        compat[c] = [r for r in by_cap[lo:] if required is None or room_type.get(r) == required]
+    return compat
+
+
+def add_section_constraints(model, courses, timeslots, section_map, y):
+    """A section (class of students) cannot attend two courses in the same timeslot."""
+    if not section_map:
+        return
+    section_courses = {}
+    for c in courses:
+        if section_map.get(c) is not None:
+            section_courses.setdefault(section_map[c], []).append(c)
+    for s_courses in section_courses.values():
+        if len(s_courses) < 2:
+            continue
+        for t in timeslots:
+            s_vars = [y[(c, t)] for c in s_courses if (c, t) in y]
+            if len(s_vars) > 1:
+                model.AddAtMostOne(s_vars)
+
+
+def build_timetable_csp_sparse(courses, timeslots, rooms, faculty_map, room_cap, batch_size, course_credits,
+                               room_type=None, course_room_type=None, section_map=None, blocked=None, relax=None):
+    """
+    Same model as build_timetable_csp, but only creates x[c,t,r] for rooms that can
+    actually host course c. Faculty -> courses and room -> courses indexes are built
+    once, and every constraint is a single LinearExpr.Sum over a prebuilt list.
+
+    section_map: optional dict course_id -> section; courses of one section never overlap
+    blocked: optional set of (slot_id, room_id) pairs that are not available
+        (e.g., reserved by another department)
+    relax: optional set of constraint families to leave out, used to find which
+        family makes a model infeasible: "room_conflicts", "faculty_conflicts",
+        "section_conflicts"
+
+    Returns (model, x, y) where y[c,t] = 1 if course c is scheduled at time t
+    (in any room). Reading y first keeps solution read-back proportional to the
+    number of scheduled sessions instead of the number of variables.
+    """
+    Sum = cp_model.LinearExpr.Sum
+    model = cp_model.CpModel()
+
+    compat = compatible_rooms(courses, rooms, room_cap, batch_size, room_type, course_room_type)
+
+    # Indexes: faculty -> courses, room -> courses that may use it
+    faculty_courses = {}
+    for c in courses:
+        faculty_courses.setdefault(faculty_map[c], []).append(c)
+    room_courses = {}
+    for c in courses:
+        for r in compat[c]:
+            room_courses.setdefault(r, []).append(c)
+
+    blocked = blocked or set()
+    x = {}
+    y = {}
+    for c in courses:
+        c_rooms = compat[c]
+        if not c_rooms:
+            # No room can ever host this course; y stays empty and the
+            # credits constraint below makes the model infeasible.
+            continue
+        for t in timeslots:
+            slot_vars = []
+            for r in c_rooms:
+                if (t, r) in blocked:
+                    continue
+                v = model.NewBoolVar(f"x_{c}_{t}_{r}")
+                x[(c, t, r)] = v
+                slot_vars.append(v)
+            # Constraint 2: one room per course per slot, expressed through y
+            y_ct = model.NewBoolVar(f"y_{c}_{t}")
+            y[(c, t)] = y_ct
+            model.Add(Sum(slot_vars) == y_ct)
+
+    # Constraint 1: each course scheduled exactly 'credits' times per week
+    for c in courses:
+        credits = course_credits.get(c, 3)
+        model.Add(Sum([y[(c, t)] for t in timeslots if (c, t) in y]) == credits)
+
+    relax = relax or set()
+
+    # Constraint 3: room can host at most one course per timeslot
+    for r, r_courses in room_courses.items():
+        if len(r_courses) < 2 or "room_conflicts" in relax:
+            continue
+        for t in timeslots:
+            r_vars = [x[(c, t, r)] for c in r_courses if (c, t, r) in x]
+            if len(r_vars) > 1:
+                model.AddAtMostOne(r_vars)
+
+    # Constraint 4: faculty cannot teach two courses in same timeslot
+    for f, f_courses in faculty_courses.items():
+        f_courses = [c for c in f_courses if compat[c]]
+        if len(f_courses) < 2 or "faculty_conflicts" in relax:
+            continue  # already implied by Constraint 2
+        for t in timeslots:
+            model.AddAtMostOne([y[(c, t)] for c in f_courses])
+
+    # Constraint 5 (capacity / room type) is enforced by construction: x only
+    # exists for compatible, unblocked rooms.
+
+    if "section_conflicts" not in relax:
+        add_section_constraints(model, courses, timeslots, section_map, y)
+
+    return model, x, y
+
+
+def group_room_classes(rooms, room_cap, room_type=None, room_building=None):
+    """
+    Group interchangeable rooms into equivalence classes.
+    Rooms with identical (capacity, room_type, building) end up in the same class.
+
+    Returns dict class_id -> sorted list of room_ids, where class_id is the
+    (capacity, room_type, building) tuple.
+    """
+    room_type = room_type or {}
+    room_building = room_building or {}
+    classes = {}
+    for r in rooms:
+        key = (room_cap[r], room_type.get(r), room_building.get(r))
+        classes.setdefault(key, []).append(r)
+    for members in classes.values():
+        members.sort(key=str)
+    return classes
+
+
+def build_timetable_csp_room_classes(courses, timeslots, room_classes, faculty_map, batch_size, course_credits,
+                                     course_room_type=None, section_map=None):
+    """
+    Symmetry-free variant of build_timetable_csp.
+    Instead of picking a concrete room, each session picks a room class; the model
+    only ensures that no class is used more times in a slot than it has rooms.
+
+    room_classes: dict class_id -> list of room_ids, as built by group_room_classes
+    Returns (model, z, y) where z[c,t,k] = 1 if course c uses a room of class k at
+    time t and y[c,t] = 1 if course c is scheduled at time t.
+    """
+    Sum = cp_model.LinearExpr.Sum
+    course_room_type = course_room_type or {}
+    model = cp_model.CpModel()
+
+    # class_id is (capacity, room_type, building)
+    compat = {}
+    for c in courses:
+        required = course_room_type.get(c)
+        compat[c] = [
+            k for k in room_classes
+            if k[0] >= batch_size[c] and (required is None or k[1] == required)
+        ]
+
+    faculty_courses = {}
+    for c in courses:
+        faculty_courses.setdefault(faculty_map[c], []).append(c)
+    class_courses = {}
+    for c in courses:
+        for k in compat[c]:
+            class_courses.setdefault(k, []).append(c)
+
+    z = {}
+    y = {}
+    for c in courses:
+        if not compat[c]:
+            continue
+        for t in timeslots:
+            class_vars = []
+            for k in compat[c]:
+                v = model.NewBoolVar(f"z_{c}_{t}_{len(z)}")
+                z[(c, t, k)] = v
+                class_vars.append(v)
+            y_ct = model.NewBoolVar(f"y_{c}_{t}")
+            y[(c, t)] = y_ct
+            model.Add(Sum(class_vars) == y_ct)
+
+    # Each course scheduled exactly 'credits' times per week
+    for c in courses:
+        credits = course_credits.get(c, 3)
+        model.Add(Sum([y[(c, t)] for t in timeslots if (c, t) in y]) == credits)
+
+    # A class cannot host more courses in a slot than it has rooms
+    for k, k_courses in class_courses.items():
+        size = len(room_classes[k])
+        if len(k_courses) <= size:
+            continue
+        for t in timeslots:
+            class_vars = [z[(c, t, k)] for c in k_courses]
+            if size == 1:
+                model.AddAtMostOne(class_vars)
+            else:
+                model.Add(Sum(class_vars) <= size)
+
+    # Faculty cannot teach two courses in same timeslot
+    for f, f_courses in faculty_courses.items():
+        f_courses = [c for c in f_courses if compat[c]]
+        if len(f_courses) < 2:
+            continue
+        for t in timeslots:
+            model.AddAtMostOne([y[(c, t)] for c in f_courses])
+
+    add_section_constraints(model, courses, timeslots, section_map, y)
+
+    return model, z, y
+
+
+def assign_rooms_from_classes(class_assignments, room_classes):
+    """
+    Turn (course, slot, class) triples into (course, slot, room) triples.
+    Rooms inside a class are interchangeable, so handing them out in order per
+    (slot, class) is a valid matching.
+    """
+    used = {}
+    assignments = []
+    for c, t, k in sorted(class_assignments, key=lambda a: (str(a[1]), str(a[0]))):
+        n = used.get((t, k), 0)
+        assignments.append((c, t, room_classes[k][n]))
+        used[(t, k)] = n + 1
+    return assignments
+
+
+def build_slot_assignment_csp(courses, timeslots, faculty_map, course_credits, compat, fixed=None, forbidden_sets=None,
+                              section_map=None):
+    """
+    Stage one of the two-stage decomposition: course -> timeslot only, no rooms.
+
+    compat: dict course_id -> list of compatible room_ids (see compatible_rooms)
+    fixed: optional dict (course_id, slot_id) -> 0/1 pinning individual assignments
+    section_map: optional dict course_id -> section; courses of one section never overlap
+    forbidden_sets: optional list of (slot_id, [course_ids]) combinations that
+        must not all be placed in that slot together (no-good cuts from stage two)
+
+    Room capacity is kept as a counting bound per slot: for every set of courses
+    sharing the same compatible-room set, and every union of nested sets, the
+    number of those courses in a slot cannot exceed the rooms that can host them.
+
+    Returns (model, y) where y[c,t] = 1 if course c is scheduled at time t.
+    """
+    Sum = cp_model.LinearExpr.Sum
+    fixed = fixed or {}
+    model = cp_model.CpModel()
+
+    y = {}
+    for c in courses:
+        if not compat[c]:
+            continue
+        for t in timeslots:
+            y[(c, t)] = model.NewBoolVar(f"y_{c}_{t}")
+
+    # Credits: each course scheduled exactly 'credits' times per week
+    for c in courses:
+        credits = course_credits.get(c, 3)
+        model.Add(Sum([y[(c, t)] for t in timeslots if (c, t) in y]) == credits)
+
+    # Faculty cannot teach two courses in same timeslot
+    faculty_courses = {}
+    for c in courses:
+        if compat[c]:
+            faculty_courses.setdefault(faculty_map[c], []).append(c)
+    for f_courses in faculty_courses.values():
+        if len(f_courses) < 2:
+            continue
+        for t in timeslots:
+            model.AddAtMostOne([y[(c, t)] for c in f_courses])
+
+    # Room-count capacity: group courses by their compatible-room set, then
+    # bound every group (and every group whose room set is a superset of
+    # another's, which covers the nested capacity thresholds) per slot.
+    groups = {}
+    for c in courses:
+        if compat[c]:
+            groups.setdefault(frozenset(compat[c]), []).append(c)
+    for room_set in groups:
+        members = [c for other, cs in groups.items() if other <= room_set for c in cs]
+        if len(members) <= len(room_set):
+            continue
+        for t in timeslots:
+            model.Add(Sum([y[(c, t)] for c in members]) <= len(room_set))
+
+    add_section_constraints(model, courses, timeslots, section_map, y)
+
+    for (c, t), value in fixed.items():
+        if (c, t) in y:
+            model.Add(y[(c, t)] == value)
+
+    for t, slot_courses in forbidden_sets or []:
+        slot_vars = [y[(c, t)] for c in slot_courses if (c, t) in y]
+        if slot_vars:
+            model.Add(Sum(slot_vars) <= len(slot_vars) - 1)
+
+    return model, y
+
+
+def match_rooms_for_slot(slot_courses, compat, room_cap):
+    """
+    Stage two: bipartite matching of the courses placed in one slot to rooms.
+    Uses augmenting paths (Kuhn's algorithm); the most constrained courses are
+    placed first and compat lists are ordered smallest room first, so big rooms
+    stay free for big batches.
+
+    Returns dict course_id -> room_id, or None if no complete matching exists.
+    """
+    room_owner = {}
+
+    def try_assign(c, seen):
+        for r in compat[c]:
+            if r in seen:
+                continue
+            seen.add(r)
+            if r not in room_owner or try_assign(room_owner[r], seen):
+                room_owner[r] = c
+                return True
+        return False
+
+    order = sorted(slot_courses, key=lambda c: (len(compat[c]), -min(room_cap[r] for r in compat[c])))
+    for c in order:
+        if not try_assign(c, set()):
+            return None
+    return {c: r for r, c in room_owner.items()}
@@ -1,16 +1,25 @@
-from typing import Any, List, Optional
+from typing import Any, List, Optional, Union
 from datetime import date
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import IntegrityError
 from app.api import deps
-from app.models.academic import Attendance as AttendanceModel
-from app.models.user import Student as StudentModel
-from app.schemas.academic import Attendance, AttendanceCreate
+from app.core.config import settings
+from app.schemas.academic import Attendance, AttendanceCreate, AttendanceRegister
+from app.services.attendance_upsert import upsert_attendance, prepare_attendance, register_records
+from app.services.attendance_buffer import attendance_buffer
+from app.services.attendance_read import (
+    MAX_PAGE_SIZE, query_attendance, iter_attendance, iter_ndjson, iter_csv as iter_attendance_csv,
+    attendance_statement,
+)
+from app.services.attendance_rollups import (
+    SHORTAGE_THRESHOLD, student_percentages, course_summaries, rebuild_rollups,
+)
 
 router = APIRouter()
 
-@router.get("/", response_model=List[Attendance])
+@router.get("/", response_model=List[Attendance], deprecated=True)
 def read_attendance(
     db: Session = Depends(deps.get_db),
     skip: int = 0,
@@ -20,71 +29,139 @@ def read_attendance(
     student_id: Optional[int] = None,
 ) -> Any:
     """
-    Retrieve attendance records. Always returns a list.
+    Retrieve attendance records as a plain list (OFFSET paging).
+    Prefer /attendance/query, which pages with a cursor and filters by range.
     """
+    stmt = attendance_statement(
+        start_date=attendance_date, end_date=attendance_date, course_code=course_code, student_id=student_id,
+    )
+    return [row._asdict() for row in db.execute(stmt.offset(skip).limit(limit))]
+
+@router.get("/query")
+def query_attendance_records(
+    db: Session = Depends(deps.get_db),
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    course_code: Optional[str] = None,
+    status: Optional[str] = None,
+    student_id: Optional[int] = None,
+    semester: Optional[int] = None,
+    department: Optional[str] = None,
+    batch: Optional[str] = None,
+) -> Any:
+    """
+    Attendance rows ordered by date, one page at a time. Pass next_cursor
+    back as cursor for the following page; it is null on the last one.
+    semester and department are those of the course, batch that of the student.
+    """
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise HTTPException(status_code=400, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
     try:
-        query = db.query(AttendanceModel)
-        if course_code:
-            query = query.filter(AttendanceModel.course_code == course_code)
-        if attendance_date:
-            query = query.filter(AttendanceModel.attendance_date == attendance_date)
-        if student_id:
-            query = query.filter(AttendanceModel.student_id == student_id)
-        
-        return query.offset(skip).limit(limit).all()
-    except Exception as e:
-        print(f"ERROR in GET attendance: {str(e)}")
-        return []
+        return query_attendance(
+            db, limit=limit, cursor=cursor, start_date=start_date, end_date=end_date, course_code=course_code,
+            status=status, student_id=student_id, semester=semester, department=department, batch=batch,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
 
-@router.post("/bulk", response_model=List[Attendance])
-def create_bulk_attendance(
-    *,
+@router.get("/export")
+def export_attendance(
+    db: Session = Depends(deps.get_db),
+    format: str = "ndjson",
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    course_code: Optional[str] = None,
+    status: Optional[str] = None,
+    student_id: Optional[int] = None,
+    semester: Optional[int] = None,
+    department: Optional[str] = None,
+    batch: Optional[str] = None,
+) -> Any:
+    """
+    Stream every matching attendance row as NDJSON (format=ndjson) or CSV
+    (format=csv). Rows are read in keyset chunks while the response is
+    written, so memory use does not grow with the export.
+    """
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    rows = iter_attendance(
+        db, start_date=start_date, end_date=end_date, course_code=course_code, status=status,
+        student_id=student_id, semester=semester, department=department, batch=batch,
+    )
+    headers = {"Content-Disposition": f'attachment; filename="attendance.{format}"'}
+    if format == "csv":
+        return StreamingResponse(iter_attendance_csv(rows), media_type="text/csv", headers=headers)
+    return StreamingResponse(iter_ndjson(rows), media_type="application/x-ndjson", headers=headers)
+
+@router.get("/percentages")
+def read_attendance_percentages(
+    db: Session = Depends(deps.get_db),
+    student_id: Optional[int] = None,
+    course_code: Optional[str] = None,
+    semester: Optional[int] = None,
+    batch: Optional[str] = None,
+) -> Any:
+    """
+    Attendance percentage per student and course, read from the rollups
+    (late counts as attended).
+    """
+    return student_percentages(db, student_id=student_id, course_code=course_code, semester=semester, batch=batch)
+
+@router.get("/shortage")
+def read_attendance_shortage(
+    db: Session = Depends(deps.get_db),
+    threshold: float = SHORTAGE_THRESHOLD,
+    course_code: Optional[str] = None,
+    semester: Optional[int] = None,
+    batch: Optional[str] = None,
+) -> Any:
+    """
+    Students whose attendance in a course is below the threshold (75% by default).
+    """
+    return student_percentages(db, course_code=course_code, semester=semester, batch=batch, below=threshold)
+
+@router.get("/summary")
+def read_attendance_summary(
     db: Session = Depends(deps.get_db),
-    attendance_in: List[AttendanceCreate]
+    course_code: Optional[str] = None,
+    semester: Optional[int] = None,
+    batch: Optional[str] = None,
+    threshold: float = SHORTAGE_THRESHOLD,
 ) -> Any:
     """
-    Create bulk attendance records. Accepts a List[AttendanceCreate].
-    Uses an upsert strategy for student_id + course_code + attendance_date + period.
+    Per course and semester: students, totals, average percentage and the
+    number of students below the threshold.
+    """
+    return course_summaries(db, course_code=course_code, semester=semester, batch=batch, threshold=threshold)
+
+@router.post("/rollups/rebuild")
+def rebuild_attendance_rollups(
+    db: Session = Depends(deps.get_db),
+    current_user: Any = Depends(deps.get_current_active_admin),
+) -> Any:
     """
-    print(f"INFO: Processing {len(attendance_in)} records")
-    new_records = []
+    Recompute all attendance rollups from the attendance table (backfills,
+    rows written outside the API).
+    """
+    return {"rollups": rebuild_rollups(db)}
+
+def _buffer_attendance(db: Session, records: List[dict]) -> dict:
+    """Validate records and queue them in the write-behind buffer."""
+    rows, skipped = prepare_attendance(db, records)
+    if not rows:
+        return {"token": None, "status": None, "accepted": 0, "skipped": skipped}
+    try:
+        ack = attendance_buffer.submit(rows)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return {"token": ack.id, "status": ack.status, "accepted": len(rows), "skipped": skipped}
+
+def _write_attendance(db: Session, records: List[dict]) -> dict:
+    """Upsert records now, turning database errors into 400/500 responses."""
     try:
-        for record in attendance_in:
-            data = record.dict()
-            
-            # 1. Validate that the student exists in the database to avoid IntegrityErrors (ForeignKey)
-            # This is critical because the frontend mock data might have more students than the DB
-            student_exists = db.query(StudentModel).filter(StudentModel.id == data["student_id"]).first()
-            if not student_exists:
-                print(f"WARNING: Student ID {data['student_id']} does not exist in DB. Skipping.")
-                continue
-
-            # Check if record already exists for this unique combination
-            existing = db.query(AttendanceModel).filter(
-                AttendanceModel.student_id == data["student_id"],
-                AttendanceModel.course_code == data["course_code"],
-                AttendanceModel.attendance_date == data["attendance_date"],
-                AttendanceModel.period == data["period"]
-            ).first()
-            
-            if existing:
-                existing.status = data["status"]
-                db.add(existing)
-                new_records.append(existing)
-            else:
-                db_obj = AttendanceModel(**data)
-                db.add(db_obj)
-                new_records.append(db_obj)
-                
-        db.commit()
-        for rec in new_records:
-            try:
-                db.refresh(rec)
-            except Exception:
-                db.rollback()
-                continue
-        print(f"SUCCESS: Saved {len(new_records)} records")
-        return new_records
+        return upsert_attendance(db, records)
     except IntegrityError as ie:
         db.rollback()
         print(f"INTEGRITY ERROR: {str(ie)}")
@@ -93,45 +170,101 @@ def create_bulk_attendance(
             detail="Database integrity error: Ensure all students and courses exist in the system."
         )
     except Exception as e:
-        print(f"CRITICAL ERROR in bulk attendance: {str(e)}")
+        print(f"CRITICAL ERROR in attendance write: {str(e)}")
         db.rollback()
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Internal Server Error: {str(e)}"
         )
 
+@router.post("/bulk", response_model=List[Attendance])
+def create_bulk_attendance(
+    *,
+    db: Session = Depends(deps.get_db),
+    attendance_in: Union[List[AttendanceCreate], AttendanceRegister],
+    response: Response,
+    write_behind: Optional[bool] = None,
+) -> Any:
+    """
+    Create bulk attendance records. Accepts a List[AttendanceCreate], or a
+    columnar AttendanceRegister for a whole class (shared course_code, date
+    and period plus parallel student_ids and statuses), which is answered
+    with the counts only instead of the written rows.
+    Upserts on student_id + course_code + attendance_date + period with
+    batched multi-row statements; records of unknown students are skipped.
+    The X-Attendance-Inserted/-Updated/-Skipped headers report the counts.
+
+    In write-behind mode (write_behind=true, or ATTENDANCE_WRITE_BEHIND) the
+    records are queued instead and a 202 with an acknowledgement token is
+    returned; poll /attendance/acks/{token} until it is flushed.
+    """
+    is_register = isinstance(attendance_in, AttendanceRegister)
+    records = register_records(attendance_in) if is_register else [record.dict() for record in attendance_in]
+    print(f"INFO: Processing {len(records)} records")
+    if settings.ATTENDANCE_WRITE_BEHIND if write_behind is None else write_behind:
+        return JSONResponse(status_code=202, content=_buffer_attendance(db, records))
+    result = _write_attendance(db, records)
+    response.headers["X-Attendance-Inserted"] = str(result["inserted"])
+    response.headers["X-Attendance-Updated"] = str(result["updated"])
+    response.headers["X-Attendance-Skipped"] = str(result["skipped"])
+    print(f"SUCCESS: Saved {len(result['rows'])} records "
+          f"({result['inserted']} inserted, {result['updated']} updated, {result['skipped']} skipped)")
+    if is_register:
+        counts = {k: result[k] for k in ("inserted", "updated", "skipped")}
+        return JSONResponse(content=counts, headers=dict(response.headers))
+    return result["rows"]
+
 @router.post("/", response_model=Attendance)
 def create_attendance(
     *,
     db: Session = Depends(deps.get_db),
-    record_in: AttendanceCreate
+    record_in: AttendanceCreate,
+    write_behind: Optional[bool] = None,
 ) -> Any:
     """
-    Create a single attendance record.
+    Create a single attendance record (queued and acknowledged with a token
+    in write-behind mode, like /bulk).
     """
     data = record_in.dict()
-    
-    # Validate student existence
-    student_exists = db.query(StudentModel).filter(StudentModel.id == data["student_id"]).first()
-    if not student_exists:
+    if settings.ATTENDANCE_WRITE_BEHIND if write_behind is None else write_behind:
+        queued = _buffer_attendance(db, [data])
+        if not queued["accepted"]:
+            raise HTTPException(status_code=400, detail=f"Student ID {data['student_id']} not found in database.")
+        return JSONResponse(status_code=202, content=queued)
+    result = _write_attendance(db, [data])
+    if not result["rows"]:
         raise HTTPException(status_code=400, detail=f"Student ID {data['student_id']} not found in database.")
+    return result["rows"][0]
 
-    existing = db.query(AttendanceModel).filter(
-        AttendanceModel.student_id == data["student_id"],
-        AttendanceModel.course_code == data["course_code"],
-        AttendanceModel.attendance_date == data["attendance_date"],
-        AttendanceModel.period == data["period"]
-    ).first()
-    
-    if existing:
-        existing.status = data["status"]
-        db.add(existing)
-        db.commit()
-        db.refresh(existing)
-        return existing
-        
-    db_obj = AttendanceModel(**data)
-    db.add(db_obj)
-    db.commit()
-    db.refresh(db_obj)
-    return db_obj
+@router.get("/acks/{token}")
+def read_attendance_ack(token: str) -> Any:
+    """
+    Status of a write-behind submission: pending until its batch is committed,
+    then flushed (or failed after repeated errors).
+    """
+    ack = attendance_buffer.get(token)
+    if ack is None:
+        raise HTTPException(status_code=404, detail="Unknown or expired acknowledgement token")
+    return ack.to_status()
+
+@router.get("/buffer/metrics")
+def read_attendance_buffer_metrics() -> Any:
+    """
+    Write-behind buffer depth, merge counts and flush latency.
+    """
+    return attendance_buffer.stats()
+
+@router.post("/buffer/flush")
+def flush_attendance_buffer(
+    current_user: Any = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Write all buffered attendance now.
+    """
+    flushed = 0
+    while True:
+        written = attendance_buffer.flush()
+        if not written:
+            break
+        flushed += written
+    return {"flushed": flushed, "depth": attendance_buffer.stats()["depth"]}
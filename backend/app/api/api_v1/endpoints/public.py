@@ -2,14 +2,14 @@ from typing import Any, List, Optional
 from fastapi import APIRouter, Depends, Query
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
-from datetime import datetime, time
 
 from app import models, schemas
 from app.api import deps
-from app.models.academic import TimetableSlot, Room, TimeSlot, WeekDay, Course
+from app.models.academic import Room
 from app.models.user import User, Faculty
 from app.models.navigation import Location, FacultyLocation
 from app.schemas.navigation import SearchResponse, SearchResult, Location as LocationSchema
+from app.services.occupancy import occupancy_index, FACULTY
 
 router = APIRouter()
 
@@ -51,10 +51,8 @@ def search_people_and_places(
         )
     ).limit(10).all()
 
-    # Get current time and day for timetable lookup
-    now = datetime.now()
-    current_day = now.strftime('%A')
-    current_time = now.time()
+    # Timeslots in progress right now, for the timetable lookup
+    current_slots = occupancy_index.ensure_loaded(db).current_slot_ids()
 
     for f in faculty_members:
         # Determine location
@@ -71,18 +69,12 @@ def search_people_and_places(
         else:
             # Check Timetable
             # Find a slot where this faculty is teaching right now
-            slot = db.query(TimetableSlot).join(Course).join(TimeSlot).filter(
-                Course.instructor_id == f.id,
-                TimeSlot.day == WeekDay(current_day),
-                TimeSlot.start_time <= current_time,
-                TimeSlot.end_time >= current_time,
-                TimetableSlot.is_active == True
-            ).first()
-
-            if slot:
-                loc_name = slot.room.name if slot.room else "Classroom"
-                block = slot.room.building if slot.room else block
-                floor = slot.room.floor if slot.room else floor
+            bookings = occupancy_index.bookings_at(FACULTY, f.id, current_slots)
+            if bookings:
+                room = db.get(Room, bookings[0]["room_id"])
+                loc_name = room.name if room else "Classroom"
+                block = room.building if room else block
+                floor = room.floor if room else floor
                 loc_source = "timetable"
 
         results.append(SearchResult(
@@ -125,10 +117,6 @@ def get_faculty_location(
         return {"detail": "Faculty not found"}
 
     # Logic similar to search loop above
-    now = datetime.now()
-    current_day = now.strftime('%A')
-    current_time = now.time()
-
     loc_name = "Department Office"
     loc_source = "default"
     block = f.department
@@ -139,16 +127,13 @@ def get_faculty_location(
         loc_name = manual_loc.current_location
         loc_source = "manual"
     else:
-        slot = db.query(TimetableSlot).join(Course).join(TimeSlot).filter(
-            Course.instructor_id == f.id,
-            TimeSlot.day == WeekDay(current_day),
-            TimeSlot.start_time <= current_time,
-            TimeSlot.end_time >= current_time
-        ).first()
-        if slot:
-            loc_name = slot.room.name
-            block = slot.room.building
-            floor = slot.room.floor
+        index = occupancy_index.ensure_loaded(db)
+        bookings = index.bookings_at(FACULTY, f.id, index.current_slot_ids())
+        room = db.get(Room, bookings[0]["room_id"]) if bookings else None
+        if room:
+            loc_name = room.name
+            block = room.building
+            floor = room.floor
             loc_source = "timetable"
 
     return SearchResult(
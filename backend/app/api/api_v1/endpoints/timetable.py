@@ -1,15 +1,29 @@
-from typing import Any, List, Dict
-from fastapi import APIRouter, Depends, HTTPException
+import datetime
+import time
+from typing import Any, List, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Response, Header
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from app import crud, models
 from app.api import deps
-from app.services.timetable_opt import TimetableSolver
+from app.core.config import settings
+from app.services.timetable_opt import (
+    TimetableSolver, DecomposedTimetableSolver,
+    MODE_ROOMS, SOLVER_MODES, ENGINE_MONOLITHIC, ENGINE_DECOMPOSED, ENGINES,
+    OBJECTIVE_NONE, OBJECTIVE_DAY_SPREAD, OBJECTIVES,
+)
 from app.services.faculty_predictor import faculty_predictor
+from app.services.occupancy import occupancy_index, ROOM, FACULTY
+from app.services.timetable_grid import parse_period
 import app.schemas.ai_optimization as ai_schemas
 from pydantic import BaseModel
 
 router = APIRouter()
 
+# Weekly grid used when no TimeSlot rows exist (matches the React timetable layout)
+DEFAULT_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
+DEFAULT_TIMES = ["09:40", "10:40", "11:40", "01:20", "02:20", "03:20"]  # grid labels, see timetable_grid
+
 class TimetableSaveRequest(BaseModel):
     year: int
     semester: int
@@ -21,13 +35,49 @@ class TimetablePublishRequest(BaseModel):
     semester: int
     department: str
 
-@router.get("/all")
+# Columns of timetable_slots, the shape /all has always returned
+ALL_TIMETABLE_FIELDS = (
+    "id", "course_id", "room_id", "time_slot_id", "section", "semester", "is_published",
+    "is_active", "start_date", "end_date", "recurrence_rule",
+)
+
+@router.get("/all", deprecated=True)
 def get_all_timetables(db: Session = Depends(deps.get_db)) -> Any:
-    """Return all saved timetables."""
-    from app.models.academic import TimetableSlot
-    slots = db.query(TimetableSlot).all()
-    # Simple formatting for demo, in production we'd return a better structured object
-    return [s.__dict__ for s in slots] if slots else []
+    """Return all saved timetables. Deprecated: use /slots, which filters and pages."""
+    from app.services.timetable_read import query_timetable_slots
+    return query_timetable_slots(db, ALL_TIMETABLE_FIELDS, limit=None)["items"]
+
+@router.get("/slots")
+def list_timetable_slots(
+    semester: Optional[int] = None,
+    section: Optional[str] = None,
+    department: Optional[str] = None,
+    room: Optional[str] = None,
+    faculty_id: Optional[int] = None,
+    day: Optional[str] = None,
+    is_published: Optional[bool] = None,
+    is_active: Optional[bool] = True,
+    fields: Optional[str] = None,
+    limit: int = 100,
+    cursor: Optional[int] = None,
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    Saved timetable slots with room, course and time-slot data, filtered and
+    paged by cursor: pass next_cursor from the previous page to get the next.
+    `fields` is a comma-separated projection, e.g. fields=course_code,room_name,day,start_time.
+    """
+    from app.services.timetable_read import query_timetable_slots, parse_fields, MAX_PAGE_SIZE
+
+    try:
+        projection = parse_fields(fields)
+        return query_timetable_slots(
+            db, projection, limit=max(1, min(limit, MAX_PAGE_SIZE)), cursor=cursor,
+            semester=semester, section=section, department=department, room=room,
+            faculty_id=faculty_id, day=day, is_published=is_published, is_active=is_active,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 @router.post("/save")
 def save_timetable(
@@ -35,68 +85,20 @@ def save_timetable(
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_admin),
 ) -> Any:
-    """Save a generated timetable schedule."""
-    from app.models.academic import TimetableSlot, Course, Room, TimeSlot, WeekDay
-    import datetime
-
-    # 1. Clear existing slots for this context
-    db.query(TimetableSlot).filter(
-        TimetableSlot.semester == request.semester,
-        TimetableSlot.section == request.section
-    ).delete()
-
-    # 2. Process schedule
-    saved_count = 0
-    for slot_key, entry in request.schedule.items():
-        if not entry: continue
-        
-        try:
-            day_str, time_str = slot_key.split('-')
-            
-            # Lookup Course
-            course = db.query(Course).filter(Course.code == entry['courseCode']).first()
-            if not course:
-                # Create course if missing for demo
-                course = Course(code=entry['courseCode'], name=entry['courseName'], semester=request.semester, department=request.department)
-                db.add(course)
-                db.flush()
-
-            # Lookup Room
-            room = db.query(Room).filter(Room.name == entry['room']).first()
-            if not room:
-                room = Room(name=entry['room'], capacity=60, room_type="Classroom")
-                db.add(room)
-                db.flush()
-
-            # Lookup/Create TimeSlot
-            start_time = datetime.datetime.strptime(time_str, "%H:%M").time()
-            time_slot = db.query(TimeSlot).filter(
-                TimeSlot.day == WeekDay(day_str),
-                TimeSlot.start_time == start_time
-            ).first()
-            if not time_slot:
-                end_time = (datetime.datetime.combine(datetime.date.today(), start_time) + datetime.timedelta(hours=1)).time()
-                time_slot = TimeSlot(day=WeekDay(day_str), start_time=start_time, end_time=end_time)
-                db.add(time_slot)
-                db.flush()
-
-            # Create TimetableSlot
-            new_slot = TimetableSlot(
-                course_id=course.id,
-                room_id=room.id,
-                time_slot_id=time_slot.id,
-                section=request.section,
-                semester=request.semester,
-                is_published=False
-            )
-            db.add(new_slot)
-            saved_count += 1
-        except Exception as e:
-            print(f"Error saving slot {slot_key}: {e}")
-            continue
+    """
+    Save a generated timetable schedule. Only the differences from the
+    section's saved timetable are written; the response counts them.
+    """
+    from app.services.timetable_save import bulk_save_schedule
 
-    db.commit()
-    return {"status": "saved", "count": saved_count, "section": request.section}
+    try:
+        counts = bulk_save_schedule(db, request.schedule, request.semester, request.section, request.department)
+    except Exception as e:
+        db.rollback()
+        print(f"ERROR saving timetable: {e}")
+        raise HTTPException(status_code=500, detail="Could not save the timetable")
+    occupancy_index.refresh(db, request.semester, request.section)
+    return {"status": "saved", "section": request.section, **counts}
 
 @router.post("/publish")
 def publish_timetable(
@@ -104,30 +106,66 @@ def publish_timetable(
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_admin),
 ) -> Any:
-    """Mark all timetables for a semester/department as published."""
+    """
+    Mark all timetables for a semester/department as published and
+    materialise one snapshot per section for /published/{semester}/{section}.
+    """
     from app.models.academic import TimetableSlot
+    from app.services.published_timetables import published_timetables
     db.query(TimetableSlot).filter(
         TimetableSlot.semester == request.semester
     ).update({"is_published": True})
     db.commit()
-    return {"status": "published", "count": "all"}
+    occupancy_index.refresh(db, request.semester)
+    snapshots = published_timetables.publish(db, request.semester)
+    return {
+        "status": "published",
+        "count": "all",
+        "sections": [{"section": snap.section, "version": snap.version, "etag": snap.etag} for snap in snapshots],
+    }
+
+@router.get("/published/{semester}/{section}")
+def get_published_timetable(
+    semester: int,
+    section: str,
+    if_none_match: Optional[str] = Header(None),
+    accept_encoding: Optional[str] = Header(None),
+    db: Session = Depends(deps.get_db),
+) -> Any:
+    """
+    The published timetable of a section, served from its publish-time
+    snapshot. Send the ETag back in If-None-Match to get 304 Not Modified.
+    """
+    from app.services.published_timetables import published_timetables, accepts_gzip
+
+    snapshot = published_timetables.get(db, semester, section)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="No published timetable for this section")
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": "public, no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if snapshot.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    if accepts_gzip(accept_encoding):
+        headers["Content-Encoding"] = "gzip"
+        return Response(content=snapshot.body_gzip, media_type="application/json", headers=headers)
+    return Response(content=snapshot.body, media_type="application/json", headers=headers)
 
 
 class TimetableGenerateRequest(BaseModel):
     year: int
     semester: int
     department: str
+    solver_mode: str = MODE_ROOMS  # "rooms" or "room_classes"
+    engine: str = ENGINE_MONOLITHIC  # "monolithic" or "decomposed"
+    use_cache: bool = True  # serve identical problems from the solution cache
+    snapshot: bool = False  # save the CP-SAT model for offline replay (SOLVER_SNAPSHOT_DIR)
+    objective: str = OBJECTIVE_NONE  # "none" (first feasible timetable) or "day_spread"
 
-@router.post("/generate", response_model=List[Dict[str, Any]])
-def generate_timetable(
-    request: TimetableGenerateRequest,
-    db: Session = Depends(deps.get_db),
-    current_user: models.User = Depends(deps.get_current_active_admin),
-) -> Any:
-    """
-    Generate optimal timetable using AI (Constraint Satisfaction Problem).
-    """
-    # 1. Fetch Resources
+def _load_generation_inputs(request: TimetableGenerateRequest, db: Session):
+    """Load (courses, rooms, slots) for a generate request, falling back to demo data."""
     # In a real app, we would filter by department and sem/year in DB:
     # courses = db.query(models.Course).filter(
     #     models.Course.department == request.department,
@@ -203,30 +241,422 @@ def generate_timetable(
         def __init__(self, id): self.id = id
     
     # Generate (Day * Time) slots
-    days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-    times = ["09:40", "10:40", "11:40", "01:20", "02:20", "03:20"] 
-    
     slots = []
-    for d in days:
-        for t in times:
+    for d in DEFAULT_DAYS:
+        for t in DEFAULT_TIMES:
             slots.append(MockSlot(f"{d}-{t}"))
             
     if not courses or not rooms:
          raise HTTPException(status_code=400, detail="Not enough data (courses/rooms) to generate timetable")
 
-    # 2. Run Solver
-    solver = TimetableSolver(courses, rooms, slots)
-    schedule = solver.solve()
+    return courses, rooms, slots
+
+def _build_generation_solver(request: TimetableGenerateRequest, db: Session) -> TimetableSolver:
+    """Load courses/rooms/slots for a generate request and return the configured solver."""
+    courses, rooms, slots = _load_generation_inputs(request, db)
+
+    if request.solver_mode not in SOLVER_MODES:
+        raise HTTPException(status_code=400, detail=f"Unknown solver_mode. Expected one of {list(SOLVER_MODES)}")
+    if request.engine not in ENGINES:
+        raise HTTPException(status_code=400, detail=f"Unknown engine. Expected one of {list(ENGINES)}")
+    if request.objective not in OBJECTIVES:
+        raise HTTPException(status_code=400, detail=f"Unknown objective. Expected one of {list(OBJECTIVES)}")
+
+    snapshot_dir = settings.SOLVER_SNAPSHOT_DIR if request.snapshot else None
+    if request.engine == ENGINE_DECOMPOSED:
+        return DecomposedTimetableSolver(courses, rooms, slots, snapshot_dir=snapshot_dir, objective=request.objective)
+    return TimetableSolver(courses, rooms, slots, mode=request.solver_mode, snapshot_dir=snapshot_dir,
+                           objective=request.objective)
+
+@router.post("/generate", response_model=List[Dict[str, Any]])
+def generate_timetable(
+    request: TimetableGenerateRequest,
+    response: Response,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Generate optimal timetable using AI (Constraint Satisfaction Problem).
+    """
+    from app.services.timetable_cache import timetable_cache, solve_with_cache
+
+    from app.services.timetable_opt import presolve_checks, find_infeasible_families
+
+    started = time.monotonic()
+
+    # 1. Fetch Resources
+    solver = _build_generation_solver(request, db)
+
+    # Hopeless inputs are rejected in linear time, before any solver minutes are spent
+    reasons = presolve_checks(solver.problem_data())
+    if reasons:
+        raise HTTPException(status_code=400, detail={
+            "message": "The timetable cannot be generated with the current data.",
+            "reasons": reasons,
+        })
+
+    # 2. Run Solver (identical problems are answered from the cache)
+    if request.use_cache and not request.snapshot:
+        schedule, hit = solve_with_cache(
+            solver, timetable_cache,
+            time_limit=settings.TIMETABLE_MAX_SOLVE_SECONDS,
+            num_workers=settings.TIMETABLE_SEARCH_WORKERS,
+        )
+        response.headers["X-Cache"] = "HIT" if hit else "MISS"
+    else:
+        schedule = solver.solve(
+            time_limit=settings.TIMETABLE_MAX_SOLVE_SECONDS,
+            num_workers=settings.TIMETABLE_SEARCH_WORKERS,
+        )
+
+    # Report model size/timings next to the result without changing the body shape
+    stats = solver.stats
+    print(f"INFO: Timetable model built in {stats.get('model_build_ms')}ms with "
+          f"{stats.get('num_variables')} variables; solved in {stats.get('solve_ms')}ms ({stats.get('status')})")
+    response.headers["X-Model-Build-Ms"] = str(stats.get("model_build_ms"))
+    response.headers["X-Model-Variables"] = str(stats.get("num_variables"))
+    response.headers["X-Solve-Ms"] = str(stats.get("solve_ms"))
+    response.headers["X-Solver-Status"] = str(stats.get("status"))
     
     if not schedule:
-        raise HTTPException(status_code=400, detail="Could not find a feasible solution. Try adding more rooms or reducing courses.")
+        detail: Any = "Could not find a feasible solution. Try adding more rooms or reducing courses."
+        # Diagnosis only spends what is left of this request's solve budget
+        remaining = settings.TIMETABLE_MAX_SOLVE_SECONDS - (time.monotonic() - started)
+        if stats.get("status") == "INFEASIBLE" and remaining > 0:
+            culprits = find_infeasible_families(
+                solver.problem_data(),
+                time_limit=min(10.0, remaining),
+                num_workers=settings.TIMETABLE_SEARCH_WORKERS,
+            )
+            detail = {"message": detail, "reasons": culprits}
+        raise HTTPException(status_code=400, detail=detail)
         
     return schedule
 
+class TimetableIncrementalRequest(TimetableGenerateRequest):
+    section: str = "A"
+    neighbourhood_radius: int = 1  # hops over shared faculty/rooms from the changed courses
+    fix_outside_neighbourhood: bool = True  # False = hints only, everything may move
+
+@router.post("/generate-incremental")
+def generate_timetable_incremental(
+    request: TimetableIncrementalRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Re-solve after a small change (course added, room removed, ...) starting from
+    the saved timetable of the semester/section, keeping it as stable as possible.
+    Only this section's courses are placed; other sections stay as saved.
+    """
+    from app.services.timetable_incremental import (
+        IncrementalTimetableSolver, load_saved_assignments, load_other_bookings, section_courses,
+        build_neighbourhood, diff_assignments,
+    )
+
+    courses, rooms, slots = _load_generation_inputs(request, db)
+    saved = load_saved_assignments(db, request.semester, request.section)
+    # Only this section's courses are re-solved; other sections keep their rooms and faculty
+    courses = section_courses(courses, request.semester, request.department, saved)
+    if not courses:
+        raise HTTPException(status_code=400, detail="No courses found for this semester/section")
+    blocked, busy_faculty = load_other_bookings(db, request.semester, request.section)
+    free_courses = None
+    if request.fix_outside_neighbourhood and saved:
+        free_courses = build_neighbourhood(saved, courses, rooms, radius=request.neighbourhood_radius)
+
+    solver = IncrementalTimetableSolver(
+        courses, rooms, slots, saved=saved, free_courses=free_courses,
+        blocked=blocked, busy_faculty=busy_faculty,
+    )
+    schedule = solver.solve(
+        time_limit=settings.TIMETABLE_MAX_SOLVE_SECONDS,
+        num_workers=settings.TIMETABLE_SEARCH_WORKERS,
+    )
+    if not schedule:
+        raise HTTPException(status_code=400, detail="Could not find a feasible solution. Try adding more rooms or reducing courses.")
+
+    new = {(e["course_code"], e["slot_id"], e["room_name"]) for e in schedule}
+    return {
+        "schedule": schedule,
+        "diff": diff_assignments(saved, new),
+        "free_courses": sorted(free_courses) if free_courses is not None else None,
+        "solver_stats": solver.stats,
+    }
+
+class TimetableJobRequest(TimetableGenerateRequest):
+    max_solve_seconds: Optional[float] = None  # capped at TIMETABLE_MAX_SOLVE_SECONDS
+    search_workers: Optional[int] = None  # capped at TIMETABLE_SEARCH_WORKERS
+    objective: str = OBJECTIVE_DAY_SPREAD  # jobs keep improving until accepted, optimal or out of time
+    # engine: only "monolithic"; the decomposed engine has no complete timetable to
+    # report until its room-matching repairs finish
+
+def _get_job_or_404(job_id: str):
+    from app.services.timetable_jobs import timetable_jobs
+    job = timetable_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Timetable job not found")
+    return job
+
+@router.post("/jobs", status_code=202)
+def create_timetable_job(
+    request: TimetableJobRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Start timetable generation in the background and return a job id immediately.
+    Poll /jobs/{job_id} for progress and /jobs/{job_id}/result for the schedule.
+    Jobs run the monolithic engine only.
+    """
+    from app.services.timetable_jobs import timetable_jobs
+
+    from app.services.timetable_opt import presolve_checks
+
+    if request.engine == ENGINE_DECOMPOSED:
+        raise HTTPException(
+            status_code=400,
+            detail="The decomposed engine cannot stream or accept intermediate timetables; "
+                   "use engine 'monolithic' for jobs, or /generate for the decomposed engine.",
+        )
+    # Inputs are loaded here, on the request's session; the job thread only solves
+    solver = _build_generation_solver(request, db)
+    reasons = presolve_checks(solver.problem_data())
+    if reasons:
+        raise HTTPException(status_code=400, detail={
+            "message": "The timetable cannot be generated with the current data.",
+            "reasons": reasons,
+        })
+    time_limit = min(request.max_solve_seconds or settings.TIMETABLE_MAX_SOLVE_SECONDS,
+                     settings.TIMETABLE_MAX_SOLVE_SECONDS)
+    num_workers = min(request.search_workers or settings.TIMETABLE_SEARCH_WORKERS,
+                      settings.TIMETABLE_SEARCH_WORKERS)
+    try:
+        job = timetable_jobs.submit(
+            solver,
+            params=request.model_dump(),
+            time_limit=time_limit,
+            num_workers=num_workers,
+        )
+    except RuntimeError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return {"job_id": job.id, "status": job.status}
+
+@router.get("/jobs/{job_id}")
+def get_timetable_job(
+    job_id: str,
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """Live status of a generation job: progress, solutions found, best objective, elapsed time."""
+    return _get_job_or_404(job_id).to_status()
+
+@router.post("/jobs/{job_id}/cancel")
+def cancel_timetable_job(
+    job_id: str,
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """Cancel a queued or running job. A running search keeps its best solution so far."""
+    from app.services.timetable_jobs import timetable_jobs
+    _get_job_or_404(job_id)
+    return timetable_jobs.cancel(job_id).to_status()
+
+@router.post("/jobs/{job_id}/accept")
+def accept_timetable_job(
+    job_id: str,
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """Stop the search now and keep the best timetable found so far as the job result."""
+    from app.services.timetable_jobs import timetable_jobs
+    _get_job_or_404(job_id)
+    try:
+        return timetable_jobs.accept(job_id).to_status()
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+def _event_stream(job) -> StreamingResponse:
+    from app.services.timetable_jobs import job_events
+    return StreamingResponse(
+        job_events(job),
+        media_type="text/event-stream",
+        # Stop proxies (nginx) from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.get("/jobs/{job_id}/events")
+def stream_timetable_job(
+    job_id: str,
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Server-Sent Events for a job: "solution" events carry each improving
+    timetable (same shape as /generate) with its objective and elapsed time,
+    and a final "done" event carries the job status. POST /jobs/{job_id}/accept
+    to take the current solution and stop the search.
+    """
+    return _event_stream(_get_job_or_404(job_id))
+
+@router.post("/generate/stream")
+def generate_timetable_stream(
+    request: TimetableJobRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Start a generation job and stream its progress as Server-Sent Events.
+    The first "job" event carries the job id used to accept or cancel it.
+    """
+    return _event_stream(_get_job_or_404(create_timetable_job(request, db, current_user)["job_id"]))
+
+@router.get("/jobs/{job_id}/result", response_model=List[Dict[str, Any]])
+def get_timetable_job_result(
+    job_id: str,
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """Schedule produced by a finished job, in the same shape as /generate."""
+    from app.services.timetable_jobs import FINISHED_STATES
+    job = _get_job_or_404(job_id)
+    if job.status not in FINISHED_STATES:
+        raise HTTPException(status_code=409, detail=f"Job is still {job.status}")
+    if not job.result:
+        raise HTTPException(status_code=400, detail=job.error or "Job finished without a timetable")
+    return job.result
+
+class TimetableBatchGenerateRequest(BaseModel):
+    semesters: List[int]  # course semesters to generate, e.g. [1, 3, 5, 7]
+    departments: Optional[List[str]] = None  # default: every department with courses
+    sections: Dict[str, List[str]] = {}  # department -> sections; default ["A"]
+    dedicated_rooms: Dict[str, List[str]] = {}  # department -> room names; other rooms are shared
+    max_workers: Optional[int] = None  # parallel departments; capped at TIMETABLE_SEARCH_WORKERS
+    save: bool = True
+
+@router.post("/generate-batch")
+def generate_timetable_batch(
+    request: TimetableBatchGenerateRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Generate timetables for every department x year x section in one go.
+    Departments are solved in parallel processes; shared rooms are negotiated
+    and the combined result is saved in a single transaction.
+    """
+    from app.models.academic import TimetableSlot, Course, Room, TimeSlot, WeekDay
+    from app.services.timetable_batch import BatchTimetableCoordinator, load_outside_bookings
+    import datetime
+
+    # 1. Load courses per department
+    query = db.query(Course).filter(Course.semester.in_(request.semesters))
+    if request.departments:
+        query = query.filter(Course.department.in_(request.departments))
+    courses = query.all()
+    rooms = db.query(Room).all()
+    if not courses or not rooms:
+        raise HTTPException(status_code=400, detail="Not enough data (courses/rooms) to generate timetables")
+
+    # 2. Weekly slot grid (created on first use)
+    time_slots = db.query(TimeSlot).filter(TimeSlot.is_break == False).all()
+    if not time_slots:
+        for d in DEFAULT_DAYS:
+            for t in DEFAULT_TIMES:
+                start_time = parse_period(t)
+                end_time = (datetime.datetime.combine(datetime.date.today(), start_time) + datetime.timedelta(hours=1)).time()
+                time_slots.append(TimeSlot(day=WeekDay(d), start_time=start_time, end_time=end_time, is_break=False))
+        db.add_all(time_slots)
+        db.flush()
+    slot_ids = [ts.id for ts in time_slots]
+
+    # 3. Build one subproblem per department. Each (course, section) is a session
+    #    group; sections of different semesters are different classes of students.
+    dedicated_owner = {r: d for d, names in request.dedicated_rooms.items() for r in names}
+    shared_rooms = {r.name for r in rooms if r.name not in dedicated_owner}
+    course_by_id = {c.id: c for c in courses}
+    # Saved timetables the batch does not replace keep their rooms and faculty
+    blocked, busy_faculty = load_outside_bookings(db, request.semesters, list(course_by_id))
+
+    problems: Dict[str, Dict[str, Any]] = {}
+    for c in courses:
+        dept = c.department or "General"
+        if dept not in problems:
+            problems[dept] = {
+                "department": dept,
+                "courses": [],
+                "rooms": [
+                    {"name": r.name, "capacity": r.capacity or 60, "room_type": r.room_type, "building": r.building}
+                    for r in rooms
+                    if r.name in shared_rooms or dedicated_owner.get(r.name) == dept
+                ],
+                "slots": slot_ids,
+                "blocked": sorted(blocked),
+                "busy_faculty": sorted(busy_faculty, key=str),
+            }
+        for section in request.sections.get(dept, ["A"]):
+            problems[dept]["courses"].append({
+                "code": f"{c.id}|{section}",
+                "credits": int(c.credits or 3),
+                # Unassigned courses must not be treated as one shared instructor
+                "instructor_id": c.instructor_id if c.instructor_id is not None else f"unassigned:{c.id}|{section}",
+                "section": f"{c.semester}|{section}",
+            })
+
+    # 4. Solve departments in parallel and negotiate shared rooms
+    coordinator = BatchTimetableCoordinator(
+        problems, shared_rooms,
+        max_workers=min(request.max_workers or settings.TIMETABLE_SEARCH_WORKERS, settings.TIMETABLE_SEARCH_WORKERS),
+        time_limit=settings.TIMETABLE_MAX_SOLVE_SECONDS,
+        search_workers=settings.TIMETABLE_SEARCH_WORKERS,
+    )
+    try:
+        results = coordinator.run()
+    except ValueError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+    summary = {
+        dept: {"sessions": len(r["schedule"]), "status": r["stats"].get("status"),
+               "resolves": coordinator.stats["resolves"].get(dept, 0)}
+        for dept, r in results.items()
+    }
+    if not request.save:
+        db.rollback()
+        return {"status": "generated", "departments": summary, **coordinator.stats,
+                "schedules": {d: r["schedule"] for d, r in results.items()}}
+
+    # 5. Replace the affected slots in one transaction
+    room_ids = {r.name: r.id for r in rooms}
+    try:
+        db.query(TimetableSlot).filter(
+            TimetableSlot.semester.in_(request.semesters),
+            TimetableSlot.course_id.in_(list(course_by_id)),
+        ).delete(synchronize_session=False)
+        new_slots = []
+        for r in results.values():
+            for entry in r["schedule"]:
+                course_id, section = entry["course_code"].split("|", 1)
+                course = course_by_id[int(course_id)]
+                new_slots.append(TimetableSlot(
+                    course_id=course.id,
+                    room_id=room_ids[entry["room_name"]],
+                    time_slot_id=entry["slot_id"],
+                    section=section,
+                    semester=course.semester,
+                    is_published=False,
+                ))
+        db.add_all(new_slots)
+        db.commit()
+        for semester in sorted({course.semester for course in course_by_id.values()}):
+            occupancy_index.refresh(db, semester)
+    except Exception as e:
+        db.rollback()
+        print(f"ERROR saving batch timetable: {e}")
+        raise HTTPException(status_code=500, detail="Could not save generated timetables")
+
+    return {"status": "saved", "count": len(new_slots), "departments": summary, **coordinator.stats}
+
 @router.post("/reallocate")
 def reallocate_resource(
     affected_classes: List[str],
     candidate_moves: Dict[str, List[Any]],
+    snapshot: bool = False,
     db: Session = Depends(deps.get_db),
     current_user: models.User = Depends(deps.get_current_active_user),
 ):
@@ -234,12 +664,26 @@ def reallocate_resource(
     Dynamic reallocation using AI optimization.
     Expects affected_classes (list of IDs) and candidate_moves (map of class ID to list of possible moves).
     Each move should be [new_timeslot, new_room, new_faculty, penalty_cost].
+    Pass snapshot=true to save the model for offline replay.
     """
     from app.ai_models.model_reallocation_ortools import build_reallocation_model
+    from app.services.solver_snapshots import save_snapshot
+    from app.services.solver_tuning import apply_tuned_profile
     import ortools.sat.python.cp_model as cp_model
 
     model, choose = build_reallocation_model(affected_classes, candidate_moves)
     solver = cp_model.CpSolver()
+    apply_tuned_profile(solver, model, "reallocation", max_workers=settings.TIMETABLE_SEARCH_WORKERS)
+    solver.parameters.max_time_in_seconds = settings.TIMETABLE_MAX_SOLVE_SECONDS
+    if snapshot:
+        try:
+            path = save_snapshot(settings.SOLVER_SNAPSHOT_DIR, "reallocation", model, solver, metadata={
+                "affected_classes": affected_classes,
+                "candidate_moves": candidate_moves,
+            })
+            print(f"INFO: Reallocation snapshot saved to {path}")
+        except OSError as e:
+            print(f"WARNING: Could not write solver snapshot: {e}")
     status = solver.Solve(model)
 
     results = {}
@@ -257,6 +701,67 @@ def reallocate_resource(
     else:
         raise HTTPException(status_code=400, detail="Could not find a feasible reallocation.")
 
+class ReallocationRequest(BaseModel):
+    affected_classes: List[int]  # TimetableSlot ids to move
+    unavailable_rooms: List[int] = []
+    unavailable_faculty: List[int] = []
+    blocked_time_slot_ids: List[int] = []
+    same_day_only: bool = False
+    allow_faculty_change: bool = False
+    max_moves_per_class: int = 200
+    deadline_seconds: Optional[float] = None  # capped at TIMETABLE_MAX_SOLVE_SECONDS
+    apply: bool = False  # persist the new timeslots/rooms; refused (409) when a move changes faculty
+
+@router.post("/reallocate/auto")
+def reallocate_classes(
+    request: ReallocationRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+):
+    """
+    Reallocate disrupted classes given only their ids. Candidate moves are
+    generated on the server from the occupancy index and the result never
+    double-books a room, faculty member or section. Any user may preview a
+    reallocation; only admins may apply it.
+    """
+    from app.services.reallocation import ReallocationEngine
+
+    if request.apply and current_user.role != "admin":
+        raise HTTPException(status_code=403, detail="Only admins can apply a reallocation")
+
+    engine = ReallocationEngine(
+        db, occupancy_index.ensure_loaded(db), request.affected_classes,
+        unavailable_rooms=set(request.unavailable_rooms),
+        unavailable_faculty=set(request.unavailable_faculty),
+        blocked_slots=set(request.blocked_time_slot_ids),
+        same_day_only=request.same_day_only,
+        allow_faculty_change=request.allow_faculty_change,
+        max_moves_per_class=request.max_moves_per_class,
+    )
+    deadline = min(request.deadline_seconds or settings.TIMETABLE_MAX_SOLVE_SECONDS,
+                   settings.TIMETABLE_MAX_SOLVE_SECONDS)
+    try:
+        chosen = engine.solve(deadline_seconds=deadline, num_workers=settings.TIMETABLE_SEARCH_WORKERS)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if request.apply:
+        # TimetableSlot has no faculty column, so a substitute could not be saved
+        substitutions = engine.faculty_changes(chosen)
+        if substitutions:
+            raise HTTPException(status_code=409, detail={
+                "message": "The reallocation changes the instructor of some classes, which cannot be "
+                           "saved. Preview it and arrange the substitutes separately (see /substitutions/plan), "
+                           "or apply a reallocation that keeps every instructor.",
+                "substitutions": substitutions,
+            })
+        engine.apply(chosen)
+
+    results = {
+        cid: {"timeslot": move[0], "room": move[1], "faculty": move[2], "penalty": move[3]}
+        for cid, move in chosen.items()
+    }
+    return {"status": "success", "reallocations": results, "applied": request.apply, "solver_stats": engine.stats}
+
 @router.post("/compliance-report")
 def generate_compliance_report(
     section_data: Dict[str, Any],
@@ -282,49 +787,246 @@ def get_available_faculty(
     Get faculty members from the same department/branch who are free during a specific timeslot
     and teach in the same "year" (derived from semester).
     """
-    from app.models.academic import TimetableSlot, Course
+    from app.services.faculty_availability import cached_available_faculty
 
+    index = occupancy_index.ensure_loaded(db)
+    return cached_available_faculty(db, index, timeslot_id, department, semester)
 
-    from app.models.user import Faculty
-    
-    # Calculate Year from Semester (1-2: Year 1, 3-4: Year 2, etc.)
-    target_year = (semester + 1) // 2
-    
-    # 1. Find all faculty in department
-    faculty_in_dept = db.query(Faculty).filter(Faculty.department == department).all()
-    
-    # 2. Filter by faculty who teach courses in the same year
-    # Get all course IDs for the target year (semesters in that year)
-    year_semesters = [target_year * 2 - 1, target_year * 2]
-    courses_in_year = db.query(Course.id).filter(Course.semester.in_(year_semesters)).subquery()
-    
-    # 3. Find faculty who are BUSY in the given timeslot
-    busy_faculty_ids = db.query(Course.instructor_id).join(
-        TimetableSlot, TimetableSlot.course_id == Course.id
-    ).filter(
-        TimetableSlot.time_slot_id == timeslot_id,
-        TimetableSlot.is_active == True
-    ).distinct().all()
-    busy_faculty_ids = [f[0] for f in busy_faculty_ids if f[0] is not None]
-    
-    # 4. Filter dept faculty to those teaching in that year AND not busy
-    available_faculty = []
-    for f in faculty_in_dept:
-        # Check if they teach in this year
-        teaches_in_year = db.query(Course).filter(
-            Course.instructor_id == f.id,
-            Course.semester.in_(year_semesters)
-        ).first() is not None
-        
-        if teaches_in_year and f.id not in busy_faculty_ids:
-            available_faculty.append({
-                "id": f.id,
-                "name": f.user.full_name if f.user else "N/A",
-                "designation": f.designation,
-                "department": f.department
-            })
-            
-    return available_faculty
+@router.get("/free-rooms")
+def get_free_rooms(
+    time_slot_id: Optional[int] = None,
+    min_capacity: Optional[int] = None,
+    room_type: Optional[str] = None,
+    building: Optional[str] = None,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Rooms with no active class at a timeslot, or right now when time_slot_id is
+    omitted. Answered from the in-memory occupancy index.
+    """
+    from app.models.academic import Room
+
+    index = occupancy_index.ensure_loaded(db)
+    slot_ids = [time_slot_id] if time_slot_id is not None else index.current_slot_ids()
+    if time_slot_id is not None and time_slot_id not in index.slot_pos:
+        raise HTTPException(status_code=404, detail="Timeslot not found")
+
+    query = db.query(Room)
+    if min_capacity is not None:
+        query = query.filter(Room.capacity >= min_capacity)
+    if room_type:
+        query = query.filter(Room.room_type == room_type)
+    if building:
+        query = query.filter(Room.building == building)
+    busy = index.busy(ROOM, slot_ids)
+    return {
+        "time_slot_ids": slot_ids,
+        "rooms": [
+            {"id": r.id, "name": r.name, "capacity": r.capacity, "room_type": r.room_type,
+             "building": r.building, "floor": r.floor}
+            for r in query.order_by(Room.name).all() if r.id not in busy
+        ],
+    }
+
+class SubstitutionPlanRequest(BaseModel):
+    date: datetime.date
+    absent_faculty: List[int]
+    cross_department: bool = False  # allow substitutes from other departments (at a cost)
+    max_extra_classes: int = 3  # per substitute for the day
+
+@router.post("/substitutions/plan")
+def plan_substitutions(
+    request: SubstitutionPlanRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Plan substitutes for every class of a day taught by the absent faculty,
+    solved for the whole day at once so no substitute is double-booked.
+    """
+    from app.services.substitution import SubstitutionPlanner
+
+    planner = SubstitutionPlanner(
+        db, occupancy_index.ensure_loaded(db), request.date, set(request.absent_faculty),
+        cross_department=request.cross_department,
+        max_extra_classes=request.max_extra_classes,
+    )
+    try:
+        return planner.plan()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# Longest date range a calendar request may expand
+MAX_CALENDAR_DAYS = 366
+
+def _calendar_range(start: Optional[datetime.date], end: Optional[datetime.date], default_days: int):
+    start = start or datetime.date.today()
+    end = end or start + datetime.timedelta(days=default_days - 1)
+    if end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if (end - start).days >= MAX_CALENDAR_DAYS:
+        raise HTTPException(status_code=400, detail=f"Date range is limited to {MAX_CALENDAR_DAYS} days")
+    return start, end
+
+def _serialize_occurrence(occ: Dict[str, Any]) -> Dict[str, Any]:
+    item = dict(occ)
+    item["date"] = occ["date"].isoformat()
+    item["start"] = occ["start"].isoformat()
+    item["end"] = occ["end"].isoformat()
+    return item
+
+@router.get("/my-classes")
+def get_my_classes(
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    section: Optional[str] = None,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Concrete class occurrences of the current faculty member or student
+    between two dates (default: the next 7 days), with holidays and
+    cancellations removed. Students are not linked to a section, so a student
+    whose courses run in more than one section must pass their own `section`.
+    """
+    from sqlalchemy import func
+    from app.models.user import Faculty, Student
+    from app.models.academic import Enrollment, TimetableSlot
+    from app.services.timetable_calendar import timetable_calendar
+
+    start, end = _calendar_range(start, end, 7)
+    faculty = db.query(Faculty.id).filter(Faculty.user_id == current_user.id).first()
+    if faculty is not None:
+        scope = ("faculty", faculty.id)
+    else:
+        student = db.query(Student.id).filter(Student.user_id == current_user.id).first()
+        if student is None:
+            raise HTTPException(status_code=400, detail="Only faculty and students have a class calendar")
+        course_ids = tuple(sorted({c for (c,) in db.query(Enrollment.course_id).filter(
+            Enrollment.student_id == student.id,
+            Enrollment.status != "dropped",
+        )}))
+        if section is None and course_ids:
+            shared = db.query(TimetableSlot.course_id).filter(
+                TimetableSlot.course_id.in_(course_ids),
+                TimetableSlot.is_active == True,
+            ).group_by(TimetableSlot.course_id).having(func.count(func.distinct(TimetableSlot.section)) > 1).first()
+            if shared is not None:
+                raise HTTPException(
+                    status_code=400,
+                    detail="Your courses are taught in more than one section. Pass your section, e.g. ?section=A",
+                )
+        scope = ("courses", (course_ids, section))
+
+    return [_serialize_occurrence(occ) for occ in timetable_calendar.occurrences(db, scope, start, end)]
+
+@router.get("/calendar/export")
+def export_timetable_calendar(
+    format: str = "ics",
+    semester: Optional[int] = None,
+    section: Optional[str] = None,
+    department: Optional[str] = None,
+    faculty_id: Optional[int] = None,
+    room: Optional[str] = None,
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Stream the occurrences of a section (semester + section), a faculty member
+    or a room as an iCalendar (format=ics) or CSV (format=csv) file. Rows are
+    generated week by week while the response is written.
+    """
+    from app.services.timetable_calendar import timetable_calendar, iter_ics, iter_csv
+
+    if format not in ("ics", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ics' or 'csv'")
+    scopes = []
+    if semester is not None or section is not None:
+        if semester is None or section is None:
+            raise HTTPException(status_code=400, detail="semester and section must be given together")
+        scopes.append((("section", (semester, section, department)), f"Semester {semester} Section {section}"))
+    if faculty_id is not None:
+        scopes.append((("faculty", faculty_id), f"Faculty {faculty_id}"))
+    if room is not None:
+        scopes.append((("room", room), f"Room {room}"))
+    if len(scopes) != 1:
+        raise HTTPException(status_code=400, detail="Give exactly one of semester+section, faculty_id or room")
+    scope, name = scopes[0]
+    start, end = _calendar_range(start, end, 120)
+
+    occurrences = timetable_calendar.occurrences(db, scope, start, end)
+    filename = f"{name.lower().replace(' ', '-')}-{start.isoformat()}-{end.isoformat()}.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if format == "ics":
+        return StreamingResponse(iter_ics(occurrences, name), media_type="text/calendar", headers=headers)
+    return StreamingResponse(iter_csv(occurrences), media_type="text/csv", headers=headers)
+
+class CalendarExceptionRequest(BaseModel):
+    date: datetime.date
+    semester: Optional[int] = None  # None = every semester
+    section: Optional[str] = None  # None = every section
+    timetable_slot_id: Optional[int] = None  # cancel a single class
+    reason: Optional[str] = None
+
+@router.get("/calendar/exceptions")
+def list_calendar_exceptions(
+    start: Optional[datetime.date] = None,
+    end: Optional[datetime.date] = None,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_user),
+) -> Any:
+    """
+    Holidays and cancellations, optionally limited to a date range.
+    """
+    from app.models.academic import CalendarException
+
+    query = db.query(CalendarException)
+    if start is not None:
+        query = query.filter(CalendarException.date >= start)
+    if end is not None:
+        query = query.filter(CalendarException.date <= end)
+    return [
+        {"id": e.id, "date": e.date, "semester": e.semester, "section": e.section,
+         "timetable_slot_id": e.timetable_slot_id, "reason": e.reason}
+        for e in query.order_by(CalendarException.date, CalendarException.id).all()
+    ]
+
+@router.post("/calendar/exceptions")
+def create_calendar_exception(
+    request: CalendarExceptionRequest,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    """
+    Add a holiday (no semester/section/slot) or a narrower cancellation.
+    """
+    from app.models.academic import CalendarException, TimetableSlot
+
+    if request.timetable_slot_id is not None and db.get(TimetableSlot, request.timetable_slot_id) is None:
+        raise HTTPException(status_code=404, detail="Timetable slot not found")
+    exception = CalendarException(**request.model_dump())
+    db.add(exception)
+    db.commit()
+    db.refresh(exception)
+    return {"id": exception.id, **request.model_dump()}
+
+@router.delete("/calendar/exceptions/{exception_id}")
+def delete_calendar_exception(
+    exception_id: int,
+    db: Session = Depends(deps.get_db),
+    current_user: models.User = Depends(deps.get_current_active_admin),
+) -> Any:
+    from app.models.academic import CalendarException
+
+    exception = db.get(CalendarException, exception_id)
+    if exception is None:
+        raise HTTPException(status_code=404, detail="Calendar exception not found")
+    db.delete(exception)
+    db.commit()
+    return {"message": "Calendar exception deleted", "id": exception_id}
 
 @router.post("/faculty/predict-availability", response_model=ai_schemas.FacultyPredictionResponse)
 def predict_faculty_availability(
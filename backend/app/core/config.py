@@ -1,7 +1,11 @@
-from pydantic import ConfigDict
+import os
+from pydantic import ConfigDict, field_validator
 from pydantic_settings import BaseSettings
 from typing import Optional, List, Union
 
+# The backend directory; relative solver/cache paths are resolved against it, not the CWD
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 class Settings(BaseSettings):
     PROJECT_NAME: str = "AI Timetable & Resource Optimizer"
     API_V1_STR: str = "/api/v1"
@@ -15,9 +19,33 @@ class Settings(BaseSettings):
     POSTGRES_PASSWORD: str = "postgres"
     POSTGRES_DB: str = "timetable_optimizer"
     DATABASE_URI: Optional[str] = None
+
+    # Timetable solver
+    TIMETABLE_MAX_SOLVE_SECONDS: float = 60.0  # CP-SAT time limit per solve
+    TIMETABLE_SEARCH_WORKERS: int = 8  # CP-SAT parallel search workers
+    TIMETABLE_JOB_WORKERS: int = 2  # concurrent background generation jobs
+    TIMETABLE_JOB_QUEUE_LIMIT: int = 10  # queued + running jobs before new ones are rejected
+    TIMETABLE_CACHE_SIZE: int = 128  # solved timetables kept in memory
+    TIMETABLE_CACHE_DIR: Optional[str] = None  # set to persist solved timetables across restarts (relative to backend/)
+    SOLVER_SNAPSHOT_DIR: str = "solver_snapshots"  # where snapshot=true solves write their CP-SAT models (relative to backend/)
+    SOLVER_PROFILE_PATH: Optional[str] = "solver_profiles.json"  # tuned CP-SAT parameters per size class (relative to backend/)
+    AVAILABLE_FACULTY_CACHE_SECONDS: float = 30.0  # TTL of /timetable/available-faculty answers
+
+    # Attendance write-behind buffer
+    ATTENDANCE_WRITE_BEHIND: bool = False  # default mode of /attendance writes (overridable per request)
+    ATTENDANCE_FLUSH_SECONDS: float = 1.0  # longest a buffered mark waits before it is written
+    ATTENDANCE_FLUSH_MAX_RECORDS: int = 2000  # records per flush transaction; a full batch flushes at once
+    ATTENDANCE_BUFFER_LIMIT: int = 50000  # pending records before new submissions are rejected
     
     model_config = ConfigDict(case_sensitive=True, env_file=".env", extra='ignore')
 
+    @field_validator("TIMETABLE_CACHE_DIR", "SOLVER_SNAPSHOT_DIR", "SOLVER_PROFILE_PATH")
+    @classmethod
+    def resolve_backend_path(cls, v: Optional[str]) -> Optional[str]:
+        if v and not os.path.isabs(v):
+            return os.path.join(BACKEND_DIR, v)
+        return v
+
     def get_database_url(self):
         if self.DATABASE_URI:
             return self.DATABASE_URI
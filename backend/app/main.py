@@ -16,6 +16,10 @@ from app.models import *
 # Create database tables
 Base.metadata.create_all(bind=engine)
 
+# Add the attendance upsert key to databases created before it existed
+from app.services.attendance_upsert import ensure_attendance_key
+ensure_attendance_key(engine)
+
 def get_application():
     app = FastAPI(
         title=settings.PROJECT_NAME,
@@ -53,6 +57,12 @@ def get_application():
 
 app = get_application()
 
+@app.on_event("shutdown")
+def flush_attendance_buffer():
+    # Write buffered attendance before the process exits
+    from app.services.attendance_buffer import attendance_buffer
+    attendance_buffer.close()
+
 # Health check endpoint
 @app.get("/health")
 async def health_check():
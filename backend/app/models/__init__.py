@@ -1,5 +1,5 @@
 from .user import User, Faculty, Student
-from .academic import Course, Room, TimeSlot, TimetableSlot, Enrollment, Attendance
+from .academic import Course, Room, TimeSlot, TimetableSlot, PublishedTimetable, CalendarException, ScheduleVersion, Enrollment, Attendance, AttendanceRollup
 from .placements import Company, JobPosting, PlacementApplication
 from .admissions import AdmissionApplication
 from .training import Skill, TrainingModule, UserSkillProgress
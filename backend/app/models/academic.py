@@ -1,6 +1,6 @@
 from datetime import time
 from typing import List, Optional
-from sqlalchemy import Column, Integer, String, ForeignKey, Time, Enum, Table, Boolean, Date, JSON
+from sqlalchemy import Column, Integer, String, ForeignKey, Time, Enum, Table, Boolean, Date, JSON, DateTime, LargeBinary, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from app.models.base import Base
 import enum
@@ -82,6 +82,45 @@ class TimetableSlot(Base):
     room = relationship("Room", back_populates="timetable_slots")
     time_slot = relationship("TimeSlot", back_populates="timetable_slots")
 
+class PublishedTimetable(Base):
+    """Serialized, gzip-compressed snapshot of a section's timetable taken at publish time."""
+    __tablename__ = "published_timetables"
+    __table_args__ = (UniqueConstraint("semester", "section", name="uq_published_timetable_semester_section"),)
+
+    id = Column(Integer, primary_key=True, index=True)
+    semester = Column(Integer, nullable=False)
+    section = Column(String, nullable=False)
+    version = Column(Integer, nullable=False, default=1)
+    etag = Column(String, nullable=False)
+    body_gzip = Column(LargeBinary, nullable=False)
+    published_at = Column(DateTime, nullable=False)
+
+class CalendarException(Base):
+    """
+    A date on which classes do not happen: a holiday for everyone, or a
+    cancellation narrowed to a semester, section or single timetable slot.
+    """
+    __tablename__ = "calendar_exceptions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    date = Column(Date, nullable=False, index=True)
+    semester = Column(Integer, nullable=True)
+    section = Column(String, nullable=True)
+    timetable_slot_id = Column(Integer, ForeignKey("timetable_slots.id"), nullable=True)
+    reason = Column(String)
+
+class ScheduleVersion(Base):
+    """
+    Single-row change marker, bumped by every commit that touches courses,
+    rooms, the slot grid, timetable slots or calendar exceptions (see
+    app.services.schedule_version). Per-process caches compare it to decide
+    whether to reload.
+    """
+    __tablename__ = "schedule_versions"
+
+    id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
+
 class Enrollment(Base):
     __tablename__ = "enrollments"
     
@@ -97,6 +136,15 @@ class Enrollment(Base):
 
 class Attendance(Base):
     __tablename__ = "attendance"
+    # One mark per student, course, day and period; bulk writes upsert on it.
+    # The *_date indexes serve the (attendance_date, id) keyset order of /attendance/query.
+    __table_args__ = (
+        Index("ux_attendance_key", "student_id", "course_code", "attendance_date", "period", unique=True),
+        Index("ix_attendance_date", "attendance_date", "id"),
+        Index("ix_attendance_course_date", "course_code", "attendance_date", "id"),
+        Index("ix_attendance_student_date", "student_id", "attendance_date", "id"),
+        Index("ix_attendance_status_date", "status", "attendance_date", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
@@ -112,3 +160,22 @@ class Attendance(Base):
     student = relationship("Student", back_populates="attendance_records")
     course = relationship("Course", back_populates="attendance_records")
 
+class AttendanceRollup(Base):
+    """
+    Running present/absent/late counts of a student in a course, kept in step
+    with attendance writes so percentages never need a scan of attendance.
+    """
+    __tablename__ = "attendance_rollups"
+    __table_args__ = (
+        UniqueConstraint("student_id", "course_code", "semester", name="uq_attendance_rollup_key"),
+        Index("ix_attendance_rollup_course", "course_code", "semester"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    student_id = Column(Integer, ForeignKey("students.id"), nullable=False)
+    course_code = Column(String, nullable=False)
+    semester = Column(Integer, nullable=False, default=0)  # 0 when neither course nor student has one
+    present = Column(Integer, nullable=False, default=0)
+    absent = Column(Integer, nullable=False, default=0)
+    late = Column(Integer, nullable=False, default=0)
+
@@ -1,5 +1,6 @@
 from typing import Optional, List
-from pydantic import BaseModel, ConfigDict
+import base64
+from pydantic import BaseModel, ConfigDict, model_validator
 
 class CourseBase(BaseModel):
     code: str
@@ -45,5 +46,46 @@ class Attendance(AttendanceBase):
     marked_by_id: Optional[int] = None
     model_config = ConfigDict(from_attributes=True)
 
+# One-letter status codes of a columnar attendance register
+REGISTER_STATUS_CODES = {"P": "Present", "A": "Absent", "L": "Late"}
+
+class AttendanceRegister(BaseModel):
+    """
+    A class register in columnar form: the shared fields once, then
+    student_ids with a parallel status per student. Statuses are either a
+    string of P/A/L codes ("PPAPL...") or present_bitmap, base64 of a bitmap
+    with bit i (LSB first within each byte) set when student i is present.
+    """
+    course_code: str
+    attendance_date: date
+    period: int = 1
+    marked_by_id: Optional[int] = None
+    student_ids: List[int]
+    statuses: Optional[str] = None
+    present_bitmap: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_statuses(self):
+        if (self.statuses is None) == (self.present_bitmap is None):
+            raise ValueError("Give exactly one of statuses or present_bitmap")
+        n = len(self.student_ids)
+        if self.present_bitmap is not None:
+            try:
+                bits = int.from_bytes(base64.b64decode(self.present_bitmap, validate=True), "little")
+            except ValueError:
+                raise ValueError("present_bitmap must be base64")
+            if bits >> n:
+                raise ValueError("present_bitmap has bits set beyond the last student")
+            self.statuses = "".join("P" if bits >> i & 1 else "A" for i in range(n))
+            self.present_bitmap = None
+        else:
+            self.statuses = self.statuses.upper()
+            unknown = set(self.statuses) - REGISTER_STATUS_CODES.keys()
+            if unknown:
+                raise ValueError(f"Unknown status code(s) {sorted(unknown)}; expected P, A or L")
+        if len(self.statuses) != n:
+            raise ValueError(f"{len(self.statuses)} statuses for {n} student_ids")
+        return self
+
 
 
@@ -0,0 +1,235 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.config import settings
+from app.db.session import SessionLocal
+from app.services.attendance_upsert import ATTENDANCE_KEY, upsert_attendance
+
+# Acknowledgement states
+ACK_PENDING = "pending"
+ACK_FLUSHED = "flushed"
+ACK_FAILED = "failed"
+
+# Attempts at writing a batch before its tokens are marked failed
+MAX_FLUSH_ATTEMPTS = 3
+
+
+class AttendanceAck:
+    """Acknowledgement token for one buffered submission, polled until it is flushed."""
+
+    def __init__(self, records: int):
+        self.id = uuid.uuid4().hex
+        self.status = ACK_PENDING
+        self.records = records
+        self.pending = records
+        self.superseded = 0  # replaced by a later submission for the same key before being written
+        self.created_at = time.time()
+        self.flushed_at: Optional[float] = None
+        self.error: Optional[str] = None
+
+    def to_status(self) -> Dict[str, Any]:
+        return {
+            "token": self.id,
+            "status": self.status,
+            "records": self.records,
+            "pending": self.pending,
+            "superseded": self.superseded,
+            "created_at": self.created_at,
+            "flushed_at": self.flushed_at,
+            "error": self.error,
+        }
+
+
+class AttendanceWriteBuffer:
+    """
+    Write-behind queue for attendance marks. Submissions are merged on
+    (student, course_code, date, period), the latest mark winning, and a
+    background thread writes them with upsert_attendance in one transaction
+    per batch: every flush_seconds, or as soon as max_batch records are
+    waiting. close() stops the thread and flushes whatever is left, so a
+    clean shutdown loses nothing.
+    """
+
+    def __init__(self, flush_seconds: float, max_batch: int, max_pending: int,
+                 session_factory=SessionLocal, max_acks: int = 10000):
+        self.flush_seconds = flush_seconds
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.session_factory = session_factory
+        self.max_acks = max_acks
+        # key -> (record, ack, attempts)
+        self.pending: Dict[Tuple, Tuple[Dict[str, Any], AttendanceAck, int]] = {}
+        self.acks: "OrderedDict[str, AttendanceAck]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.flush_lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.closed = False
+        self.thread: Optional[threading.Thread] = None
+        self.metrics: Dict[str, Any] = {
+            "submitted_records": 0,
+            "merged_records": 0,
+            "flushed_records": 0,
+            "flushes": 0,
+            "failed_flushes": 0,
+            "last_flush_records": 0,
+            "last_flush_ms": None,
+            "max_flush_ms": None,
+            "total_flush_ms": 0.0,
+            "last_flush_at": None,
+            "last_error": None,
+        }
+
+    # -- producer side -----------------------------------------------------------
+
+    def submit(self, records: List[Dict[str, Any]]) -> AttendanceAck:
+        """
+        Queue validated records and return their acknowledgement token.
+        Raises RuntimeError when the buffer is closed or full.
+        """
+        ack = AttendanceAck(len(records))
+        with self.lock:
+            if self.closed:
+                raise RuntimeError("Attendance buffer is shutting down. Try again later.")
+            if len(self.pending) + len(records) > self.max_pending:
+                raise RuntimeError("Attendance buffer is full. Try again later.")
+            for record in records:
+                key = tuple(record[k] for k in ATTENDANCE_KEY)
+                previous = self.pending.get(key)
+                if previous is not None:
+                    self._settle(previous[1], superseded=1)
+                    self.metrics["merged_records"] += 1
+                self.pending[key] = (record, ack, 0)
+            self.metrics["submitted_records"] += len(records)
+            self._remember(ack)
+            if not records:
+                self._settle(ack)
+            depth = len(self.pending)
+        self._ensure_thread()
+        if depth >= self.max_batch:
+            self.wakeup.set()
+        return ack
+
+    def get(self, token: str) -> Optional[AttendanceAck]:
+        return self.acks.get(token)
+
+    def _remember(self, ack: AttendanceAck) -> None:
+        self.acks[ack.id] = ack
+        while len(self.acks) > self.max_acks:
+            oldest = next(iter(self.acks.values()))
+            if oldest.status == ACK_PENDING:
+                break
+            self.acks.popitem(last=False)
+
+    def _settle(self, ack: AttendanceAck, written: int = 0, superseded: int = 0) -> None:
+        ack.pending -= written + superseded
+        ack.superseded += superseded
+        if ack.pending <= 0 and ack.status == ACK_PENDING:
+            ack.status = ACK_FLUSHED
+            ack.flushed_at = time.time()
+
+    # -- flushing ----------------------------------------------------------------
+
+    def _ensure_thread(self) -> None:
+        if self.thread is not None and self.thread.is_alive():
+            return
+        with self.lock:
+            if self.closed or (self.thread is not None and self.thread.is_alive()):
+                return
+            self.thread = threading.Thread(target=self._run, name="attendance-flush", daemon=True)
+            self.thread.start()
+
+    def _run(self) -> None:
+        while not self.closed:
+            self.wakeup.wait(self.flush_seconds)
+            self.wakeup.clear()
+            while self.pending and not self.closed:
+                self.flush()
+                if len(self.pending) < self.max_batch:
+                    break
+
+    def flush(self) -> int:
+        """Write up to max_batch pending records in one transaction. Returns records written."""
+        with self.flush_lock:
+            with self.lock:
+                keys = list(self.pending)[:self.max_batch]
+                batch = [(key, self.pending.pop(key)) for key in keys]
+            if not batch:
+                return 0
+
+            started = time.perf_counter()
+            db = self.session_factory()
+            try:
+                upsert_attendance(db, [record for _, (record, _, _) in batch])
+            except Exception as e:
+                db.rollback()
+                self._failed(batch, e)
+                return 0
+            finally:
+                db.close()
+            elapsed_ms = (time.perf_counter() - started) * 1000
+
+            with self.lock:
+                for _, (_, ack, _) in batch:
+                    self._settle(ack, written=1)
+                m = self.metrics
+                m["flushes"] += 1
+                m["flushed_records"] += len(batch)
+                m["last_flush_records"] = len(batch)
+                m["last_flush_ms"] = round(elapsed_ms, 2)
+                m["max_flush_ms"] = round(max(m["max_flush_ms"] or 0.0, elapsed_ms), 2)
+                m["total_flush_ms"] += elapsed_ms
+                m["last_flush_at"] = time.time()
+            return len(batch)
+
+    def _failed(self, batch, error: Exception) -> None:
+        """Re-queue a failed batch (unless newer marks arrived meanwhile); give up after MAX_FLUSH_ATTEMPTS."""
+        print(f"ERROR flushing {len(batch)} buffered attendance records: {error}")
+        with self.lock:
+            self.metrics["failed_flushes"] += 1
+            self.metrics["last_error"] = str(error)
+            for key, (record, ack, attempts) in batch:
+                if key in self.pending:
+                    self._settle(ack, superseded=1)
+                elif attempts + 1 >= MAX_FLUSH_ATTEMPTS:
+                    ack.status = ACK_FAILED
+                    ack.error = str(error)
+                else:
+                    self.pending[key] = (record, ack, attempts + 1)
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Stop the flush thread and write everything still pending."""
+        with self.lock:
+            self.closed = True
+        self.wakeup.set()
+        if self.thread is not None:
+            self.thread.join(timeout)
+        deadline = time.monotonic() + timeout
+        while self.pending and time.monotonic() < deadline:
+            self.flush()
+        if self.pending:
+            print(f"ERROR: {len(self.pending)} buffered attendance records could not be written on shutdown")
+
+    def stats(self) -> Dict[str, Any]:
+        with self.lock:
+            m = dict(self.metrics)
+            m["depth"] = len(self.pending)
+            m["pending_acks"] = sum(1 for a in self.acks.values() if a.status == ACK_PENDING)
+        m["avg_flush_ms"] = round(m.pop("total_flush_ms") / m["flushes"], 2) if m["flushes"] else None
+        m.update({
+            "enabled": settings.ATTENDANCE_WRITE_BEHIND,
+            "flush_seconds": self.flush_seconds,
+            "max_batch": self.max_batch,
+            "max_pending": self.max_pending,
+            "running": self.thread is not None and self.thread.is_alive(),
+        })
+        return m
+
+
+# Singleton instance
+attendance_buffer = AttendanceWriteBuffer(
+    flush_seconds=settings.ATTENDANCE_FLUSH_SECONDS,
+    max_batch=settings.ATTENDANCE_FLUSH_MAX_RECORDS,
+    max_pending=settings.ATTENDANCE_BUFFER_LIMIT,
+)
@@ -0,0 +1,127 @@
+import csv
+import datetime
+import io
+import json
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from sqlalchemy import select, tuple_
+from sqlalchemy.orm import Session
+from app.models.academic import Attendance, Course
+from app.models.user import Student
+
+# Columns of an attendance row in query results and exports
+ATTENDANCE_COLUMNS = (
+    Attendance.id, Attendance.student_id, Attendance.course_code, Attendance.attendance_date,
+    Attendance.period, Attendance.status, Attendance.marked_by_id,
+)
+EXPORT_FIELDS = tuple(c.key for c in ATTENDANCE_COLUMNS)
+MAX_PAGE_SIZE = 1000
+EXPORT_CHUNK_SIZE = 2000
+
+Cursor = Tuple[datetime.date, int]
+
+
+def encode_cursor(row: Dict[str, Any]) -> str:
+    return f"{row['attendance_date'].isoformat()}_{row['id']}"
+
+
+def decode_cursor(cursor: str) -> Cursor:
+    """"YYYY-MM-DD_id" -> (date, id); ValueError when malformed."""
+    day, _, row_id = cursor.partition("_")
+    return datetime.date.fromisoformat(day), int(row_id)
+
+
+def attendance_statement(start_date: Optional[datetime.date] = None, end_date: Optional[datetime.date] = None,
+                         course_code: Optional[str] = None, status: Optional[str] = None,
+                         student_id: Optional[int] = None, semester: Optional[int] = None,
+                         department: Optional[str] = None, batch: Optional[str] = None):
+    """
+    Filtered attendance select ordered by (attendance_date, id), which the
+    ix_attendance_*_date indexes serve directly. Courses and students are
+    only joined when a semester/department or batch filter needs them.
+    """
+    stmt = select(*ATTENDANCE_COLUMNS)
+    conditions = []
+    if start_date is not None:
+        conditions.append(Attendance.attendance_date >= start_date)
+    if end_date is not None:
+        conditions.append(Attendance.attendance_date <= end_date)
+    if course_code is not None:
+        conditions.append(Attendance.course_code == course_code)
+    if status is not None:
+        conditions.append(Attendance.status == status)
+    if student_id is not None:
+        conditions.append(Attendance.student_id == student_id)
+    if semester is not None or department is not None:
+        stmt = stmt.join(Course, Attendance.course_code == Course.code)
+        if semester is not None:
+            conditions.append(Course.semester == semester)
+        if department is not None:
+            conditions.append(Course.department == department)
+    if batch is not None:
+        stmt = stmt.join(Student, Attendance.student_id == Student.id)
+        conditions.append(Student.batch == batch)
+    return stmt.where(*conditions).order_by(Attendance.attendance_date, Attendance.id)
+
+
+def _page(db: Session, stmt, limit: int, after: Optional[Cursor]) -> List[Dict[str, Any]]:
+    if after is not None:
+        stmt = stmt.where(tuple_(Attendance.attendance_date, Attendance.id) > tuple_(*after))
+    return [row._asdict() for row in db.execute(stmt.limit(limit))]
+
+
+def query_attendance(db: Session, limit: int = 100, cursor: Optional[str] = None,
+                     **filters) -> Dict[str, Any]:
+    """
+    One page of attendance rows. Pass next_cursor back as cursor for the next
+    page (keyset pagination on (attendance_date, id), so deep pages cost the
+    same as the first). Raises ValueError for a malformed cursor.
+    """
+    after = decode_cursor(cursor) if cursor else None
+    items = _page(db, attendance_statement(**filters), limit + 1, after)
+    has_more = len(items) > limit
+    items = items[:limit]
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(items[-1]) if has_more else None,
+        "limit": limit,
+    }
+
+
+def iter_attendance(db: Session, chunk_size: int = EXPORT_CHUNK_SIZE, **filters) -> Iterator[Dict[str, Any]]:
+    """
+    Every matching row, read in keyset chunks of chunk_size. Each chunk is a
+    separate short query, so memory stays constant and no cursor is held
+    open between chunks while the client reads.
+    """
+    stmt = attendance_statement(**filters)
+    after = None
+    while True:
+        chunk = _page(db, stmt, chunk_size, after)
+        yield from chunk
+        if len(chunk) < chunk_size:
+            return
+        after = (chunk[-1]["attendance_date"], chunk[-1]["id"])
+
+
+def iter_ndjson(rows: Iterator[Dict[str, Any]], rows_per_write: int = 500) -> Iterator[str]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, default=str, separators=(",", ":")))
+        if len(lines) >= rows_per_write:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+def iter_csv(rows: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        writer.writerow([row[f] for f in EXPORT_FIELDS])
+        if buffer.tell() > 8192:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
@@ -0,0 +1,217 @@
+import datetime
+from collections import defaultdict
+from typing import List, Dict, Any, Optional, Sequence, Tuple
+from sqlalchemy import DateTime, case, delete, func, insert, literal, select, update, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from app.models.academic import Attendance, AttendanceRollup, Course
+from app.models.user import Student, User
+
+# Attendance status -> rollup counter; other statuses are not counted
+STATUS_COUNTERS = {"present": "present", "absent": "absent", "late": "late"}
+
+# Below this percentage a student is short of attendance
+SHORTAGE_THRESHOLD = 75.0
+
+RollupKey = Tuple[int, str, int]  # (student_id, course_code, semester)
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def status_counter(status: Optional[str]) -> Optional[str]:
+    return STATUS_COUNTERS.get((status or "").strip().lower())
+
+
+def rollup_semesters(db: Session, student_ids, course_codes) -> Tuple[Dict[str, int], Dict[int, int]]:
+    """Semester lookup for rollup keys: the course's semester, else the student's."""
+    courses = dict(db.execute(
+        select(Course.code, Course.semester).where(Course.code.in_(set(course_codes)), Course.semester.isnot(None))
+    ).all()) if course_codes else {}
+    students = dict(db.execute(
+        select(Student.id, Student.semester).where(Student.id.in_(set(student_ids)), Student.semester.isnot(None))
+    ).all()) if student_ids else {}
+    return courses, students
+
+
+def apply_rollup_changes(db: Session, changes: Sequence[Tuple[int, str, Optional[str], Optional[str]]]) -> int:
+    """
+    Fold attendance writes into the rollups without committing, so they land
+    in the caller's transaction. Each change is (student_id, course_code,
+    old_status or None for a new row, new_status). Returns rollup rows touched.
+    """
+    courses, students = rollup_semesters(db, {c[0] for c in changes}, {c[1] for c in changes})
+    deltas: Dict[RollupKey, Dict[str, int]] = defaultdict(lambda: {"present": 0, "absent": 0, "late": 0})
+    for student_id, course_code, old_status, new_status in changes:
+        old, new = status_counter(old_status), status_counter(new_status)
+        if old == new:
+            continue
+        key = (student_id, course_code, courses.get(course_code, students.get(student_id, 0)))
+        if old:
+            deltas[key][old] -= 1
+        if new:
+            deltas[key][new] += 1
+    deltas = {k: d for k, d in deltas.items() if any(d.values())}
+    if not deltas:
+        return 0
+
+    now = datetime.datetime.utcnow()
+    values = [
+        {"student_id": k[0], "course_code": k[1], "semester": k[2], **d, "created_at": now, "updated_at": now}
+        for k, d in deltas.items()
+    ]
+    dialect_insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    if dialect_insert is not None:
+        stmt = dialect_insert(AttendanceRollup)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["student_id", "course_code", "semester"],
+            set_={
+                "present": AttendanceRollup.present + stmt.excluded.present,
+                "absent": AttendanceRollup.absent + stmt.excluded.absent,
+                "late": AttendanceRollup.late + stmt.excluded.late,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        )
+        db.execute(stmt, values)
+        return len(values)
+
+    key = tuple_(AttendanceRollup.student_id, AttendanceRollup.course_code, AttendanceRollup.semester)
+    existing = {
+        tuple(row[1:]): row[0]
+        for row in db.execute(select(
+            AttendanceRollup.id, AttendanceRollup.student_id, AttendanceRollup.course_code, AttendanceRollup.semester,
+        ).where(key.in_(list(deltas))))
+    }
+    for k, d in deltas.items():
+        if k in existing:
+            db.execute(update(AttendanceRollup).where(AttendanceRollup.id == existing[k]).values(
+                present=AttendanceRollup.present + d["present"],
+                absent=AttendanceRollup.absent + d["absent"],
+                late=AttendanceRollup.late + d["late"],
+                updated_at=now,
+            ))
+    inserts = [v for v in values if (v["student_id"], v["course_code"], v["semester"]) not in existing]
+    if inserts:
+        db.execute(insert(AttendanceRollup), inserts)
+    return len(values)
+
+
+def rebuild_rollups(db: Session) -> int:
+    """Recompute every rollup from the attendance table in one INSERT ... SELECT. Commits."""
+    status = func.lower(func.trim(Attendance.status))
+    semester = func.coalesce(Course.semester, Student.semester, 0)
+    now = datetime.datetime.utcnow()
+    grouped = select(
+        Attendance.student_id,
+        Attendance.course_code,
+        semester,
+        func.sum(case((status == "present", 1), else_=0)),
+        func.sum(case((status == "absent", 1), else_=0)),
+        func.sum(case((status == "late", 1), else_=0)),
+        literal(now, DateTime),
+        literal(now, DateTime),
+    ).select_from(Attendance).outerjoin(
+        Course, Attendance.course_code == Course.code
+    ).outerjoin(
+        Student, Attendance.student_id == Student.id
+    ).where(
+        Attendance.course_code.isnot(None),
+    ).group_by(Attendance.student_id, Attendance.course_code, semester)
+
+    db.execute(delete(AttendanceRollup))
+    db.execute(insert(AttendanceRollup).from_select(
+        ["student_id", "course_code", "semester", "present", "absent", "late", "created_at", "updated_at"], grouped,
+    ))
+    db.commit()
+    return db.scalar(select(func.count()).select_from(AttendanceRollup))
+
+
+# -- reads -------------------------------------------------------------------
+
+_attended = AttendanceRollup.present + AttendanceRollup.late
+_held = AttendanceRollup.present + AttendanceRollup.absent + AttendanceRollup.late
+
+
+def percentage(attended: int, held: int) -> Optional[float]:
+    return round(attended * 100.0 / held, 2) if held else None
+
+
+def _filtered(stmt, student_id=None, course_code=None, semester=None, batch=None):
+    if student_id is not None:
+        stmt = stmt.where(AttendanceRollup.student_id == student_id)
+    if course_code is not None:
+        stmt = stmt.where(AttendanceRollup.course_code == course_code)
+    if semester is not None:
+        stmt = stmt.where(AttendanceRollup.semester == semester)
+    if batch is not None:
+        stmt = stmt.where(Student.batch == batch)
+    return stmt
+
+
+def student_percentages(db: Session, student_id: Optional[int] = None, course_code: Optional[str] = None,
+                        semester: Optional[int] = None, batch: Optional[str] = None,
+                        below: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Attendance percentage of each (student, course) read from the rollups;
+    late counts as attended. With `below`, only students under that
+    percentage are returned, filtered in SQL.
+    """
+    stmt = select(
+        AttendanceRollup.student_id, Student.enrollment_number, User.full_name,
+        AttendanceRollup.course_code, AttendanceRollup.semester,
+        AttendanceRollup.present, AttendanceRollup.absent, AttendanceRollup.late,
+    ).join(Student, AttendanceRollup.student_id == Student.id).outerjoin(User, Student.user_id == User.id)
+    stmt = _filtered(stmt, student_id, course_code, semester, batch)
+    if below is not None:
+        stmt = stmt.where(_held > 0, _attended * 100.0 < _held * below)
+    stmt = stmt.order_by(AttendanceRollup.course_code, AttendanceRollup.student_id)
+
+    items = []
+    for row in db.execute(stmt):
+        held = row.present + row.absent + row.late
+        items.append({
+            "student_id": row.student_id,
+            "enrollment_number": row.enrollment_number,
+            "name": row.full_name,
+            "course_code": row.course_code,
+            "semester": row.semester,
+            "present": row.present,
+            "absent": row.absent,
+            "late": row.late,
+            "total": held,
+            "percentage": percentage(row.present + row.late, held),
+        })
+    return items
+
+
+def course_summaries(db: Session, course_code: Optional[str] = None, semester: Optional[int] = None,
+                     batch: Optional[str] = None,
+                     threshold: float = SHORTAGE_THRESHOLD) -> List[Dict[str, Any]]:
+    """Per course and semester: students, totals, average percentage and how many are short."""
+    stmt = select(
+        AttendanceRollup.course_code,
+        AttendanceRollup.semester,
+        func.count(AttendanceRollup.student_id).label("students"),
+        func.sum(AttendanceRollup.present).label("present"),
+        func.sum(AttendanceRollup.absent).label("absent"),
+        func.sum(AttendanceRollup.late).label("late"),
+        func.avg(case((_held > 0, _attended * 100.0 / _held), else_=None)).label("average"),
+        func.sum(case(((_held > 0) & (_attended * 100.0 < _held * threshold), 1), else_=0)).label("short"),
+    ).join(Student, AttendanceRollup.student_id == Student.id)
+    stmt = _filtered(stmt, course_code=course_code, semester=semester, batch=batch)
+    stmt = stmt.group_by(AttendanceRollup.course_code, AttendanceRollup.semester).order_by(
+        AttendanceRollup.semester, AttendanceRollup.course_code,
+    )
+    return [
+        {
+            "course_code": row.course_code,
+            "semester": row.semester,
+            "students": row.students,
+            "present": row.present,
+            "absent": row.absent,
+            "late": row.late,
+            "average_percentage": round(row.average, 2) if row.average is not None else None,
+            "below_threshold": row.short,
+            "threshold": threshold,
+        }
+        for row in db.execute(stmt)
+    ]
@@ -0,0 +1,184 @@
+import datetime
+from typing import List, Dict, Any, Sequence, Tuple
+from sqlalchemy import insert, inspect, select, text, update, tuple_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+from app.models.academic import Attendance
+from app.models.user import Student
+from app.schemas.academic import REGISTER_STATUS_CODES
+from app.services.attendance_rollups import apply_rollup_changes
+
+# The natural key of an attendance row (ux_attendance_key)
+ATTENDANCE_KEY = ("student_id", "course_code", "attendance_date", "period")
+
+# Columns returned for every written row (the Attendance response schema)
+RETURNED_COLUMNS = (
+    Attendance.id, Attendance.student_id, Attendance.course_code, Attendance.attendance_date,
+    Attendance.period, Attendance.status, Attendance.marked_by_id, Attendance.created_at,
+)
+
+_UPSERT_DIALECTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def register_records(register) -> List[Dict[str, Any]]:
+    """Expand a validated AttendanceRegister into the per-student records upsert_attendance takes."""
+    shared = {
+        "course_code": register.course_code,
+        "attendance_date": register.attendance_date,
+        "period": register.period,
+        "marked_by_id": register.marked_by_id,
+    }
+    return [
+        {"student_id": student_id, "status": REGISTER_STATUS_CODES[code], **shared}
+        for student_id, code in zip(register.student_ids, register.statuses)
+    ]
+
+
+def prepare_attendance(db: Session, records: Sequence[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Drop records of unknown students (one IN query) and collapse duplicate
+    keys within the batch, the last record winning. Returns (rows, skipped).
+    """
+    student_ids = {r["student_id"] for r in records}
+    known = set(db.scalars(select(Student.id).where(Student.id.in_(student_ids)))) if student_ids else set()
+
+    rows: Dict[Tuple, Dict[str, Any]] = {}
+    for record in records:
+        if record["student_id"] not in known:
+            print(f"WARNING: Student ID {record['student_id']} does not exist in DB. Skipping.")
+            continue
+        rows[tuple(record[k] for k in ATTENDANCE_KEY)] = record
+    return list(rows.values()), len(records) - len(rows)
+
+
+def ensure_attendance_key(engine: Engine) -> int:
+    """
+    Make sure ux_attendance_key exists; create_all never adds an index to an
+    existing table, and the ON CONFLICT upsert needs it. Duplicate keys are
+    collapsed first, keeping the newest row of each, as in
+    migrate_attendance_unique.py. Returns the number of rows removed.
+    """
+    index = next(i for i in Attendance.__table__.indexes if i.name == "ux_attendance_key")
+    if index.name in {i["name"] for i in inspect(engine).get_indexes(Attendance.__tablename__)}:
+        return 0
+    columns = ", ".join(ATTENDANCE_KEY)
+    with engine.begin() as connection:
+        removed = connection.execute(text(
+            f"DELETE FROM {Attendance.__tablename__} WHERE id NOT IN ("
+            f"SELECT MAX(id) FROM {Attendance.__tablename__} GROUP BY {columns})"
+        )).rowcount
+        index.create(connection, checkfirst=True)
+    if removed:
+        print(f"WARNING: Removed {removed} duplicate attendance rows before creating ux_attendance_key")
+    return removed
+
+
+def lock_attendance_writes(db: Session) -> None:
+    """
+    Serialise attendance writers for the rest of the transaction, so statuses
+    read now cannot change before this transaction writes. SQLite has no row
+    locks (FOR UPDATE is dropped), so the transaction is opened with BEGIN
+    IMMEDIATE, taking the database write lock up front. Postgres row locks do
+    not cover keys that do not exist yet, so the table is locked in SHARE ROW
+    EXCLUSIVE mode, which blocks other writers but not readers.
+    """
+    dialect = db.get_bind().dialect.name
+    if dialect == "sqlite":
+        connection = db.connection()
+        # pysqlite only opens a transaction on the first write; once one is
+        # open this connection already holds the write lock
+        if not connection.connection.dbapi_connection.in_transaction:
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+    elif dialect == "postgresql":
+        db.execute(text(f"LOCK TABLE {Attendance.__tablename__} IN SHARE ROW EXCLUSIVE MODE"))
+
+
+def upsert_attendance(db: Session, records: Sequence[Dict[str, Any]], commit: bool = True) -> Dict[str, Any]:
+    """
+    Write a batch of attendance records keyed on (student, course_code, date,
+    period) with INSERT ... ON CONFLICT DO UPDATE ... RETURNING on SQLite and
+    Postgres. Every written row gets updated_at = now, while only inserted rows
+    get created_at = now, which is how inserts and updates are told apart in
+    the returned rows. Other dialects fall back to one SELECT of the existing
+    keys plus bulk UPDATE/INSERT. The attendance rollups are updated in the
+    same transaction, from previous statuses read under lock_attendance_writes.
+    """
+    rows, skipped = prepare_attendance(db, records)
+    now = datetime.datetime.utcnow()
+    values = [
+        {
+            "student_id": r["student_id"],
+            "course_id": r.get("course_id"),
+            "course_code": r["course_code"],
+            "attendance_date": r["attendance_date"],
+            "period": r["period"],
+            "status": r["status"],
+            "marked_by_id": r.get("marked_by_id"),
+            "created_at": now,
+            "updated_at": now,
+        }
+        for r in rows
+    ]
+
+    # Previous statuses feed the rollup deltas: no other writer may commit
+    # between this read and the upsert, or its change would be counted twice
+    key = tuple_(*(getattr(Attendance, k) for k in ATTENDANCE_KEY))
+    keys = [tuple(v[k] for k in ATTENDANCE_KEY) for v in values]
+    if keys:
+        lock_attendance_writes(db)
+    previous = {
+        tuple(row[:-1]): row[-1]
+        for row in db.execute(select(
+            *(getattr(Attendance, k) for k in ATTENDANCE_KEY), Attendance.status,
+        ).where(key.in_(keys)).with_for_update())
+    } if keys else {}
+
+    dialect_insert = _UPSERT_DIALECTS.get(db.get_bind().dialect.name)
+    written: List[Any] = []
+    if dialect_insert is not None and values:
+        # executemany form: compiled once, sent as batched multi-row VALUES by SQLAlchemy
+        stmt = dialect_insert(Attendance)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(ATTENDANCE_KEY),
+            set_={
+                "status": stmt.excluded.status,
+                "marked_by_id": stmt.excluded.marked_by_id,
+                "updated_at": stmt.excluded.updated_at,
+            },
+        ).returning(*RETURNED_COLUMNS)
+        written = db.execute(stmt, values).all()
+    elif values:
+        written = _upsert_fallback(db, values)
+    apply_rollup_changes(db, [
+        (v["student_id"], v["course_code"], previous.get(k), v["status"]) for k, v in zip(keys, values)
+    ])
+    if commit:
+        db.commit()
+
+    inserted = sum(1 for row in written if row.created_at == now)
+    return {
+        "rows": [row._asdict() for row in written],
+        "inserted": inserted,
+        "updated": len(written) - inserted,
+        "skipped": skipped,
+    }
+
+
+def _upsert_fallback(db: Session, values: List[Dict[str, Any]]) -> List[Any]:
+    key = tuple_(*(getattr(Attendance, k) for k in ATTENDANCE_KEY))
+    keys = [tuple(v[k] for k in ATTENDANCE_KEY) for v in values]
+    existing = {
+        tuple(row[1:]): row[0]
+        for row in db.execute(select(Attendance.id, *(getattr(Attendance, k) for k in ATTENDANCE_KEY)).where(key.in_(keys)))
+    }
+    updates = [
+        {"id": existing[k], "status": v["status"], "marked_by_id": v["marked_by_id"], "updated_at": v["updated_at"]}
+        for k, v in zip(keys, values) if k in existing
+    ]
+    inserts = [v for k, v in zip(keys, values) if k not in existing]
+    if updates:
+        db.execute(update(Attendance), updates)
+    if inserts:
+        db.execute(insert(Attendance), inserts)
+    return db.execute(select(*RETURNED_COLUMNS).where(key.in_(keys)).order_by(Attendance.id)).all()
@@ -0,0 +1,93 @@
+import threading
+import time
+from typing import List, Dict, Any, Tuple
+from sqlalchemy import exists, and_
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.models.academic import Course
+from app.models.user import Faculty, User
+from app.services.occupancy import OccupancyIndex, FACULTY
+
+CacheKey = Tuple[int, str, int]
+
+
+def year_semesters(semester: int) -> List[int]:
+    """Both semesters of the year a semester belongs to (1-2: year 1, 3-4: year 2, ...)."""
+    year = (semester + 1) // 2
+    return [year * 2 - 1, year * 2]
+
+
+def find_available_faculty(db: Session, index: OccupancyIndex, timeslot_id: int, department: str,
+                           semester: int) -> List[Dict[str, Any]]:
+    """
+    Faculty of a department who teach a course in the semester's year and have
+    no class at the timeslot. One query (faculty + user + EXISTS on courses);
+    busy faculty come from the occupancy index.
+    """
+    teaches_in_year = exists().where(and_(
+        Course.instructor_id == Faculty.id,
+        Course.semester.in_(year_semesters(semester)),
+    ))
+    rows = db.query(Faculty.id, User.full_name, Faculty.designation, Faculty.department).outerjoin(
+        User, Faculty.user_id == User.id
+    ).filter(
+        Faculty.department == department,
+        teaches_in_year,
+    ).order_by(Faculty.id).all()
+
+    busy = index.busy(FACULTY, [timeslot_id])
+    return [
+        {"id": f.id, "name": f.full_name or "N/A", "designation": f.designation, "department": f.department}
+        for f in rows if f.id not in busy
+    ]
+
+
+class AvailableFacultyCache:
+    """
+    Short-TTL cache of available-faculty answers keyed on
+    (timeslot_id, department, semester). Entries also remember the occupancy
+    index version they were computed against, so any timetable write
+    invalidates them immediately; the TTL covers faculty/course edits.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.entries: Dict[CacheKey, Tuple[float, int, List[Dict[str, Any]]]] = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: CacheKey, version: int):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            stored_at, stored_version, value = entry
+            if stored_version != version or time.monotonic() - stored_at > self.ttl_seconds:
+                del self.entries[key]
+                return None
+            return value
+
+    def put(self, key: CacheKey, version: int, value: List[Dict[str, Any]]) -> None:
+        with self.lock:
+            if len(self.entries) >= self.max_entries:
+                self.entries.clear()
+            self.entries[key] = (time.monotonic(), version, value)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+
+def cached_available_faculty(db: Session, index: OccupancyIndex, timeslot_id: int, department: str,
+                             semester: int) -> List[Dict[str, Any]]:
+    key = (timeslot_id, department, semester)
+    version = index.version
+    result = available_faculty_cache.get(key, version)
+    if result is None:
+        result = find_available_faculty(db, index, timeslot_id, department, semester)
+        available_faculty_cache.put(key, version, result)
+    return result
+
+
+# Singleton instance
+available_faculty_cache = AvailableFacultyCache(ttl_seconds=settings.AVAILABLE_FACULTY_CACHE_SECONDS)
@@ -46,5 +46,14 @@ class FacultyAvailabilityPredictor:
         probability = self.model.predict_proba(features)[0][1]
         return probability
 
+    def predict_many(self, features: np.ndarray) -> np.ndarray:
+        """
+        Vectorised predict(): one row per candidate in the same feature order,
+        returns the availability probability of each row.
+        """
+        if len(features) == 0:
+            return np.zeros(0)
+        return self.model.predict_proba(np.asarray(features, dtype=float))[:, 1]
+
 # Singleton instance
 faculty_predictor = FacultyAvailabilityPredictor()
@@ -0,0 +1,320 @@
+import datetime
+import threading
+from typing import List, Dict, Any, Optional, Iterable, Set, Tuple
+import numpy as np
+from sqlalchemy.orm import Session
+from app.models.academic import TimetableSlot, Course, TimeSlot
+from app.services.schedule_version import schedule_version
+
+# Entity kinds tracked by the index
+ROOM = "room"
+FACULTY = "faculty"
+SECTION = "section"
+KINDS = (ROOM, FACULTY, SECTION)
+
+WORD_BITS = 64
+
+# (department, semester, section) identifies a class section across departments
+SectionKey = Tuple[Optional[str], int, str]
+
+
+def section_key(department: Optional[str], semester: int, section: str) -> SectionKey:
+    return (department, semester, section)
+
+
+class _BitTable:
+    """One row of uint64 words per entity, one bit per slot of the weekly grid."""
+
+    def __init__(self, num_words: int):
+        self.num_words = num_words
+        self.rows: Dict[Any, int] = {}
+        self.bits = np.zeros((16, num_words), dtype=np.uint64)
+
+    def row(self, entity: Any) -> int:
+        r = self.rows.get(entity)
+        if r is None:
+            r = len(self.rows)
+            if r == len(self.bits):
+                self.bits = np.vstack([self.bits, np.zeros_like(self.bits)])
+            self.rows[entity] = r
+        return r
+
+    def set(self, entity: Any, slot: int, busy: bool) -> None:
+        r = self.row(entity)
+        mask = np.uint64(1 << (slot % WORD_BITS))
+        if busy:
+            self.bits[r, slot // WORD_BITS] |= mask
+        else:
+            self.bits[r, slot // WORD_BITS] &= ~mask
+
+    def get(self, entity: Any) -> np.ndarray:
+        r = self.rows.get(entity)
+        if r is None:
+            return np.zeros(self.num_words, dtype=np.uint64)
+        return self.bits[r]
+
+    def busy_mask(self, slots: Iterable[int]) -> np.ndarray:
+        """Boolean per row: busy in any of the given slots."""
+        n = len(self.rows)
+        busy = np.zeros(n, dtype=bool)
+        for slot in slots:
+            word = self.bits[:n, slot // WORD_BITS]
+            busy |= (word >> np.uint64(slot % WORD_BITS)) & np.uint64(1) == 1
+        return busy
+
+
+class OccupancyIndex:
+    """
+    In-memory weekly occupancy of rooms, faculty and sections, built from the
+    active TimetableSlot rows. Each entity is a row of bits over the TimeSlot
+    grid, so "who is free at slot X" is a vectorised bit test and "when are
+    these three all free" is an OR of three short rows.
+
+    The index is loaded lazily on first use and patched by the endpoints that
+    write timetables (save, publish, batch generation, reallocation) through
+    refresh() and move(). The index is per process, so ensure_loaded() also
+    compares the schedule change marker (one primary-key read) with the one
+    seen at the last load and rebuilds when another worker changed it, or a
+    course moved to another section, department or instructor. Readers and writers
+    both hold self.lock; every query is a few array operations, so the lock is
+    held only briefly.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loaded = False
+        # schedule_version() as of the last rebuild/refresh
+        self.schedule_version: Optional[int] = None
+        # Bumped on every change, so derived caches can tell they are stale
+        self.version = 0
+        self.slot_ids: List[int] = []
+        self.slot_pos: Dict[int, int] = {}
+        self.slot_info: Dict[int, Tuple[str, datetime.time, datetime.time]] = {}
+        self.tables: Dict[str, _BitTable] = {}
+        # booking id -> (time_slot_id, room_id, faculty_id, section key)
+        self.bookings: Dict[int, Tuple[int, int, Optional[int], SectionKey]] = {}
+        # (kind, entity, slot position) -> booking ids; a bit is cleared only when its last booking goes
+        self.cells: Dict[Tuple[str, Any, int], Set[int]] = {}
+
+    # -- building and patching -------------------------------------------------
+
+    def _booking_query(self, db: Session):
+        return db.query(
+            TimetableSlot.id, TimetableSlot.time_slot_id, TimetableSlot.room_id,
+            Course.instructor_id, Course.department, TimetableSlot.semester, TimetableSlot.section,
+        ).join(Course, TimetableSlot.course_id == Course.id).filter(TimetableSlot.is_active == True)
+
+    def rebuild(self, db: Session) -> None:
+        # Read before the rows: a write landing in between only causes one extra rebuild
+        seen = schedule_version(db)
+        grid = db.query(TimeSlot.id, TimeSlot.day, TimeSlot.start_time, TimeSlot.end_time).order_by(
+            TimeSlot.day, TimeSlot.start_time
+        ).all()
+        rows = self._booking_query(db).all()
+        with self.lock:
+            self.slot_ids = [g.id for g in grid]
+            self.slot_pos = {sid: i for i, sid in enumerate(self.slot_ids)}
+            self.slot_info = {g.id: (g.day.value, g.start_time, g.end_time) for g in grid}
+            num_words = max(1, -(-len(self.slot_ids) // WORD_BITS))
+            self.tables = {kind: _BitTable(num_words) for kind in KINDS}
+            self.bookings = {}
+            self.cells = {}
+            for row in rows:
+                self._add(row)
+            self.loaded = True
+            self.schedule_version = seen
+            self.version += 1
+
+    def ensure_loaded(self, db: Session) -> "OccupancyIndex":
+        """Load on first use, and reload when the bookings changed outside this process."""
+        if not self.loaded or schedule_version(db) != self.schedule_version:
+            self.rebuild(db)
+        return self
+
+    def _entities(self, booking) -> List[Tuple[str, Any]]:
+        _, room_id, faculty_id, section = booking
+        entities = [(ROOM, room_id), (SECTION, section)]
+        if faculty_id is not None:
+            entities.append((FACULTY, faculty_id))
+        return entities
+
+    def _add(self, row) -> None:
+        booking = (row.time_slot_id, row.room_id, row.instructor_id,
+                   section_key(row.department, row.semester, row.section))
+        slot = self.slot_pos[row.time_slot_id]
+        self.bookings[row.id] = booking
+        for kind, entity in self._entities(booking):
+            self.cells.setdefault((kind, entity, slot), set()).add(row.id)
+            self.tables[kind].set(entity, slot, True)
+
+    def _remove(self, booking_id: int) -> None:
+        booking = self.bookings.pop(booking_id, None)
+        if booking is None:
+            return
+        slot = self.slot_pos[booking[0]]
+        for kind, entity in self._entities(booking):
+            cell = self.cells.get((kind, entity, slot))
+            if cell is None:
+                continue
+            cell.discard(booking_id)
+            if not cell:
+                del self.cells[(kind, entity, slot)]
+                self.tables[kind].set(entity, slot, False)
+
+    def refresh(self, db: Session, semester: int, section: Optional[str] = None) -> None:
+        """
+        Re-read the bookings of one semester (optionally one section) after
+        they were rewritten. Call after the transaction has committed. Only
+        that one commit may have moved the change marker since the last load
+        (several refreshes after one commit are fine); otherwise another
+        writer got in between and the next ensure_loaded() rebuilds.
+        """
+        if not self.loaded:
+            self.version += 1
+            return  # built from scratch on first use
+        seen = schedule_version(db)
+        query = self._booking_query(db).filter(TimetableSlot.semester == semester)
+        if section is not None:
+            query = query.filter(TimetableSlot.section == section)
+        rows = query.all()
+        if any(row.time_slot_id not in self.slot_pos for row in rows):
+            self.rebuild(db)  # the slot grid itself changed
+            return
+        with self.lock:
+            stale = [
+                bid for bid, (_, _, _, (_, sem, sec)) in self.bookings.items()
+                if sem == semester and (section is None or sec == section)
+            ]
+            for bid in stale:
+                self._remove(bid)
+            for row in rows:
+                self._add(row)
+            if self.schedule_version is not None and seen - self.schedule_version in (0, 1):
+                self.schedule_version = seen
+            self.version += 1
+
+    def move(self, booking_id: int, time_slot_id: Optional[int] = None, room_id: Optional[int] = None,
+             faculty_id: Optional[int] = None) -> None:
+        """
+        Patch one booking in place (e.g. an applied reallocation). The stored
+        change marker is left as is, so the next ensure_loaded() re-reads the table.
+        """
+        with self.lock:
+            self.version += 1
+            booking = self.bookings.get(booking_id)
+            if booking is None or (time_slot_id is not None and time_slot_id not in self.slot_pos):
+                self.loaded = False  # unknown booking or slot: rebuild on next use
+                return
+            old_slot, old_room, old_faculty, section = booking
+            self._remove(booking_id)
+            row = _BookingRow(
+                booking_id,
+                time_slot_id if time_slot_id is not None else old_slot,
+                room_id if room_id is not None else old_room,
+                faculty_id if faculty_id is not None else old_faculty,
+                section,
+            )
+            self._add(row)
+
+    # -- queries ---------------------------------------------------------------
+
+    def current_slot_ids(self, now: Optional[datetime.datetime] = None) -> List[int]:
+        """TimeSlot ids in progress at `now` (default: the current local time)."""
+        now = now or datetime.datetime.now()
+        day, t = now.strftime("%A"), now.time()
+        with self.lock:
+            return [sid for sid, (d, start, end) in self.slot_info.items() if d == day and start <= t <= end]
+
+    def _positions(self, time_slot_ids: Iterable[int]) -> List[int]:
+        return [self.slot_pos[t] for t in time_slot_ids if t in self.slot_pos]
+
+    def is_free(self, kind: str, entity: Any, time_slot_id: int) -> bool:
+        with self.lock:
+            slot = self.slot_pos.get(time_slot_id)
+            if slot is None:
+                return True
+            word = self.tables[kind].get(entity)[slot // WORD_BITS]
+            return not (int(word) >> (slot % WORD_BITS)) & 1
+
+    def busy(self, kind: str, time_slot_ids: Iterable[int], ignore: Iterable[int] = ()) -> Set[Any]:
+        """
+        Entities of a kind busy in any of the given slots. Bookings in `ignore`
+        (e.g. classes about to be moved) do not count.
+        """
+        ignore = set(ignore)
+        with self.lock:
+            positions = self._positions(time_slot_ids)
+            table = self.tables[kind]
+            mask = table.busy_mask(positions)
+            entities = list(table.rows)
+            busy = {entities[i] for i in np.flatnonzero(mask)}
+            for bid in ignore:
+                booking = self.bookings.get(bid)
+                if booking is None or self.slot_pos.get(booking[0]) not in positions:
+                    continue
+                for k, entity in self._entities(booking):
+                    if k == kind and self.cells.get((k, entity, self.slot_pos[booking[0]]), set()) <= ignore:
+                        busy.discard(entity)
+        return busy
+
+    def free(self, kind: str, time_slot_ids: Iterable[int], candidates: Iterable[Any]) -> List[Any]:
+        """The candidates that are free in every one of the given slots."""
+        busy = self.busy(kind, time_slot_ids)
+        return [c for c in candidates if c not in busy]
+
+    def free_slots(self, rooms: Iterable[Any] = (), faculty: Iterable[Any] = (),
+                   sections: Iterable[SectionKey] = ()) -> List[int]:
+        """TimeSlot ids where every given room, faculty member and section is free."""
+        with self.lock:
+            num_words = self.tables[ROOM].num_words if self.tables else 1
+            occupied = np.zeros(num_words, dtype=np.uint64)
+            for kind, entities in ((ROOM, rooms), (FACULTY, faculty), (SECTION, sections)):
+                for entity in entities:
+                    occupied |= self.tables[kind].get(entity)
+            bits = np.unpackbits(occupied.astype("<u8").view(np.uint8), bitorder="little")
+            return [sid for sid, pos in self.slot_pos.items() if not bits[pos]]
+
+    def bookings_snapshot(self) -> Dict[int, Tuple[int, int, Optional[int], SectionKey]]:
+        """Copy of booking id -> (time_slot_id, room_id, faculty_id, section), safe to iterate."""
+        with self.lock:
+            return dict(self.bookings)
+
+    def bookings_at(self, kind: str, entity: Any, time_slot_ids: Iterable[int]) -> List[Dict[str, Any]]:
+        """Bookings of an entity in the given slots, e.g. where a faculty member is teaching now."""
+        result = []
+        with self.lock:
+            for slot in self._positions(time_slot_ids):
+                for bid in sorted(self.cells.get((kind, entity, slot), ())):
+                    time_slot_id, room_id, faculty_id, section = self.bookings[bid]
+                    result.append({
+                        "timetable_slot_id": bid,
+                        "time_slot_id": time_slot_id,
+                        "room_id": room_id,
+                        "faculty_id": faculty_id,
+                        "section": section,
+                    })
+        return result
+
+    def info(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                "loaded": self.loaded,
+                "slots": len(self.slot_ids),
+                "bookings": len(self.bookings),
+                **{f"{kind}_rows": len(self.tables[kind].rows) for kind in self.tables},
+            }
+
+
+class _BookingRow:
+    """Row-shaped view of a patched booking for OccupancyIndex._add."""
+
+    def __init__(self, id, time_slot_id, room_id, instructor_id, section: SectionKey):
+        self.id = id
+        self.time_slot_id = time_slot_id
+        self.room_id = room_id
+        self.instructor_id = instructor_id
+        self.department, self.semester, self.section = section
+
+
+# Singleton instance
+occupancy_index = OccupancyIndex()
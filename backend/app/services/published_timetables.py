@@ -0,0 +1,188 @@
+import datetime
+import gzip
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy.orm import Session
+from app.models.academic import TimetableSlot, PublishedTimetable
+from app.services.timetable_read import query_timetable_slots
+
+# Fields of each slot in a published snapshot document
+SNAPSHOT_FIELDS = (
+    "id", "course_code", "course_name", "department", "faculty_id", "room_name", "building",
+    "time_slot_id", "day", "start_time", "end_time",
+)
+
+
+class PublishedSnapshot:
+    """One materialised (semester, section) timetable: gzip body plus its strong ETag."""
+
+    def __init__(self, semester: int, section: str, version: int, etag: str, body_gzip: bytes,
+                 published_at: datetime.datetime):
+        self.semester = semester
+        self.section = section
+        self.version = version
+        self.etag = etag
+        self.body_gzip = body_gzip
+        self.published_at = published_at
+        self._body: Optional[bytes] = None
+
+    @property
+    def body(self) -> bytes:
+        """Uncompressed JSON, for clients that do not accept gzip."""
+        if self._body is None:
+            self._body = gzip.decompress(self.body_gzip)
+        return self._body
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True when an If-None-Match header names this snapshot's ETag."""
+        if not if_none_match:
+            return False
+        tags = [t.strip() for t in if_none_match.split(",")]
+        return "*" in tags or self.etag in (t[2:] if t.startswith("W/") else t for t in tags)
+
+
+def accepts_gzip(accept_encoding: Optional[str]) -> bool:
+    """
+    Whether an Accept-Encoding header allows gzip: listed with q > 0, or not
+    listed and allowed by "*" with q > 0. "gzip;q=0" refuses it.
+    """
+    if not accept_encoding:
+        return False
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[coding.strip()] = q
+    if "gzip" in weights:
+        return weights["gzip"] > 0
+    return weights.get("*", 0) > 0
+
+
+def build_document(db: Session, semester: int, section: str) -> Tuple[List[Dict[str, Any]], str]:
+    """Published slots of a section and the SHA-256 of their canonical JSON."""
+    slots = query_timetable_slots(
+        db, SNAPSHOT_FIELDS, limit=None, semester=semester, section=section,
+        is_published=True, is_active=True,
+    )["items"]
+    canonical = json.dumps(slots, sort_keys=True, separators=(",", ":"), default=str)
+    return slots, hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class PublishedTimetableStore:
+    """
+    Published timetables materialised at publish time. Snapshots are stored in
+    the published_timetables table and kept in an in-memory LRU. Each read
+    checks the cached entry's version and ETag against the table with one
+    indexed two-column query, so a snapshot republished by another worker is
+    never served stale; the body is only loaded when it changed.
+    """
+
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self.entries: "OrderedDict[Tuple[int, str], PublishedSnapshot]" = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _remember(self, snapshot: PublishedSnapshot) -> None:
+        key = (snapshot.semester, snapshot.section)
+        with self.lock:
+            self.entries[key] = snapshot
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def _forget(self, semester: int, section: str) -> None:
+        with self.lock:
+            self.entries.pop((semester, section), None)
+
+    def publish(self, db: Session, semester: int) -> List[PublishedSnapshot]:
+        """
+        Materialise every section of a semester that has published slots.
+        A section whose content did not change keeps its version and ETag, so
+        clients holding it keep getting 304s. Snapshots of sections that no
+        longer have published slots are deleted. Commits the session.
+        """
+        sections = [s for (s,) in db.query(TimetableSlot.section).filter(
+            TimetableSlot.semester == semester,
+            TimetableSlot.is_published == True,
+            TimetableSlot.is_active == True,
+        ).distinct().order_by(TimetableSlot.section)]
+        existing = {
+            row.section: row for row in db.query(PublishedTimetable).filter(PublishedTimetable.semester == semester)
+        }
+
+        snapshots = []
+        now = datetime.datetime.utcnow()
+        for section in sections:
+            slots, digest = build_document(db, semester, section)
+            row = existing.get(section)
+            if row is not None and row.etag.strip('"').endswith(digest[:32]):
+                snapshots.append(self._from_row(row))
+                continue
+
+            version = (row.version + 1) if row is not None else 1
+            document = {
+                "semester": semester,
+                "section": section,
+                "version": version,
+                "published_at": now.isoformat(),
+                "slots": slots,
+            }
+            body = json.dumps(document, separators=(",", ":"), default=str).encode("utf-8")
+            etag = f'"{semester}-{section}-v{version}-{digest[:32]}"'
+            body_gzip = gzip.compress(body, mtime=0)
+            if row is None:
+                row = PublishedTimetable(semester=semester, section=section)
+                db.add(row)
+            row.version, row.etag, row.body_gzip, row.published_at = version, etag, body_gzip, now
+            snapshots.append(self._from_row(row))
+        withdrawn = [row for section, row in existing.items() if section not in sections]
+        for row in withdrawn:
+            db.delete(row)
+        db.commit()
+
+        for row in withdrawn:
+            self._forget(semester, row.section)
+        for snapshot in snapshots:
+            self._remember(snapshot)
+        return snapshots
+
+    def _from_row(self, row: PublishedTimetable) -> PublishedSnapshot:
+        return PublishedSnapshot(row.semester, row.section, row.version, row.etag, row.body_gzip, row.published_at)
+
+    def get(self, db: Session, semester: int, section: str) -> Optional[PublishedSnapshot]:
+        current = db.query(PublishedTimetable.version, PublishedTimetable.etag).filter(
+            PublishedTimetable.semester == semester,
+            PublishedTimetable.section == section,
+        ).first()
+        if current is None:
+            self._forget(semester, section)
+            return None
+        with self.lock:
+            snapshot = self.entries.get((semester, section))
+            if snapshot is not None and (snapshot.version, snapshot.etag) == tuple(current):
+                self.entries.move_to_end((semester, section))
+                return snapshot
+        row = db.query(PublishedTimetable).filter(
+            PublishedTimetable.semester == semester,
+            PublishedTimetable.section == section,
+        ).first()
+        if row is None:
+            self._forget(semester, section)
+            return None
+        snapshot = self._from_row(row)
+        self._remember(snapshot)
+        return snapshot
+
+
+# Singleton instance
+published_timetables = PublishedTimetableStore()
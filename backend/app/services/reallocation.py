@@ -0,0 +1,245 @@
+import time
+from typing import List, Dict, Any, Optional, Set, Tuple
+from ortools.sat.python import cp_model
+from sqlalchemy.orm import Session
+from app.ai_models.model_reallocation_ortools import build_reallocation_model, conflict_groups
+from app.models.academic import TimetableSlot, Course, Room
+from app.models.user import Faculty
+from app.services.occupancy import OccupancyIndex, ROOM, FACULTY, SECTION
+
+# Disruption cost of each kind of change (integers, CP-SAT minimises their sum)
+COST_SAME_DAY_SLOT = 10
+COST_OTHER_DAY_SLOT = 20
+COST_ROOM = 2
+COST_OTHER_BUILDING = 3
+COST_FACULTY = 30
+
+# Move = [time_slot_id, room_id, faculty_id, penalty], the shape build_reallocation_model takes
+Move = List[Any]
+
+
+class ReallocationEngine:
+    """
+    Moves disrupted classes (TimetableSlot rows) to conflict-free
+    (timeslot, room, faculty) combinations.
+
+    Candidate moves are enumerated on the server from the occupancy index, so
+    every move is free against the rest of the timetable; only moves of the
+    affected classes can still collide with each other, and those collisions
+    become AtMostOne constraints over a sparse conflict graph. When every
+    class's cheapest move is compatible with the others (always the case for a
+    single class) that choice is optimal and CP-SAT is skipped.
+
+    Only the max_moves_per_class cheapest moves of each class go into the
+    model. If that proves infeasible while some classes had more moves, the
+    cap is raised and the model re-solved before giving up.
+    """
+
+    def __init__(self, db: Session, index: OccupancyIndex, affected: List[int],
+                 unavailable_rooms: Optional[Set[int]] = None, unavailable_faculty: Optional[Set[int]] = None,
+                 blocked_slots: Optional[Set[int]] = None, same_day_only: bool = False,
+                 allow_faculty_change: bool = False, max_moves_per_class: int = 200):
+        self.db = db
+        self.index = index
+        self.affected = list(dict.fromkeys(affected))
+        self.unavailable_rooms = set(unavailable_rooms or ())
+        self.unavailable_faculty = set(unavailable_faculty or ())
+        self.blocked_slots = set(blocked_slots or ())
+        self.same_day_only = same_day_only
+        self.allow_faculty_change = allow_faculty_change
+        self.max_moves_per_class = max_moves_per_class
+        # class id -> instructor of the saved class, filled by candidate_moves()
+        self.instructors: Dict[int, Optional[int]] = {}
+        self.stats: Dict[str, Any] = {}
+
+    def _load(self) -> Tuple[Dict[int, Any], Dict[int, Any], Dict[Any, List[int]]]:
+        classes = {
+            row.id: row for row in self.db.query(
+                TimetableSlot.id, TimetableSlot.time_slot_id, TimetableSlot.room_id,
+                Course.instructor_id, Course.department,
+            ).join(Course, TimetableSlot.course_id == Course.id).filter(
+                TimetableSlot.id.in_(self.affected),
+                TimetableSlot.is_active == True,
+            )
+        }
+        missing = [cid for cid in self.affected if cid not in classes or cid not in self.index.bookings]
+        if missing:
+            raise ValueError(f"Unknown or inactive class id(s): {', '.join(map(str, missing))}")
+
+        rooms = {r.id: r for r in self.db.query(Room.id, Room.capacity, Room.room_type, Room.building)}
+        faculty_by_dept: Dict[Any, List[int]] = {}
+        if self.allow_faculty_change or self.unavailable_faculty:
+            for f in self.db.query(Faculty.id, Faculty.department):
+                if f.id not in self.unavailable_faculty:
+                    faculty_by_dept.setdefault(f.department, []).append(f.id)
+        return classes, rooms, faculty_by_dept
+
+    def candidate_moves(self) -> Tuple[Dict[int, List[Move]], Dict[int, Any]]:
+        """Returns (class id -> every move sorted by penalty, class id -> section key)."""
+        classes, rooms, faculty_by_dept = self._load()
+        self.instructors = {cid: classes[cid].instructor_id for cid in self.affected}
+        index = self.index
+        ignore = set(self.affected)
+        # Any one class can lose at most (n - 1) rooms to the other affected
+        # classes in a slot, so the n cheapest rooms per (slot, faculty) keep
+        # every optimal solution reachable; pricier rooms are dominated.
+        keep_rooms = len(self.affected)
+
+        sections = {cid: index.bookings[cid][3] for cid in self.affected}
+
+        busy_cache: Dict[int, Tuple[Set[Any], Set[Any], Set[Any]]] = {}
+
+        def busy_at(slot_id):
+            if slot_id not in busy_cache:
+                busy_cache[slot_id] = (
+                    index.busy(ROOM, [slot_id], ignore),
+                    index.busy(FACULTY, [slot_id], ignore),
+                    index.busy(SECTION, [slot_id], ignore),
+                )
+            return busy_cache[slot_id]
+
+        moves: Dict[int, List[Move]] = {}
+        generated = 0
+        for cid in self.affected:
+            cls = classes[cid]
+            day = index.slot_info[cls.time_slot_id][0]
+            room0 = rooms.get(cls.room_id)
+            min_capacity = (room0.capacity or 0) if room0 else 0
+
+            faculty_options = []
+            if cls.instructor_id is not None and cls.instructor_id not in self.unavailable_faculty:
+                faculty_options.append((cls.instructor_id, 0))
+            if self.allow_faculty_change or cls.instructor_id in self.unavailable_faculty:
+                faculty_options += [
+                    (f, COST_FACULTY) for f in faculty_by_dept.get(cls.department, []) if f != cls.instructor_id
+                ]
+            if cls.instructor_id is None:
+                faculty_options = [(None, 0)]
+
+            # Room candidates and their cost do not depend on the slot
+            room_costs = []
+            for r in rooms.values():
+                if r.id in self.unavailable_rooms or (r.capacity or 0) < min_capacity:
+                    continue
+                if room0 is not None and room0.room_type and r.room_type != room0.room_type:
+                    continue
+                cost = 0
+                if r.id != cls.room_id:
+                    cost += COST_ROOM
+                    if room0 is not None and r.building != room0.building:
+                        cost += COST_OTHER_BUILDING
+                room_costs.append((cost, r.id))
+            room_costs.sort()
+
+            options = []
+            for slot_id, (slot_day, _, _) in index.slot_info.items():
+                if slot_id in self.blocked_slots or (self.same_day_only and slot_day != day):
+                    continue
+                busy_rooms, busy_faculty, busy_sections = busy_at(slot_id)
+                if sections[cid] in busy_sections:
+                    continue
+                slot_cost = 0
+                if slot_id != cls.time_slot_id:
+                    slot_cost = COST_SAME_DAY_SLOT if slot_day == day else COST_OTHER_DAY_SLOT
+                free_rooms = [(c, r) for c, r in room_costs if r not in busy_rooms]
+                for faculty_id, faculty_cost in faculty_options:
+                    if faculty_id is not None and faculty_id in busy_faculty:
+                        continue
+                    generated += len(free_rooms)
+                    for room_cost, room_id in free_rooms[:keep_rooms]:
+                        options.append([slot_id, room_id, faculty_id, slot_cost + room_cost + faculty_cost])
+            options.sort(key=lambda m: m[3])
+            moves[cid] = options
+
+        self.stats["moves_generated"] = generated
+        return moves, sections
+
+    def solve(self, deadline_seconds: float = 5.0, num_workers: Optional[int] = None) -> Dict[int, Move]:
+        """Returns class id -> chosen move; raises ValueError when no conflict-free reallocation exists."""
+        start = time.perf_counter()
+        all_moves, sections = self.candidate_moves()
+        stuck = [cid for cid, m in all_moves.items() if not m]
+        if stuck:
+            raise ValueError(f"No free slot/room/faculty for class id(s): {', '.join(map(str, stuck))}")
+
+        greedy = {cid: m[0] for cid, m in all_moves.items()}
+        first_choice = {cid: [m[0]] for cid, m in all_moves.items()}
+        if not conflict_groups(self.affected, first_choice, sections):
+            self.stats.update({"method": "greedy", "status": "OPTIMAL", "conflict_constraints": 0,
+                               "moves_kept": len(greedy), "max_moves_per_class": self.max_moves_per_class,
+                               "limited_by_cap": False})
+            self.stats["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+            return greedy
+
+        cap = max(self.max_moves_per_class, 1)
+        longest = max(len(m) for m in all_moves.values())
+        while True:
+            moves = {cid: m[:cap] for cid, m in all_moves.items()}
+            capped = cap < longest
+            remaining = deadline_seconds - (time.perf_counter() - start)
+            status, chosen = self._solve_model(moves, sections, remaining, num_workers)
+            self.stats.update({
+                "moves_kept": sum(len(m) for m in moves.values()),
+                "max_moves_per_class": cap,
+                "limited_by_cap": capped,
+                "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            })
+            if chosen is not None:
+                return chosen
+            # Infeasible with the cheapest moves only: widen the candidate lists and retry
+            if status == cp_model.INFEASIBLE and capped and deadline_seconds > time.perf_counter() - start:
+                cap *= 4
+                continue
+            if capped:
+                raise ValueError(
+                    "Could not find a conflict-free reallocation within the deadline using the "
+                    f"{cap} cheapest moves per class. Raise max_moves_per_class or deadline_seconds."
+                )
+            raise ValueError("Could not find a conflict-free reallocation within the deadline.")
+
+    def _solve_model(self, moves: Dict[int, List[Move]], sections: Dict[int, Any], time_limit: float,
+                     num_workers: Optional[int]) -> Tuple[int, Optional[Dict[int, Move]]]:
+        """One CP-SAT solve over the given candidate moves. Returns (status, chosen moves or None)."""
+        num_conflicts = len(conflict_groups(self.affected, moves, sections))
+        model, choose = build_reallocation_model(self.affected, moves, sections)
+        solver = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = max(float(time_limit), 0.1)
+        if num_workers:
+            solver.parameters.num_workers = int(num_workers)
+        status = solver.Solve(model)
+        self.stats.update({
+            "method": "cp-sat",
+            "status": solver.StatusName(status),
+            "conflict_constraints": num_conflicts,
+        })
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            return status, None
+        return status, {
+            cid: moves[cid][k]
+            for (cid, k), var in choose.items() if solver.Value(var) == 1
+        }
+
+    def faculty_changes(self, chosen: Dict[int, Move]) -> List[Dict[str, Any]]:
+        """Chosen moves that hand a class to a substitute instructor."""
+        return [
+            {"class_id": cid, "faculty": self.instructors.get(cid), "substitute": move[2]}
+            for cid, move in chosen.items() if move[2] != self.instructors.get(cid)
+        ]
+
+    def apply(self, chosen: Dict[int, Move]) -> None:
+        """
+        Persist the new timeslot/room of each class and patch the occupancy index.
+        Substitute faculty cannot be stored (TimetableSlot has no faculty
+        column), so moves that change the instructor are refused.
+        """
+        substitutions = self.faculty_changes(chosen)
+        if substitutions:
+            raise ValueError("Cannot apply faculty substitutions for class id(s): "
+                             + ", ".join(str(s["class_id"]) for s in substitutions))
+        for cid, (slot_id, room_id, _, _) in chosen.items():
+            self.db.query(TimetableSlot).filter(TimetableSlot.id == cid).update(
+                {"time_slot_id": slot_id, "room_id": room_id}
+            )
+        self.db.commit()
+        for cid, (slot_id, room_id, _, _) in chosen.items():
+            self.index.move(cid, time_slot_id=slot_id, room_id=room_id)
@@ -0,0 +1,57 @@
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from app.models.academic import Course, Room, TimeSlot, TimetableSlot, CalendarException, ScheduleVersion
+
+# Models whose changes invalidate the occupancy index and the calendar week memo
+TRACKED = (Course, Room, TimeSlot, TimetableSlot, CalendarException)
+
+# Session.info flag: a tracked table was written in the current transaction
+_CHANGED = "schedule_changed"
+
+
+def schedule_version(db: Session) -> int:
+    """The current change marker; one primary-key read."""
+    return db.scalar(select(ScheduleVersion.version).where(ScheduleVersion.id == 1)) or 0
+
+
+def bump_schedule_version(db: Session) -> None:
+    """Increment the marker inside the caller's transaction."""
+    bumped = db.execute(
+        update(ScheduleVersion).where(ScheduleVersion.id == 1).values(version=ScheduleVersion.version + 1)
+    ).rowcount
+    if not bumped:
+        db.execute(insert(ScheduleVersion).values(id=1, version=1))
+
+
+def _has_tracked_changes(session: Session) -> bool:
+    """Pending unit-of-work changes to a tracked model."""
+    return any(isinstance(obj, TRACKED) for obj in session.new) or any(
+        isinstance(obj, TRACKED) for obj in session.deleted
+    ) or any(isinstance(obj, TRACKED) and session.is_modified(obj) for obj in session.dirty)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _track_bulk_writes(state) -> None:
+    # insert(TimetableSlot), query(...).update(), delete(...) and friends skip the unit of work
+    if (state.is_insert or state.is_update or state.is_delete) and state.bind_mapper is not None:
+        if issubclass(state.bind_mapper.class_, TRACKED):
+            state.session.info[_CHANGED] = True
+
+
+@event.listens_for(Session, "before_flush")
+def _track_flushed_writes(session, flush_context, instances) -> None:
+    if _has_tracked_changes(session):
+        session.info[_CHANGED] = True
+
+
+@event.listens_for(Session, "before_commit")
+def _bump_on_commit(session) -> None:
+    # Objects still pending are flushed after this hook runs, so look at them here too
+    if session.info.get(_CHANGED) or _has_tracked_changes(session):
+        bump_schedule_version(session)
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _reset(session) -> None:
+    session.info.pop(_CHANGED, None)
@@ -0,0 +1,84 @@
+import gzip
+import json
+import os
+import time
+import uuid
+from typing import Dict, Any, Optional, Tuple
+from ortools.sat.python import cp_model
+
+# Files inside a snapshot directory
+MODEL_FILE = "model.pbtxt.gz"
+PARAMS_FILE = "params.pbtxt"
+METADATA_FILE = "metadata.json"
+
+
+def proto_to_text(message) -> str:
+    """Text format of a CP-SAT proto (model or parameters) across OR-Tools versions."""
+    if hasattr(message, "SerializeToString"):  # google.protobuf messages (older OR-Tools)
+        from google.protobuf import text_format
+        return text_format.MessageToString(message)
+    return str(message)
+
+
+def merge_text(message, text: str) -> None:
+    """Merge text-format fields into a CP-SAT proto across OR-Tools versions."""
+    if hasattr(message, "merge_text_format"):
+        message.merge_text_format(text)
+    else:
+        from google.protobuf import text_format
+        text_format.Merge(text, message)
+
+
+def save_snapshot(root_dir: str, kind: str, model: cp_model.CpModel, solver: cp_model.CpSolver,
+                  metadata: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Write a model, the solver parameters it is about to run with and input
+    metadata to a new directory under root_dir. Returns the directory path.
+    """
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{kind}-{uuid.uuid4().hex[:8]}"
+    path = os.path.join(root_dir, name)
+    os.makedirs(path, exist_ok=True)
+
+    with gzip.open(os.path.join(path, MODEL_FILE), "wt", encoding="utf-8") as fh:
+        fh.write(proto_to_text(model.Proto()))
+    with open(os.path.join(path, PARAMS_FILE), "w") as fh:
+        fh.write(proto_to_text(solver.parameters))
+
+    proto = model.Proto()
+    meta = {
+        "kind": kind,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "num_variables": len(proto.variables),
+        "num_constraints": len(proto.constraints),
+        "inputs": metadata or {},
+    }
+    with open(os.path.join(path, METADATA_FILE), "w") as fh:
+        json.dump(meta, fh, indent=2, default=str)
+    return path
+
+
+def load_snapshot(path: str) -> Tuple[cp_model.CpModel, str, Dict[str, Any]]:
+    """Return (model, parameters in text format, metadata) for a snapshot directory."""
+    model = cp_model.CpModel()
+    with gzip.open(os.path.join(path, MODEL_FILE), "rt", encoding="utf-8") as fh:
+        merge_text(model.Proto(), fh.read())
+    params = ""
+    if os.path.exists(os.path.join(path, PARAMS_FILE)):
+        with open(os.path.join(path, PARAMS_FILE)) as fh:
+            params = fh.read()
+    metadata: Dict[str, Any] = {}
+    if os.path.exists(os.path.join(path, METADATA_FILE)):
+        with open(os.path.join(path, METADATA_FILE)) as fh:
+            metadata = json.load(fh)
+    return model, params, metadata
+
+
+def find_snapshots(path: str):
+    """Yield snapshot directories: path itself, or its direct children."""
+    if os.path.exists(os.path.join(path, MODEL_FILE)):
+        yield path
+        return
+    for name in sorted(os.listdir(path)):
+        child = os.path.join(path, name)
+        if os.path.exists(os.path.join(child, MODEL_FILE)):
+            yield child
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+from ortools.sat.python import cp_model
+from app.core.config import settings
+from app.services.solver_snapshots import merge_text
+
+# Candidate CP-SAT configurations. Values are SatParameters fields; enums by name.
+PORTFOLIO: List[Dict[str, Any]] = [
+    {"name": "default", "params": {}},
+    {"name": "single_worker", "params": {"num_workers": 1}},
+    {"name": "single_fixed_search", "params": {"num_workers": 1, "search_branching": "FIXED_SEARCH"}},
+    {"name": "workers_4", "params": {"num_workers": 4}},
+    {"name": "workers_8", "params": {"num_workers": 8}},
+    {"name": "workers_8_lin2", "params": {"num_workers": 8, "linearization_level": 2}},
+    {"name": "workers_8_lin0", "params": {"num_workers": 8, "linearization_level": 0}},
+    {"name": "workers_8_symmetry", "params": {"num_workers": 8, "symmetry_level": 2}},
+    {"name": "workers_8_portfolio_search", "params": {"num_workers": 8, "search_branching": "PORTFOLIO_SEARCH"}},
+]
+
+# Upper bounds on model variables for each size class
+SIZE_CLASSES: List[Tuple[str, int]] = [
+    ("xs", 2_000),
+    ("s", 20_000),
+    ("m", 200_000),
+    ("l", 2_000_000),
+]
+
+
+def size_class(num_variables: int) -> str:
+    for name, limit in SIZE_CLASSES:
+        if num_variables <= limit:
+            return name
+    return "xl"
+
+
+def profile_key(kind: str, num_variables: int) -> str:
+    """Profiles are stored per "<model kind>/<size class>", e.g. "rooms/s"."""
+    return f"{kind}/{size_class(num_variables)}"
+
+
+def params_to_text(params: Dict[str, Any]) -> str:
+    """SatParameters text format for a {field: value} dict (enums passed by name)."""
+    lines = []
+    for key, value in params.items():
+        if isinstance(value, bool):
+            value = "true" if value else "false"
+        lines.append(f"{key}: {value}")
+    return "\n".join(lines)
+
+
+def apply_params(solver: cp_model.CpSolver, params: Dict[str, Any]) -> None:
+    if params:
+        merge_text(solver.parameters, params_to_text(params))
+
+
+class TunedProfileStore:
+    """
+    Winning parameter set per model kind and size class, persisted as JSON so
+    every worker process picks up the latest tuning run.
+    """
+
+    def __init__(self, path: Optional[str]):
+        self.path = path
+        self.lock = threading.Lock()
+        self._profiles: Optional[Dict[str, Any]] = None
+        self._mtime: Optional[float] = None
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.path or not os.path.exists(self.path):
+            return {}
+        mtime = os.path.getmtime(self.path)
+        if self._profiles is None or mtime != self._mtime:
+            try:
+                with open(self.path) as fh:
+                    self._profiles = json.load(fh)
+                self._mtime = mtime
+            except (OSError, ValueError) as e:
+                print(f"WARNING: Ignoring unreadable solver profile file {self.path}: {e}")
+                self._profiles = {}
+        return self._profiles
+
+    def get(self, kind: str, num_variables: int) -> Optional[Dict[str, Any]]:
+        """Profile entry {"name", "params", ...} for a model kind and size, or None."""
+        with self.lock:
+            return self._load().get(profile_key(kind, num_variables))
+
+    def save(self, profiles: Dict[str, Any]) -> None:
+        if not self.path:
+            raise ValueError("SOLVER_PROFILE_PATH is not configured")
+        with self.lock:
+            merged = dict(self._load())
+            merged.update(profiles)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w") as fh:
+                json.dump(merged, fh, indent=2)
+            os.replace(tmp_path, self.path)
+            self._profiles = merged
+            self._mtime = os.path.getmtime(self.path)
+
+
+def apply_tuned_profile(solver: cp_model.CpSolver, model: cp_model.CpModel, kind: str,
+                        max_workers: Optional[int] = None) -> Optional[Dict[str, Any]]:
+    """
+    Apply the tuned parameters for this model's kind and size class. A tuned
+    worker count is capped at max_workers (the caller's TIMETABLE_SEARCH_WORKERS).
+    Returns the profile used, if any.
+    """
+    profile = solver_profiles.get(kind, len(model.Proto().variables))
+    if not profile:
+        return None
+    params = profile.get("params", {})
+    apply_params(solver, params)
+    if max_workers and "num_workers" in params:
+        # 0 means "all cores" to CP-SAT
+        solver.parameters.num_workers = min(solver.parameters.num_workers or max_workers, max_workers)
+    return profile
+
+
+class _FirstSolutionTimer(cp_model.CpSolverSolutionCallback):
+    def __init__(self):
+        super().__init__()
+        self.first_solution_seconds: Optional[float] = None
+
+    def OnSolutionCallback(self):
+        if self.first_solution_seconds is None:
+            self.first_solution_seconds = self.WallTime()
+
+
+def run_config(model: cp_model.CpModel, config: Dict[str, Any], time_limit: float) -> Dict[str, Any]:
+    """Solve one model with one configuration and time it."""
+    solver = cp_model.CpSolver()
+    apply_params(solver, config["params"])
+    solver.parameters.max_time_in_seconds = time_limit
+    timer = _FirstSolutionTimer()
+    status = solver.Solve(model, timer)
+    # A proof of infeasibility is as final as a proof of optimality
+    finished = status in (cp_model.OPTIMAL, cp_model.INFEASIBLE)
+    return {
+        "config": config["name"],
+        "status": solver.StatusName(status),
+        "time_to_first_feasible": timer.first_solution_seconds,
+        "time_to_optimal": solver.WallTime() if finished else None,
+        "wall_time": solver.WallTime(),
+    }
+
+
+def run_portfolio(problems: List[Tuple[str, str, cp_model.CpModel]], configs: Optional[List[Dict[str, Any]]] = None,
+                  time_limit: float = 60.0, parallel: int = 2) -> List[Dict[str, Any]]:
+    """
+    Try every configuration on every (name, model kind, model) problem. Runs `parallel`
+    solves at a time (CP-SAT releases the GIL); keep parallel * num_workers
+    near the core count or timings will be skewed.
+    """
+    configs = configs or PORTFOLIO
+    tasks = [(name, kind, model, config) for name, kind, model in problems for config in configs]
+
+    def run(task):
+        name, kind, model, config = task
+        result = run_config(model, config, time_limit)
+        result["problem"] = name
+        result["model_kind"] = kind
+        result["num_variables"] = len(model.Proto().variables)
+        result["profile"] = profile_key(kind, result["num_variables"])
+        return result
+
+    with ThreadPoolExecutor(max_workers=max(parallel, 1)) as pool:
+        return list(pool.map(run, tasks))
+
+
+def pick_winners(results: List[Dict[str, Any]], time_limit: float,
+                 configs: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Best configuration per model kind and size class: lowest mean time-to-optimal, where runs
+    that did not finish count as twice the time limit (and as the full limit
+    if they at least found a feasible solution).
+    """
+    configs = {c["name"]: c for c in (configs or PORTFOLIO)}
+    scores: Dict[Tuple[str, str], List[float]] = {}
+    for r in results:
+        if r["time_to_optimal"] is not None:
+            score = r["time_to_optimal"]
+        elif r["time_to_first_feasible"] is not None:
+            score = time_limit
+        else:
+            score = 2 * time_limit
+        scores.setdefault((r["profile"], r["config"]), []).append(score)
+
+    winners: Dict[str, Any] = {}
+    for (cls, name), values in scores.items():
+        mean = sum(values) / len(values)
+        if cls not in winners or mean < winners[cls]["mean_score"]:
+            winners[cls] = {
+                "name": name,
+                "params": configs[name]["params"],
+                "mean_score": round(mean, 4),
+                "problems": len(values),
+            }
+    return winners
+
+
+# Singleton instance
+solver_profiles = TunedProfileStore(settings.SOLVER_PROFILE_PATH)
@@ -0,0 +1,204 @@
+import datetime
+import time
+from collections import Counter
+from typing import List, Dict, Any, Optional, Set, Tuple
+import numpy as np
+from ortools.graph.python import min_cost_flow
+from sqlalchemy.orm import Session
+from app.models.academic import TimetableSlot, Course, Room
+from app.models.user import Faculty, User
+from app.services.faculty_predictor import faculty_predictor
+from app.services.occupancy import OccupancyIndex, FACULTY
+from app.services.timetable_grid import period_label
+
+# Assignment costs (integers for the flow solver); lower is better
+COST_OTHER_DEPARTMENT = 40
+COST_NO_YEAR_AFFINITY = 15
+COST_PER_WEEKLY_CLASS = 1
+COST_PER_CLASS_TODAY = 5
+COST_UNAVAILABILITY = 50  # scaled by (1 - predicted availability)
+COST_EXTRA_CLASS_STEP = 10  # k-th substitution of the day costs k * step, spreading the load
+COST_UNCOVERED = 1000
+
+# Leave rate assumed for the predictor when no history is recorded
+DEFAULT_LEAVE_RATE = 0.1
+
+
+def semester_year(semester: Optional[int]) -> Optional[int]:
+    return (semester + 1) // 2 if semester else None
+
+
+class SubstitutionPlanner:
+    """
+    Plans substitutes for every class of a day whose faculty member is absent.
+
+    The whole day is solved at once as a min-cost flow:
+    source -> class -> (substitute, timeslot) -> substitute -> sink.
+    (substitute, timeslot) nodes have capacity one, so nobody is double-booked,
+    and each substitute reaches the sink through unit arcs of increasing cost,
+    so extra classes are spread over the department. Every class also has an
+    expensive arc straight to the sink, which keeps the flow feasible and
+    reports classes nobody can cover.
+    """
+
+    def __init__(self, db: Session, index: OccupancyIndex, date: datetime.date, absent: Set[int],
+                 cross_department: bool = False, max_extra_classes: int = 3):
+        self.db = db
+        self.index = index
+        self.date = date
+        self.day = date.strftime("%A")
+        self.absent = set(absent)
+        self.cross_department = cross_department
+        self.max_extra_classes = max_extra_classes
+        self.stats: Dict[str, Any] = {}
+
+    def affected_classes(self) -> List[Any]:
+        """Active TimetableSlot rows on this weekday taught by an absent faculty member."""
+        ids = [
+            bid for bid, (slot_id, _, faculty_id, _) in self.index.bookings_snapshot().items()
+            if faculty_id in self.absent and self.index.slot_info[slot_id][0] == self.day
+        ]
+        if not ids:
+            return []
+        return self.db.query(
+            TimetableSlot.id, TimetableSlot.time_slot_id, TimetableSlot.section, TimetableSlot.semester,
+            Course.code, Course.instructor_id, Course.department, Room.name.label("room_name"),
+        ).join(Course, TimetableSlot.course_id == Course.id).join(
+            Room, TimetableSlot.room_id == Room.id
+        ).filter(TimetableSlot.id.in_(ids)).order_by(TimetableSlot.time_slot_id, TimetableSlot.id).all()
+
+    def _faculty_context(self):
+        faculty = self.db.query(Faculty.id, Faculty.department, User.full_name).outerjoin(
+            User, Faculty.user_id == User.id
+        ).all()
+        years: Dict[int, Set[int]] = {}
+        for instructor_id, semester in self.db.query(Course.instructor_id, Course.semester).distinct():
+            if instructor_id is not None and semester:
+                years.setdefault(instructor_id, set()).add(semester_year(semester))
+
+        weekly: Counter = Counter()
+        today: Dict[int, Set[int]] = {}
+        for slot_id, _, faculty_id, _ in self.index.bookings_snapshot().values():
+            if faculty_id is None:
+                continue
+            weekly[faculty_id] += 1
+            if self.index.slot_info[slot_id][0] == self.day:
+                today.setdefault(faculty_id, set()).add(slot_id)
+        return faculty, years, weekly, today
+
+    def plan(self) -> Dict[str, Any]:
+        start = time.perf_counter()
+        classes = self.affected_classes()
+        faculty, years, weekly, today = self._faculty_context()
+        names = {f.id: f.full_name for f in faculty}
+
+        # Order the day's slots by start time to count back-to-back classes
+        day_slots = sorted(
+            (sid for sid, info in self.index.slot_info.items() if info[0] == self.day),
+            key=lambda sid: self.index.slot_info[sid][1],
+        )
+        neighbours = {
+            sid: set(day_slots[max(i - 1, 0):i] + day_slots[i + 1:i + 2]) for i, sid in enumerate(day_slots)
+        }
+        busy_by_slot = {sid: self.index.busy(FACULTY, [sid]) for sid in {c.time_slot_id for c in classes}}
+
+        # Candidate (class, substitute) pairs with their static cost and predictor features
+        pairs: List[Tuple[Any, Any, int]] = []
+        features = []
+        for c in classes:
+            year = semester_year(c.semester)
+            start_time = self.index.slot_info[c.time_slot_id][1]
+            for f in faculty:
+                if f.id in self.absent or f.id in busy_by_slot[c.time_slot_id]:
+                    continue
+                same_department = f.department == c.department
+                if not same_department and not self.cross_department:
+                    continue
+                cost = 0 if same_department else COST_OTHER_DEPARTMENT
+                cost += 0 if year in years.get(f.id, ()) else COST_NO_YEAR_AFFINITY
+                cost += COST_PER_WEEKLY_CLASS * weekly[f.id] + COST_PER_CLASS_TODAY * len(today.get(f.id, ()))
+                back_to_back = len(neighbours.get(c.time_slot_id, set()) & today.get(f.id, set()))
+                pairs.append((c, f, cost))
+                features.append([self.date.weekday(), start_time.hour, DEFAULT_LEAVE_RATE,
+                                 weekly[f.id], back_to_back, 0])
+
+        availability = faculty_predictor.predict_many(np.array(features))
+        scored = [
+            (c, f, cost + int(round((1 - p) * COST_UNAVAILABILITY)), float(p))
+            for (c, f, cost), p in zip(pairs, availability)
+        ]
+
+        assignment = self._solve_flow(classes, scored)
+
+        plan, uncovered = [], []
+        for c in classes:
+            slot_day, slot_start, _ = self.index.slot_info[c.time_slot_id]
+            entry = {
+                "timetable_slot_id": c.id,
+                "time_slot_id": c.time_slot_id,
+                "slot": f"{slot_day}-{period_label(slot_start)}",
+                "course_code": c.code,
+                "section": c.section,
+                "semester": c.semester,
+                "room": c.room_name,
+                "absent_faculty_id": c.instructor_id,
+            }
+            chosen = assignment.get(c.id)
+            if chosen is None:
+                uncovered.append(entry)
+                continue
+            f, cost, p = chosen
+            plan.append(dict(entry, substitute_id=f.id, substitute_name=names.get(f.id),
+                             cost=cost, availability_score=round(p, 3)))
+
+        self.stats = {
+            "classes": len(classes),
+            "covered": len(plan),
+            "candidates": len(scored),
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+        return {"date": self.date.isoformat(), "day": self.day, "plan": plan, "uncovered": uncovered,
+                "stats": self.stats}
+
+    def _solve_flow(self, classes: List[Any], scored: List[Tuple[Any, Any, int, float]]) -> Dict[int, Tuple[Any, int, float]]:
+        if not classes:
+            return {}
+        flow = min_cost_flow.SimpleMinCostFlow()
+        nodes: Dict[Any, int] = {}
+
+        def node(key) -> int:
+            if key not in nodes:
+                nodes[key] = len(nodes)
+            return nodes[key]
+
+        source, sink = node("source"), node("sink")
+        for c in classes:
+            flow.add_arc_with_capacity_and_unit_cost(source, node(("class", c.id)), 1, 0)
+            flow.add_arc_with_capacity_and_unit_cost(node(("class", c.id)), sink, 1, COST_UNCOVERED)
+
+        arcs: Dict[int, Tuple[Any, Any, int, float]] = {}
+        substitutes = {}
+        for c, f, cost, p in scored:
+            slot_node = node(("slot", f.id, c.time_slot_id))
+            arc = flow.add_arc_with_capacity_and_unit_cost(node(("class", c.id)), slot_node, 1, cost)
+            arcs[arc] = (c, f, cost, p)
+            if slot_node not in substitutes:
+                substitutes[slot_node] = f.id
+                flow.add_arc_with_capacity_and_unit_cost(slot_node, node(("faculty", f.id)), 1, 0)
+        # Convex load cost: the k-th extra class of a substitute costs k * step
+        for faculty_id in set(substitutes.values()):
+            for k in range(1, self.max_extra_classes + 1):
+                flow.add_arc_with_capacity_and_unit_cost(
+                    node(("faculty", faculty_id)), sink, 1, COST_EXTRA_CLASS_STEP * k
+                )
+
+        flow.set_node_supply(source, len(classes))
+        flow.set_node_supply(sink, -len(classes))
+        if flow.solve() != flow.OPTIMAL:
+            raise ValueError("Substitution flow could not be solved")
+
+        assignment = {}
+        for arc, (c, f, cost, p) in arcs.items():
+            if flow.flow(arc) > 0:
+                assignment[c.id] = (f, cost, p)
+        return assignment
@@ -0,0 +1,210 @@
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Any, Optional, Set, Tuple
+from sqlalchemy.orm import Session
+from app.models.academic import TimetableSlot, Course, Room
+from app.services.timetable_opt import TimetableSolver
+
+# Kinds of resource negotiated between departments
+ROOM = "room"
+FACULTY = "faculty"
+
+
+# Plain, picklable stand-ins for the ORM rows so subproblems can cross process boundaries
+class BatchCourse:
+    def __init__(self, code, credits=3, instructor_id="Unknown", batch_size=40, room_type=None, section=None):
+        self.code = code
+        self.credits = credits
+        self.instructor_id = instructor_id
+        self.batch_size = batch_size
+        self.room_type = room_type
+        self.section = section
+
+
+class BatchRoom:
+    def __init__(self, name, capacity=60, room_type=None, building=None):
+        self.name = name
+        self.capacity = capacity
+        self.room_type = room_type
+        self.building = building
+
+
+class BatchSlot:
+    def __init__(self, id):
+        self.id = id
+
+
+def load_outside_bookings(db: Session, semesters: List[int], course_ids: List[int]) -> Tuple[
+        Set[Tuple[int, str]], Set[Tuple[int, Any]]]:
+    """
+    Rooms and faculty taken by saved timetable slots the batch will not
+    replace (other semesters, or courses outside the batch), as
+    ({(slot_id, room_name)}, {(slot_id, faculty_id)}).
+    """
+    rows = db.query(TimetableSlot.time_slot_id, Room.name, Course.instructor_id).join(
+        Room, TimetableSlot.room_id == Room.id
+    ).join(
+        Course, TimetableSlot.course_id == Course.id
+    ).filter(
+        TimetableSlot.is_active == True,
+        ~(TimetableSlot.semester.in_(semesters) & TimetableSlot.course_id.in_(course_ids)),
+    ).all()
+    rooms = {(slot_id, room) for slot_id, room, _ in rows}
+    faculty = {(slot_id, instructor_id) for slot_id, _, instructor_id in rows if instructor_id is not None}
+    return rooms, faculty
+
+
+def solve_department(problem: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Process-pool worker: solve one department subproblem.
+    problem: {"department", "courses": [dict], "rooms": [dict], "slots": [slot_id],
+              "blocked": [(slot_id, room)], "busy_faculty": [(slot_id, faculty_id)],
+              "time_limit": seconds, "num_workers": CP-SAT workers}
+    """
+    courses = [BatchCourse(**c) for c in problem["courses"]]
+    rooms = [BatchRoom(**r) for r in problem["rooms"]]
+    slots = [BatchSlot(t) for t in problem["slots"]]
+    blocked = {tuple(b) for b in problem.get("blocked", [])}
+    busy_faculty = {tuple(b) for b in problem.get("busy_faculty", [])}
+
+    solver = TimetableSolver(courses, rooms, slots, blocked=blocked, busy_faculty=busy_faculty)
+    schedule = solver.solve(time_limit=problem.get("time_limit"), num_workers=problem.get("num_workers"))
+    return {"department": problem["department"], "schedule": schedule, "stats": solver.stats}
+
+
+class BatchTimetableCoordinator:
+    """
+    Solves per-department subproblems in a process pool and negotiates shared
+    rooms and shared faculty.
+
+    Every department first solves against its dedicated rooms plus all shared
+    rooms. A (slot, shared room) pair claimed by several departments goes to one
+    of them (the department with more sessions, so the hardest subproblem keeps
+    its choice); that pair is reserved and the other departments are re-solved
+    with it blocked. Instructors teaching in several departments are negotiated
+    the same way per (slot, instructor). Departments without conflicts are
+    never re-solved.
+
+    time_limit bounds the whole run, every round sharing what is left of it;
+    search_workers is the CP-SAT worker budget split across the departments
+    solved at the same time.
+    """
+
+    def __init__(self, problems: Dict[str, Dict[str, Any]], shared_rooms: Set[str],
+                 max_workers: Optional[int] = None, max_rounds: Optional[int] = None,
+                 time_limit: Optional[float] = None, search_workers: Optional[int] = None):
+        self.problems = problems
+        self.shared_rooms = set(shared_rooms)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        # Each round finalizes at least the winner of every conflict
+        self.max_rounds = max_rounds or max(len(problems), 1)
+        self.time_limit = time_limit
+        self.search_workers = search_workers
+        self.shared_faculty = self._shared_faculty(problems)
+        # (kind, slot_id, room name or instructor id) -> owning department
+        self.reservations: Dict[Tuple[str, Any, Any], str] = {}
+        self.stats: Dict[str, Any] = {}
+
+    @staticmethod
+    def _shared_faculty(problems: Dict[str, Dict[str, Any]]) -> Set[Any]:
+        departments: Dict[Any, Set[str]] = {}
+        for d, problem in problems.items():
+            for c in problem["courses"]:
+                departments.setdefault(c.get("instructor_id", "Unknown"), set()).add(d)
+        return {f for f, ds in departments.items() if len(ds) > 1}
+
+    def _solve_many(self, departments: List[str], time_limit: Optional[float]) -> Dict[str, Dict[str, Any]]:
+        pool_size = min(self.max_workers, len(departments))
+        num_workers = max(1, self.search_workers // pool_size) if self.search_workers else None
+        tasks = []
+        for d in departments:
+            problem = dict(self.problems[d])
+            reserved = [(kind, slot, entity) for (kind, slot, entity), owner in self.reservations.items() if owner != d]
+            problem["blocked"] = list(problem.get("blocked", [])) + [(s, e) for k, s, e in reserved if k == ROOM]
+            problem["busy_faculty"] = list(problem.get("busy_faculty", [])) + [
+                (s, e) for k, s, e in reserved if k == FACULTY
+            ]
+            problem["time_limit"] = time_limit
+            problem["num_workers"] = num_workers
+            tasks.append(problem)
+
+        if pool_size == 1:
+            results = [solve_department(p) for p in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=pool_size) as pool:
+                results = list(pool.map(solve_department, tasks))
+        return {r["department"]: r for r in results}
+
+    def _claims(self, department: str, schedule: List[Dict[str, Any]]) -> List[Tuple[str, Any, Any]]:
+        """Shared resources a department's schedule uses."""
+        instructor = {c["code"]: c.get("instructor_id", "Unknown") for c in self.problems[department]["courses"]}
+        claims = []
+        for entry in schedule:
+            if entry["room_name"] in self.shared_rooms:
+                claims.append((ROOM, entry["slot_id"], entry["room_name"]))
+            faculty_id = instructor.get(entry["course_code"])
+            if faculty_id in self.shared_faculty:
+                claims.append((FACULTY, entry["slot_id"], faculty_id))
+        return claims
+
+    def run(self) -> Dict[str, Dict[str, Any]]:
+        """Returns dict department -> {"schedule", "stats"}; raises ValueError if a department cannot be solved."""
+        start = time.perf_counter()
+        results: Dict[str, Dict[str, Any]] = {}
+        pending = sorted(self.problems)
+        resolves = {d: 0 for d in pending}
+        size = {d: sum(c.get("credits", 3) for c in p["courses"]) for d, p in self.problems.items()}
+
+        rounds = 0
+        while pending:
+            if rounds >= self.max_rounds:
+                raise ValueError(f"Shared room/faculty negotiation did not converge for: {', '.join(pending)}")
+            rounds += 1
+
+            remaining = None
+            if self.time_limit is not None:
+                remaining = self.time_limit - (time.perf_counter() - start)
+                if remaining <= 0:
+                    raise ValueError(
+                        f"Batch generation ran out of its {self.time_limit:g}s time limit "
+                        f"before solving: {', '.join(pending)}"
+                    )
+
+            solved = self._solve_many(pending, remaining)
+            failed = sorted(d for d, r in solved.items() if not r["schedule"])
+            if failed:
+                timed_out = [d for d in failed if solved[d]["stats"].get("status") == "UNKNOWN"]
+                if timed_out:
+                    raise ValueError(f"No timetable found within the time limit for department(s): {', '.join(timed_out)}")
+                raise ValueError(f"No feasible timetable for department(s): {', '.join(failed)}")
+            results.update(solved)
+
+            # Collect claims on shared rooms and faculty from the departments solved this round
+            claims: Dict[Tuple[str, Any, Any], List[str]] = {}
+            for d in pending:
+                for key in self._claims(d, solved[d]["schedule"]):
+                    claims.setdefault(key, []).append(d)
+
+            losers = set()
+            for key, claimants in claims.items():
+                winner = min(claimants, key=lambda d: (-size[d], d))
+                self.reservations[key] = winner
+                losers.update(d for d in claimants if d != winner)
+
+            # Losers give up everything they claimed this round and try again
+            for key, owner in list(self.reservations.items()):
+                if owner in losers:
+                    del self.reservations[key]
+            for d in losers:
+                resolves[d] += 1
+            pending = sorted(losers)
+
+        self.stats = {
+            "rounds": rounds,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+            "resolves": resolves,
+            "workers": self.max_workers,
+            "shared_faculty": len(self.shared_faculty),
+        }
+        return results
@@ -0,0 +1,169 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Tuple
+from app.core.config import settings
+from app.services.timetable_opt import TimetableSolver
+
+# Only definitive answers are cached; a time-limited FEASIBLE/UNKNOWN run could
+# improve with another attempt.
+CACHEABLE_STATUSES = ("OPTIMAL", "INFEASIBLE")
+
+
+def problem_fingerprint(solver: TimetableSolver) -> str:
+    """
+    Canonical SHA-256 of everything that determines a solve: the solver kind,
+    mode and objective, course codes/credits/instructors/batch sizes, room
+    names/capacities and slot ids. Inputs are sorted so ordering differences hash the same, and
+    any edit to the courses or rooms tables yields a different key, which makes
+    older entries unreachable.
+    """
+    data = solver.problem_data()
+    canonical = {
+        "solver": type(solver).__name__,
+        "mode": solver.mode,
+        "objective": solver.objective,
+        "courses": sorted(
+            [
+                code,
+                data["course_credits"][code],
+                str(data["faculty_map"][code]),
+                data["batch_size"][code],
+                data["course_room_type"][code],
+                data["section_map"][code],
+            ]
+            for code in data["course_ids"]
+        ),
+        "rooms": sorted(
+            [name, data["room_cap"][name], data["room_type"][name], data["room_building"][name]]
+            for name in data["room_ids"]
+        ),
+        "slots": sorted(str(t) for t in data["slot_ids"]),
+        "blocked": sorted([str(t), r] for t, r in solver.blocked),
+    }
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TimetableSolutionCache:
+    """
+    Two-tier cache of solved timetables keyed by problem_fingerprint.
+    Tier one is an in-memory LRU; tier two (optional) is one JSON file per key
+    in cache_dir, which survives restarts.
+    """
+
+    def __init__(self, max_entries: int = 128, cache_dir: Optional[str] = None):
+        self.max_entries = max_entries
+        self.cache_dir = cache_dir
+        self.entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+            except OSError as e:
+                print(f"WARNING: Timetable cache directory {cache_dir} is unavailable: {e}")
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        if self.cache_dir and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key)) as fh:
+                    entry = json.load(fh)
+            except (OSError, ValueError) as e:
+                print(f"WARNING: Ignoring unreadable timetable cache entry {key}: {e}")
+                entry = None
+            if entry is not None:
+                self._remember(key, entry)
+                with self.lock:
+                    self.hits += 1
+                return entry
+
+        with self.lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, entry: Dict[str, Any]) -> None:
+        """
+        Store an entry in memory and, when configured, on disk. A failed disk
+        write (full or read-only disk) is logged and the entry stays in the
+        in-memory tier only; it never fails the solve that produced it.
+        """
+        self._remember(key, entry)
+        if self.cache_dir:
+            tmp_path = self._path(key) + ".tmp"
+            try:
+                with open(tmp_path, "w") as fh:
+                    json.dump(entry, fh, default=str)
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                print(f"WARNING: Could not write timetable cache entry {key} to disk: {e}")
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    def _remember(self, key: str, entry: Dict[str, Any]) -> None:
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+
+    def info(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self.entries),
+            "max_entries": self.max_entries,
+            "disk_tier": self.cache_dir,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def solve_with_cache(solver: TimetableSolver, cache: "TimetableSolutionCache",
+                     time_limit: Optional[float] = None, num_workers: Optional[int] = None) -> Tuple[List[Dict], bool]:
+    """
+    Run solver.solve() through the cache. Returns (schedule, cache_hit).
+    On a hit solver.stats is restored from the entry, so callers can report it
+    as if the solve had just run.
+    """
+    key = problem_fingerprint(solver)
+    entry = cache.get(key)
+    if entry is not None:
+        solver.stats = dict(entry["stats"], cache="hit", cache_key=key)
+        return entry["schedule"], True
+
+    schedule = solver.solve(time_limit=time_limit, num_workers=num_workers)
+    if solver.stats.get("status") in CACHEABLE_STATUSES:
+        cache.put(key, {
+            "schedule": schedule,
+            "stats": solver.stats,
+            "params": {"time_limit": time_limit, "num_workers": num_workers},
+            "created_at": time.time(),
+        })
+    solver.stats = dict(solver.stats, cache="miss", cache_key=key)
+    return schedule, False
+
+
+# Singleton instance
+timetable_cache = TimetableSolutionCache(
+    max_entries=settings.TIMETABLE_CACHE_SIZE,
+    cache_dir=settings.TIMETABLE_CACHE_DIR,
+)
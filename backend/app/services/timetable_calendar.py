@@ -0,0 +1,280 @@
+import csv
+import datetime
+import io
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+from dateutil.rrule import rrulestr
+from sqlalchemy.orm import Session
+from app.models.academic import CalendarException, TimeSlot, WeekDay
+from app.services.occupancy import OccupancyIndex, occupancy_index
+from app.services.timetable_read import query_timetable_slots
+
+WEEKDAYS = [d.value for d in WeekDay]  # Monday first, matches date.weekday()
+
+# Slot fields needed to expand occurrences
+CALENDAR_FIELDS = (
+    "id", "semester", "section", "course_id", "course_code", "course_name", "faculty_id", "room_name",
+    "building", "time_slot_id", "day", "start_time", "end_time", "start_date", "end_date", "recurrence_rule",
+)
+
+# Recurrence rules without a start_date are anchored here (a Monday)
+RULE_ANCHOR = datetime.date(2000, 1, 3)
+
+# (kind, value) identifying whose classes are expanded: ("section", (semester, section, department or None)),
+# ("faculty", faculty_id), ("room", room_name) or ("courses", (tuple of course ids, section or None))
+Scope = Tuple[str, Any]
+
+
+def week_start(day: datetime.date) -> datetime.date:
+    return day - datetime.timedelta(days=day.weekday())
+
+
+class _ExpandableSlot:
+    """A timetable slot with its recurrence prepared for per-week expansion."""
+
+    def __init__(self, row: Dict[str, Any], period: Optional[int]):
+        self.row = row
+        self.period = period
+        self.weekday = WEEKDAYS.index(row["day"])
+        self.start = row["start_time"]
+        self.end = row["end_time"]
+        if self.end <= self.start:
+            self.end = self.start.replace(hour=min(self.start.hour + 1, 23))
+        rule = (row.get("recurrence_rule") or "").strip()
+        self.rule = None
+        if rule and rule.upper() not in ("FREQ=WEEKLY", "RRULE:FREQ=WEEKLY"):
+            first = row["start_date"] or RULE_ANCHOR
+            first += datetime.timedelta(days=(self.weekday - first.weekday()) % 7)
+            try:
+                self.rule = rrulestr(rule, dtstart=datetime.datetime.combine(first, self.start))
+            except (ValueError, TypeError) as e:
+                print(f"WARNING: Ignoring invalid recurrence rule {rule!r} of timetable slot {row['id']}: {e}")
+
+    def dates_in_week(self, monday: datetime.date) -> List[datetime.date]:
+        day = monday + datetime.timedelta(days=self.weekday)
+        if self.row["start_date"] and day < self.row["start_date"]:
+            return []
+        if self.row["end_date"] and day > self.row["end_date"]:
+            return []
+        if self.rule is None:
+            return [day]  # plain weekly repetition on the slot's weekday
+        start = datetime.datetime.combine(monday, datetime.time.min)
+        end = start + datetime.timedelta(days=7) - datetime.timedelta(microseconds=1)
+        return [dt.date() for dt in self.rule.between(start, end, inc=True)]
+
+
+class TimetableCalendar:
+    """
+    Expands recurring timetable slots into concrete occurrences.
+
+    Expansion is lazy and week by week: occurrences(...) is a generator, so an
+    export over a semester never holds more than one week in memory. Each
+    (scope, week) expansion is memoized in an LRU and tagged with the schedule
+    change marker, read through the occupancy index's ensure_loaded(). Every
+    commit touching courses, rooms, time slots, timetable slots or calendar
+    exceptions bumps it, in any worker process, so stale weeks are recomputed
+    instead of served. The slots loaded per scope are kept in a second,
+    smaller LRU.
+    """
+
+    def __init__(self, index: OccupancyIndex, max_weeks: int = 4096, max_scopes: int = 1024):
+        self.index = index
+        self.max_weeks = max_weeks
+        self.max_scopes = max_scopes
+        self.lock = threading.Lock()
+        self.weeks: "OrderedDict[Tuple[Scope, datetime.date], Tuple[int, List[Dict[str, Any]]]]" = OrderedDict()
+        self.scopes: "OrderedDict[Scope, Tuple[int, List[_ExpandableSlot]]]" = OrderedDict()
+        self._exceptions: Optional[Tuple[int, Dict[datetime.date, List[Any]]]] = None
+
+    def version(self, db: Session) -> int:
+        """The schedule change marker, after bringing the occupancy index up to date."""
+        return self.index.ensure_loaded(db).schedule_version
+
+    # -- cached inputs ---------------------------------------------------------
+
+    def _load_slots(self, db: Session, scope: Scope, version: int) -> List[_ExpandableSlot]:
+        with self.lock:
+            cached = self.scopes.get(scope)
+            if cached is not None and cached[0] == version:
+                self.scopes.move_to_end(scope)
+                return cached[1]
+
+        kind, value = scope
+        filters: Dict[str, Any] = {}
+        if kind == "section":
+            filters["semester"], filters["section"], filters["department"] = value
+        elif kind == "faculty":
+            filters["faculty_id"] = value
+        elif kind == "room":
+            filters["room"] = value
+        elif kind == "courses":
+            course_ids, filters["section"] = value
+            filters["course_ids"] = list(course_ids)
+        else:
+            raise ValueError(f"Unknown calendar scope '{kind}'")
+        rows = query_timetable_slots(db, CALENDAR_FIELDS, limit=None, is_active=True, **filters)["items"]
+
+        # Period = 1-based position of the slot's start among that weekday's periods
+        grid = db.query(TimeSlot.day, TimeSlot.start_time).filter(TimeSlot.is_break != True).all()
+        periods: Dict[str, List[datetime.time]] = {}
+        for day, start in grid:
+            periods.setdefault(day.value, []).append(start)
+        for starts in periods.values():
+            starts.sort()
+
+        slots = []
+        for row in rows:
+            starts = periods.get(row["day"], [])
+            start = row["start_time"]
+            slots.append(_ExpandableSlot(row, starts.index(start) + 1 if start in starts else None))
+        with self.lock:
+            self.scopes[scope] = (version, slots)
+            self.scopes.move_to_end(scope)
+            while len(self.scopes) > self.max_scopes:
+                self.scopes.popitem(last=False)
+        return slots
+
+    def _load_exceptions(self, db: Session, version: int) -> Dict[datetime.date, List[Any]]:
+        cached = self._exceptions
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        by_date: Dict[datetime.date, List[Any]] = {}
+        for exc in db.query(CalendarException.date, CalendarException.semester, CalendarException.section,
+                            CalendarException.timetable_slot_id, CalendarException.reason):
+            by_date.setdefault(exc.date, []).append(exc)
+        self._exceptions = (version, by_date)
+        return by_date
+
+    @staticmethod
+    def _cancelled(row: Dict[str, Any], exceptions: List[Any]) -> Optional[str]:
+        for exc in exceptions:
+            if exc.semester is not None and exc.semester != row["semester"]:
+                continue
+            if exc.section is not None and exc.section != row["section"]:
+                continue
+            if exc.timetable_slot_id is not None and exc.timetable_slot_id != row["id"]:
+                continue
+            return exc.reason or "cancelled"
+        return None
+
+    # -- expansion -------------------------------------------------------------
+
+    def week(self, db: Session, scope: Scope, monday: datetime.date) -> List[Dict[str, Any]]:
+        """All occurrences of a scope in the week starting on `monday`, sorted by start."""
+        key = (scope, monday)
+        version = self.version(db)
+        with self.lock:
+            cached = self.weeks.get(key)
+            if cached is not None and cached[0] == version:
+                self.weeks.move_to_end(key)
+                return cached[1]
+
+        exceptions = self._load_exceptions(db, version)
+        occurrences = []
+        for slot in self._load_slots(db, scope, version):
+            for day in slot.dates_in_week(monday):
+                if self._cancelled(slot.row, exceptions.get(day, ())):
+                    continue
+                row = slot.row
+                occurrences.append({
+                    "timetable_slot_id": row["id"],
+                    "date": day,
+                    "start": datetime.datetime.combine(day, slot.start),
+                    "end": datetime.datetime.combine(day, slot.end),
+                    "period": slot.period,
+                    "course_id": row["course_id"],
+                    "course_code": row["course_code"],
+                    "course_name": row["course_name"],
+                    "faculty_id": row["faculty_id"],
+                    "room_name": row["room_name"],
+                    "building": row["building"],
+                    "semester": row["semester"],
+                    "section": row["section"],
+                })
+        occurrences.sort(key=lambda o: (o["start"], o["timetable_slot_id"]))
+
+        with self.lock:
+            self.weeks[key] = (version, occurrences)
+            self.weeks.move_to_end(key)
+            while len(self.weeks) > self.max_weeks:
+                self.weeks.popitem(last=False)
+        return occurrences
+
+    def occurrences(self, db: Session, scope: Scope, start: datetime.date,
+                    end: datetime.date) -> Iterator[Dict[str, Any]]:
+        """Lazily yield occurrences with start <= date <= end, in chronological order."""
+        monday = week_start(start)
+        while monday <= end:
+            for occ in self.week(db, scope, monday):
+                if start <= occ["date"] <= end:
+                    yield occ
+            monday += datetime.timedelta(days=7)
+
+
+# -- exports ----------------------------------------------------------------
+
+CSV_COLUMNS = ("date", "start", "end", "period", "course_code", "course_name", "section", "semester",
+               "room_name", "building", "faculty_id", "timetable_slot_id")
+
+
+def iter_csv(occurrences: Iterator[Dict[str, Any]]) -> Iterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for occ in occurrences:
+        writer.writerow([
+            occ[c].strftime("%H:%M") if c in ("start", "end") else occ[c] for c in CSV_COLUMNS
+        ])
+        if buffer.tell() > 8192:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _ics_escape(value: Any) -> str:
+    text = "" if value is None else str(value)
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
+
+
+def _ics_fold(line: str) -> str:
+    """Fold content lines at 75 octets as RFC 5545 requires."""
+    data = line.encode("utf-8")
+    if len(data) <= 75:
+        return line + "\r\n"
+    parts, chunk = [], b""
+    for ch in line:
+        encoded = ch.encode("utf-8")
+        if len(chunk) + len(encoded) > (75 if not parts else 74):
+            parts.append(chunk.decode("utf-8"))
+            chunk = b""
+        chunk += encoded
+    parts.append(chunk.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def iter_ics(occurrences: Iterator[Dict[str, Any]], name: str) -> Iterator[str]:
+    stamp = datetime.datetime.utcnow().strftime("%Y%m%dT%H%M%SZ")
+    yield "".join(_ics_fold(line) for line in (
+        "BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//SmartCampus360//Timetable//EN",
+        "CALSCALE:GREGORIAN", f"X-WR-CALNAME:{_ics_escape(name)}",
+    ))
+    for occ in occurrences:
+        yield "".join(_ics_fold(line) for line in (
+            "BEGIN:VEVENT",
+            f"UID:{occ['timetable_slot_id']}-{occ['date'].strftime('%Y%m%d')}@smartcampus360",
+            f"DTSTAMP:{stamp}",
+            f"DTSTART:{occ['start'].strftime('%Y%m%dT%H%M%S')}",
+            f"DTEND:{occ['end'].strftime('%Y%m%dT%H%M%S')}",
+            f"SUMMARY:{_ics_escape(occ['course_code'])} - {_ics_escape(occ['course_name'])}",
+            f"LOCATION:{_ics_escape(occ['room_name'])}",
+            f"DESCRIPTION:Semester {occ['semester']} Section {_ics_escape(occ['section'])}"
+            f" Period {occ['period'] or '-'}",
+            "END:VEVENT",
+        ))
+    yield "END:VCALENDAR\r\n"
+
+
+# Singleton instance
+timetable_calendar = TimetableCalendar(occupancy_index)
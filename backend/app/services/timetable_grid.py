@@ -0,0 +1,25 @@
+import datetime
+from typing import Dict
+
+# Period labels of the frontend's weekly grid ("Day-HH:MM" slot keys, DEFAULT_TIMES).
+# The afternoon labels are written in 12-hour form; time slots store 24-hour times.
+PERIOD_LABEL_TIMES: Dict[str, datetime.time] = {
+    "09:40": datetime.time(9, 40),
+    "10:40": datetime.time(10, 40),
+    "11:40": datetime.time(11, 40),
+    "01:20": datetime.time(13, 20),
+    "02:20": datetime.time(14, 20),
+    "03:20": datetime.time(15, 20),
+}
+_LABELS_BY_TIME = {t: label for label, t in PERIOD_LABEL_TIMES.items()}
+
+
+def parse_period(label: str) -> datetime.time:
+    """24-hour start time of a grid label; anything else is read as 24-hour HH:MM."""
+    t = PERIOD_LABEL_TIMES.get(label)
+    return t if t is not None else datetime.datetime.strptime(label, "%H:%M").time()
+
+
+def period_label(start: datetime.time) -> str:
+    """The grid label of a stored start time (inverse of parse_period)."""
+    return _LABELS_BY_TIME.get(start.replace(second=0, microsecond=0), start.strftime("%H:%M"))
@@ -0,0 +1,191 @@
+from typing import List, Dict, Any, Optional, Set, Tuple
+from ortools.sat.python import cp_model
+from sqlalchemy.orm import Session
+from app.models.academic import TimetableSlot, Course, Room, TimeSlot
+from app.services.timetable_grid import period_label
+from app.services.timetable_opt import TimetableSolver
+
+# (course_code, slot_id, room_name), slot_id being "Day-HH:MM" as used by /generate
+Assignment = Tuple[str, str, str]
+
+
+def slot_key(time_slot: TimeSlot) -> str:
+    return f"{time_slot.day.value}-{period_label(time_slot.start_time)}"
+
+
+def load_saved_assignments(db: Session, semester: int, section: str) -> Set[Assignment]:
+    """Return the saved timetable for a semester/section as solver assignments."""
+    rows = db.query(Course.code, Room.name, TimeSlot).join(
+        TimetableSlot, TimetableSlot.course_id == Course.id
+    ).join(
+        Room, TimetableSlot.room_id == Room.id
+    ).join(
+        TimeSlot, TimetableSlot.time_slot_id == TimeSlot.id
+    ).filter(
+        TimetableSlot.semester == semester,
+        TimetableSlot.section == section,
+        TimetableSlot.is_active == True
+    ).all()
+    return {(code, slot_key(ts), room) for code, room, ts in rows}
+
+
+def load_other_bookings(db: Session, semester: int, section: str) -> Tuple[Set[Tuple[str, str]], Set[Tuple[str, Any]]]:
+    """
+    Rooms and faculty taken by every other section's saved timetable, as
+    ({(slot_id, room_name)}, {(slot_id, faculty_id)}). An incremental re-solve
+    of one section must leave these untouched.
+    """
+    rows = db.query(Room.name, Course.instructor_id, TimeSlot).join(
+        TimetableSlot, TimetableSlot.room_id == Room.id
+    ).join(
+        Course, TimetableSlot.course_id == Course.id
+    ).join(
+        TimeSlot, TimetableSlot.time_slot_id == TimeSlot.id
+    ).filter(
+        TimetableSlot.is_active == True,
+        ~((TimetableSlot.semester == semester) & (TimetableSlot.section == section)),
+    ).all()
+    rooms, faculty = set(), set()
+    for room, instructor_id, ts in rows:
+        rooms.add((slot_key(ts), room))
+        if instructor_id is not None:
+            faculty.add((slot_key(ts), instructor_id))
+    return rooms, faculty
+
+
+def section_courses(courses: List[Any], semester: int, department: Optional[str],
+                    saved: Set[Assignment]) -> List[Any]:
+    """
+    The courses a section re-solve may place: those of its semester (and
+    department, when courses carry one) plus any already in its saved timetable.
+    """
+    saved_codes = {code for code, _, _ in saved}
+    selected = []
+    for c in courses:
+        course_semester = getattr(c, 'semester', getattr(c, 'sem', None))
+        course_department = getattr(c, 'department', None)
+        if c.code in saved_codes or (
+            course_semester == semester and (department is None or course_department in (None, department))
+        ):
+            selected.append(c)
+    return selected
+
+
+def build_neighbourhood(saved: Set[Assignment], courses: List[Any], rooms: List[Any], radius: int = 1) -> Set[str]:
+    """
+    Courses that are allowed to move in an incremental re-solve.
+
+    The change itself seeds the neighbourhood: new courses, courses whose credits
+    changed and courses that lost a saved room. It then grows `radius` hops over
+    courses competing for the same faculty member or room.
+    """
+    course_codes = {c.code for c in courses}
+    room_names = {r.name for r in rooms}
+    credits = {c.code: int(getattr(c, 'credits', 3)) for c in courses}
+    faculty = {c.code: getattr(c, 'instructor_id', 'Unknown') for c in courses}
+
+    saved_count: Dict[str, int] = {}
+    saved_rooms: Dict[str, Set[str]] = {}
+    for code, _, room in saved:
+        saved_count[code] = saved_count.get(code, 0) + 1
+        saved_rooms.setdefault(code, set()).add(room)
+
+    seeds = set()
+    for code in course_codes:
+        if saved_count.get(code, 0) != credits[code]:
+            seeds.add(code)
+        elif saved_rooms.get(code, set()) - room_names:
+            seeds.add(code)
+
+    # Competition graph: same faculty or same saved room
+    by_faculty: Dict[Any, Set[str]] = {}
+    for code in course_codes:
+        by_faculty.setdefault(faculty[code], set()).add(code)
+    by_room: Dict[str, Set[str]] = {}
+    for code, _, room in saved:
+        if code in course_codes:
+            by_room.setdefault(room, set()).add(code)
+
+    free = set(seeds)
+    frontier = set(seeds)
+    for _ in range(max(radius, 0)):
+        nxt = set()
+        for code in frontier:
+            nxt |= by_faculty.get(faculty[code], set())
+            for room in saved_rooms.get(code, set()):
+                nxt |= by_room.get(room, set())
+        frontier = nxt - free
+        free |= frontier
+        if not frontier:
+            break
+    return free
+
+
+def diff_assignments(saved: Set[Assignment], new: Set[Assignment]) -> Dict[str, int]:
+    return {
+        "kept": len(saved & new),
+        "removed": len(saved - new),
+        "added": len(new - saved),
+        "changed": len(saved ^ new),
+    }
+
+
+class IncrementalTimetableSolver(TimetableSolver):
+    """
+    Re-solves a saved timetable after a small edit.
+
+    Only the section's own courses are in the model; every other section
+    stays where it is, its rooms passed in as blocked (slot, room) pairs and
+    its faculty as busy (slot, faculty) pairs. Saved assignments are passed to
+    CP-SAT as solution hints. Courses outside the neighbourhood keep their
+    saved sessions (LNS-style fixing), and inside it the objective maximises
+    how many saved sessions are kept.
+    """
+
+    def __init__(self, courses: List[Any], rooms: List[Any], slots: List[Any],
+                 saved: Set[Assignment], free_courses: Optional[Set[str]] = None,
+                 blocked: Optional[Set[Tuple[str, str]]] = None,
+                 busy_faculty: Optional[Set[Tuple[str, Any]]] = None):
+        super().__init__(courses, rooms, slots, blocked=blocked, busy_faculty=busy_faculty)
+        self.saved = saved
+        # None = every course of the section may move (hints and stability objective only)
+        self.free_courses = free_courses
+
+    @property
+    def model_kind(self) -> str:
+        return "incremental"
+
+    def _build(self, data: Dict[str, Any]):
+        model, x, room_classes = super()._build(data)
+
+        kept = []
+        for key in self.saved:
+            var = x.get(key)
+            if var is None:
+                continue  # course or room no longer exists / no longer compatible
+            model.AddHint(var, 1)
+            if self.free_courses is not None and key[0] not in self.free_courses:
+                model.Add(var == 1)
+            else:
+                kept.append(var)
+        if kept:
+            model.Maximize(cp_model.LinearExpr.Sum(kept))
+        return model, x, room_classes
+
+    def _fixed_count(self) -> int:
+        if self.free_courses is None:
+            return 0
+        return sum(1 for c in self.courses if c.code not in self.free_courses)
+
+    def solve(self, time_limit: Optional[float] = None, num_workers: Optional[int] = None,
+              callback=None) -> List[Dict]:
+        fixed = self._fixed_count()
+        schedule = super().solve(time_limit, num_workers, callback)
+        self.stats["fixed_courses"] = fixed
+        if not schedule and self.free_courses is not None and not self._cancelled:
+            # The neighbourhood was too small; retry with everything free but hinted
+            self.free_courses = None
+            schedule = super().solve(time_limit, num_workers, callback)
+            self.stats["fixed_courses"] = 0
+            self.stats["neighbourhood_fallback"] = True
+        return schedule
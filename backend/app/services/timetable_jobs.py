@@ -0,0 +1,208 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, AsyncIterator
+from app.core.config import settings
+from app.services.timetable_opt import SolveProgressCallback
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+FINISHED_STATES = (JOB_COMPLETED, JOB_FAILED, JOB_CANCELLED)
+
+
+class TimetableJob:
+    """One background timetable generation. Mutated only by its worker thread and cancel()."""
+
+    def __init__(self, solver, time_limit: float, num_workers: int, params: Dict[str, Any]):
+        self.id = uuid.uuid4().hex
+        self.solver = solver
+        self.time_limit = time_limit
+        self.num_workers = num_workers
+        self.params = params
+        self.status = JOB_QUEUED
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.progress = SolveProgressCallback(capture_solutions=True)
+        self.result: Optional[List[Dict]] = None
+        self.error: Optional[str] = None
+        self.cancel_requested = False
+        # Set by accept(): stop early but keep the best solution as the result
+        self.accept_requested = False
+
+    def elapsed(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.time()) - self.started_at
+
+    def to_status(self) -> Dict[str, Any]:
+        # Progress is time based until the solve finishes; with an objective,
+        # best_objective against best_bound shows how much is left to gain.
+        if self.status in FINISHED_STATES:
+            progress = 1.0
+        elif self.status == JOB_RUNNING and self.time_limit:
+            progress = min(self.elapsed() / self.time_limit, 0.99)
+        else:
+            progress = 0.0
+        return {
+            "job_id": self.id,
+            "status": self.status,
+            "progress": round(progress, 3),
+            "elapsed_seconds": round(self.elapsed(), 3),
+            "solution_count": self.progress.solution_count,
+            "best_objective": self.progress.best_objective,
+            "best_bound": self.progress.best_bound,
+            "solver_stats": self.solver.stats,
+            "params": self.params,
+            "error": self.error,
+        }
+
+
+class TimetableJobManager:
+    """
+    Runs timetable solves in a bounded thread pool so long searches never hold
+    an HTTP worker. Finished jobs are kept (up to max_finished) for polling.
+    """
+
+    def __init__(self, max_workers: int, queue_limit: int, max_finished: int = 100):
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="timetable-job")
+        self.queue_limit = queue_limit
+        self.max_finished = max_finished
+        self.jobs: Dict[str, TimetableJob] = {}
+        self.lock = threading.Lock()
+
+    def active_count(self) -> int:
+        return sum(1 for j in self.jobs.values() if j.status not in FINISHED_STATES)
+
+    def submit(self, solver, params: Optional[Dict[str, Any]] = None,
+               time_limit: Optional[float] = None, num_workers: Optional[int] = None) -> TimetableJob:
+        """Queue a solver; raises RuntimeError when the queue is full."""
+        job = TimetableJob(
+            solver,
+            time_limit or settings.TIMETABLE_MAX_SOLVE_SECONDS,
+            num_workers or settings.TIMETABLE_SEARCH_WORKERS,
+            params or {},
+        )
+        with self.lock:
+            if self.active_count() >= self.queue_limit:
+                raise RuntimeError("Too many timetable jobs in progress. Try again later.")
+            self._evict_finished()
+            self.jobs[job.id] = job
+        self.pool.submit(self._run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[TimetableJob]:
+        return self.jobs.get(job_id)
+
+    def cancel(self, job_id: str) -> Optional[TimetableJob]:
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        job.cancel_requested = True
+        job.solver.cancel()
+        with self.lock:
+            if job.status == JOB_QUEUED:
+                job.status = JOB_CANCELLED
+                job.finished_at = time.time()
+        return job
+
+    def accept(self, job_id: str) -> Optional[TimetableJob]:
+        """
+        Stop a running search and keep its best solution as the job result.
+        Raises ValueError if no solution has been found yet.
+        """
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return job
+        if job.progress.solution_count == 0:
+            raise ValueError("No solution has been found yet")
+        job.accept_requested = True
+        job.solver.cancel()
+        return job
+
+    def _run(self, job: TimetableJob) -> None:
+        with self.lock:
+            if job.status == JOB_CANCELLED:
+                return
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+        try:
+            job.result = job.solver.solve(
+                time_limit=job.time_limit, num_workers=job.num_workers, callback=job.progress
+            )
+            if job.accept_requested and job.result:
+                job.status = JOB_COMPLETED
+            elif job.cancel_requested:
+                job.status = JOB_CANCELLED
+            elif job.result:
+                job.status = JOB_COMPLETED
+            else:
+                job.status = JOB_FAILED
+                job.error = "Could not find a feasible solution. Try adding more rooms or reducing courses."
+        except Exception as e:
+            print(f"ERROR in timetable job {job.id}: {e}")
+            job.status = JOB_FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+
+    def _evict_finished(self) -> None:
+        finished = sorted(
+            (j for j in self.jobs.values() if j.status in FINISHED_STATES),
+            key=lambda j: j.finished_at or 0,
+        )
+        for job in finished[: max(0, len(finished) - self.max_finished + 1)]:
+            del self.jobs[job.id]
+
+
+def format_sse(event: str, data: Dict[str, Any]) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+async def job_events(job: TimetableJob, poll_seconds: float = 0.25,
+                     keepalive_seconds: float = 15.0) -> AsyncIterator[str]:
+    """
+    Server-Sent Events for a job: a "solution" event for every improving
+    solution, then one "done" event with the final status and result. A slow
+    client only ever receives the latest solution; intermediate ones it missed
+    are skipped rather than queued.
+    """
+    yield format_sse("job", {"job_id": job.id, "status": job.status})
+    sent = 0
+    last_write = time.monotonic()
+    while True:
+        finished = job.status in FINISHED_STATES
+        progress = job.progress
+        count, schedule = progress.solution_count, progress.last_schedule
+        if count > sent and schedule is not None:
+            sent = count
+            last_write = time.monotonic()
+            yield format_sse("solution", {
+                "job_id": job.id,
+                "solution": count,
+                "objective": progress.best_objective,
+                "best_bound": progress.best_bound,
+                "elapsed_seconds": round(progress.elapsed_seconds, 3),
+                "schedule": schedule,
+            })
+        if finished:
+            yield format_sse("done", dict(job.to_status(), schedule=job.result or []))
+            return
+        if time.monotonic() - last_write >= keepalive_seconds:
+            last_write = time.monotonic()
+            yield ": keepalive\n\n"
+        await asyncio.sleep(poll_seconds)
+
+
+# Singleton instance
+timetable_jobs = TimetableJobManager(
+    max_workers=settings.TIMETABLE_JOB_WORKERS,
+    queue_limit=settings.TIMETABLE_JOB_QUEUE_LIMIT,
+)
@@ -1,37 +1,578 @@
+import time
+import numpy as np
 from ortools.sat.python import cp_model
-from typing import List, Dict, Any
-from app.ai_models.model_timetable_ortools import build_timetable_csp
+from typing import List, Dict, Any, Optional, Set, Tuple
+from app.ai_models.model_timetable_ortools import (
+    build_timetable_csp_sparse,
+    build_timetable_csp_room_classes,
+    group_room_classes,
+    assign_rooms_from_classes,
+    compatible_rooms,
+    build_slot_assignment_csp,
+    match_rooms_for_slot,
+)
+from app.services.solver_snapshots import save_snapshot
+from app.services.solver_tuning import apply_tuned_profile
+
+# Solver modes
+MODE_ROOMS = "rooms"  # one variable per compatible concrete room
+MODE_ROOM_CLASSES = "room_classes"  # interchangeable rooms grouped, rooms matched after solve
+SOLVER_MODES = (MODE_ROOMS, MODE_ROOM_CLASSES)
+
+# Engines selectable from /timetable/generate
+ENGINE_MONOLITHIC = "monolithic"  # TimetableSolver: rooms inside the CP-SAT model
+ENGINE_DECOMPOSED = "decomposed"  # DecomposedTimetableSolver: slots first, rooms matched per slot
+ENGINES = (ENGINE_MONOLITHIC, ENGINE_DECOMPOSED)
+
+# Soft objectives: without one CP-SAT stops at the first feasible timetable
+OBJECTIVE_NONE = "none"
+OBJECTIVE_DAY_SPREAD = "day_spread"  # minimise a course's extra sessions on the same day
+OBJECTIVES = (OBJECTIVE_NONE, OBJECTIVE_DAY_SPREAD)
+
+
+class SolveProgressCallback(cp_model.CpSolverSolutionCallback):
+    """
+    Records live progress of a CP-SAT search: solution count, best objective,
+    best bound and wall time. An optional on_solution hook is called with the
+    callback itself after each improving solution.
+
+    With capture_solutions=True each improving solution is also decoded into
+    last_schedule (same shape as TimetableSolver.solve()), once the solver has
+    registered its decision variables through watch().
+    """
+
+    def __init__(self, on_solution=None, capture_solutions: bool = False):
+        super().__init__()
+        self.on_solution = on_solution
+        self.capture_solutions = capture_solutions
+        self.solution_count = 0
+        self.best_objective: Optional[float] = None
+        self.best_bound: Optional[float] = None
+        self.elapsed_seconds = 0.0
+        self.last_schedule: Optional[List[Dict]] = None
+        self._x: Optional[Dict[Any, Any]] = None
+        self._room_classes = None
+        self._has_objective = False
+
+    def watch(self, x: Optional[Dict[Any, Any]], room_classes=None, has_objective: bool = False) -> None:
+        """
+        Register the decision variables of the model about to be solved.
+        Objective and bound are only reported when the model has an objective.
+        """
+        self._x = x
+        self._room_classes = room_classes
+        self._has_objective = has_objective
+
+    def OnSolutionCallback(self):
+        # The schedule is published before the count so pollers never pair a
+        # new count with the previous schedule
+        if self.capture_solutions and self._x is not None:
+            assignments = select_assignments(self.Response().solution, self._x)
+            self.last_schedule = to_schedule(assignments, self._room_classes)
+        self.solution_count += 1
+        if self._has_objective:
+            self.best_objective = self.ObjectiveValue()
+            self.best_bound = self.BestObjectiveBound()
+        self.elapsed_seconds = self.WallTime()
+        if self.on_solution is not None:
+            self.on_solution(self)
+
+
+def configure_solver(solver: cp_model.CpSolver, time_limit: Optional[float] = None,
+                     num_workers: Optional[int] = None) -> None:
+    """Apply the time limit / worker count shared by all timetable solves."""
+    if time_limit:
+        solver.parameters.max_time_in_seconds = float(time_limit)
+    if num_workers:
+        solver.parameters.num_workers = int(num_workers)
+
+
+def select_assignments(solution, x: Dict[Any, Any]) -> List[Any]:
+    """
+    Return the keys of x whose BoolVar is 1 in a response's solution values.
+    Gathers all values in one numpy operation instead of calling Value() once
+    per variable.
+    """
+    if not x:
+        return []
+    keys = list(x.keys())
+    index = np.fromiter((v.Index() for v in x.values()), dtype=np.int64, count=len(keys))
+    values = np.asarray(solution, dtype=np.int64)
+    chosen = np.flatnonzero(values[index] == 1)
+    return [keys[i] for i in chosen]
+
+
+def read_assignments(solver: cp_model.CpSolver, x: Dict[Any, Any]) -> List[Any]:
+    """Return the keys of x whose BoolVar is 1 in the solver's last solution."""
+    return select_assignments(solver.ResponseProto().solution, x)
+
+
+def slot_day(slot_id: Any) -> str:
+    """Day part of a slot id: "Monday-09:40" -> "Monday", "Mon_1" -> "Mon", "d0-p3" -> "d0"."""
+    text = str(slot_id)
+    for sep in ("-", "_"):
+        if sep in text:
+            return text.split(sep, 1)[0]
+    return text
+
+
+def add_day_spread_objective(model: cp_model.CpModel, x: Dict[Any, Any], course_credits: Dict[Any, int]) -> None:
+    """
+    Minimise, over all courses and days, the sessions a course has beyond the
+    first on the same day. x is keyed (course, slot, ...), so this works for
+    the room, room-class and slot-only models alike.
+    """
+    by_day: Dict[Tuple[Any, str], List[Any]] = {}
+    for key, var in x.items():
+        by_day.setdefault((key[0], slot_day(key[1])), []).append(var)
+    extra = []
+    for (c, day), day_vars in by_day.items():
+        most = min(len(day_vars), course_credits.get(c, 3))
+        if most < 2:
+            continue
+        excess = model.NewIntVar(0, most - 1, f"extra_{c}_{day}")
+        model.Add(excess >= sum(day_vars) - 1)
+        extra.append(excess)
+    model.Minimize(sum(extra))
+
+
+def to_schedule(assignments: List[Any], room_classes=None) -> List[Dict]:
+    """(course, slot, room-or-class) assignments -> the /generate response shape."""
+    if room_classes is not None:
+        assignments = assign_rooms_from_classes(assignments, room_classes)
+    return [
+        {"course_code": c_id, "room_name": r_id, "slot_id": t_id}
+        for c_id, t_id, r_id in assignments
+    ]
+
 
 class TimetableSolver:
-    def __init__(self, courses: List[Any], rooms: List[Any], slots: List[Any]):
+    def __init__(self, courses: List[Any], rooms: List[Any], slots: List[Any], mode: str = MODE_ROOMS,
+                 blocked: Optional[Set[Tuple[Any, str]]] = None, snapshot_dir: Optional[str] = None,
+                 objective: str = OBJECTIVE_NONE, busy_faculty: Optional[Set[Tuple[Any, Any]]] = None):
+        """
+        blocked: optional set of (slot_id, room_name) pairs the solver must not use,
+            e.g. shared rooms reserved by another department. Only supported in
+            MODE_ROOMS, where rooms are modelled individually.
+        busy_faculty: optional set of (slot_id, instructor_id) pairs in which that
+            instructor already teaches elsewhere; their courses avoid those slots.
+        snapshot_dir: if set, every CP-SAT model is saved there with its solver
+            parameters and inputs before solving (see benchmarks.replay)
+        objective: OBJECTIVE_NONE stops at the first feasible timetable;
+            OBJECTIVE_DAY_SPREAD keeps improving it until optimal or the time limit
+        """
+        if mode not in SOLVER_MODES:
+            raise ValueError(f"Unknown solver mode '{mode}'. Expected one of {SOLVER_MODES}")
+        if objective not in OBJECTIVES:
+            raise ValueError(f"Unknown objective '{objective}'. Expected one of {OBJECTIVES}")
+        if blocked and mode != MODE_ROOMS:
+            raise ValueError("Blocked rooms are only supported in the 'rooms' solver mode")
         self.courses = courses
         self.rooms = rooms
         self.slots = slots
-        
-    def solve(self) -> List[Dict]:
-        course_ids = [c.code for c in self.courses]
-        slot_ids = [s.id for s in self.slots]
-        room_ids = [r.name for r in self.rooms]
-        
-        faculty_map = {c.code: getattr(c, 'instructor_id', 'Unknown') for c in self.courses}
-        room_cap = {r.name: getattr(r, 'capacity', 60) for r in self.rooms}
-        batch_size = {c.code: getattr(c, 'batch_size', 40) for c in self.courses} # Default batch size
-        course_credits = {c.code: int(getattr(c, 'credits', 3)) for c in self.courses}
-
-        model, x = build_timetable_csp(
-            course_ids, slot_ids, room_ids, faculty_map, room_cap, batch_size, course_credits
-        )
-        
+        self.mode = mode
+        self.blocked = blocked or set()
+        self.busy_faculty = busy_faculty or set()
+        self.snapshot_dir = snapshot_dir
+        self.objective = objective
+        # Filled by solve(): model size and timings for the last run
+        self.stats: Dict[str, Any] = {}
+        self.snapshots: List[str] = []
+        self.solver_profile: Optional[str] = None
+        self._cp_solver: Optional[cp_model.CpSolver] = None
+        self._cancelled = False
+
+    @property
+    def model_kind(self) -> str:
+        """Which tuned solver profiles apply to this solver's models (see solver_tuning)."""
+        return self.mode
+
+    def cancel(self) -> None:
+        """Stop a running solve from another thread; the best solution so far is kept."""
+        self._cancelled = True
+        if self._cp_solver is not None:
+            self._cp_solver.StopSearch()
+
+    def _run_cp_solver(self, model: cp_model.CpModel, time_limit: Optional[float], num_workers: Optional[int],
+                       callback: Optional[SolveProgressCallback]):
         solver = cp_model.CpSolver()
-        status = solver.Solve(model)
-        
+        # Tuned parameters for this model kind and size first; a tuned worker
+        # count is kept but capped at the caller's, the time limit always applies.
+        profile = apply_tuned_profile(solver, model, self.model_kind, max_workers=num_workers)
+        if profile:
+            self.solver_profile = profile.get("name")
+            if "num_workers" in profile.get("params", {}):
+                num_workers = None
+        configure_solver(solver, time_limit, num_workers)
+        self._cp_solver = solver
+        if self.snapshot_dir:
+            try:
+                self.snapshots.append(save_snapshot(
+                    self.snapshot_dir, type(self).__name__, model, solver,
+                    metadata={"mode": self.mode, "model_kind": self.model_kind, "problem": self.problem_data(), "blocked": sorted(self.blocked)},
+                ))
+            except OSError as e:
+                print(f"WARNING: Could not write solver snapshot: {e}")
+        if self._cancelled:
+            return solver, cp_model.UNKNOWN
+        status = solver.Solve(model, callback) if callback is not None else solver.Solve(model)
+        return solver, status
+
+    def problem_data(self) -> Dict[str, Any]:
+        return {
+            "course_ids": [c.code for c in self.courses],
+            "slot_ids": [s.id for s in self.slots],
+            "room_ids": [r.name for r in self.rooms],
+            "faculty_map": {c.code: getattr(c, 'instructor_id', 'Unknown') for c in self.courses},
+            "room_cap": {r.name: getattr(r, 'capacity', 60) for r in self.rooms},
+            "batch_size": {c.code: getattr(c, 'batch_size', 40) for c in self.courses},  # Default batch size
+            "course_credits": {c.code: int(getattr(c, 'credits', 3)) for c in self.courses},
+            "room_type": {r.name: getattr(r, 'room_type', None) for r in self.rooms},
+            "course_room_type": {c.code: getattr(c, 'room_type', None) for c in self.courses},
+            "room_building": {r.name: getattr(r, 'building', None) for r in self.rooms},
+            "section_map": {c.code: getattr(c, 'section', None) for c in self.courses},
+        }
+
+    def _build(self, data: Dict[str, Any]):
+        """Build the model for the configured mode. Returns (model, decision vars, room_classes)."""
+        model, x, room_classes = self._build_mode(data)
+        if self.busy_faculty:
+            faculty = data["faculty_map"]
+            for (code, slot_id, _), var in x.items():
+                if (slot_id, faculty[code]) in self.busy_faculty:
+                    model.Add(var == 0)
+        return model, x, room_classes
+
+    def _build_mode(self, data: Dict[str, Any]):
+        if self.mode == MODE_ROOM_CLASSES:
+            room_classes = group_room_classes(
+                data["room_ids"], data["room_cap"], data["room_type"], data["room_building"]
+            )
+            model, z, _ = build_timetable_csp_room_classes(
+                data["course_ids"], data["slot_ids"], room_classes, data["faculty_map"],
+                data["batch_size"], data["course_credits"], course_room_type=data["course_room_type"],
+                section_map=data["section_map"],
+            )
+            if self.objective == OBJECTIVE_DAY_SPREAD:
+                add_day_spread_objective(model, z, data["course_credits"])
+            return model, z, room_classes
+
+        model, x, _ = build_timetable_csp_sparse(
+            data["course_ids"], data["slot_ids"], data["room_ids"], data["faculty_map"],
+            data["room_cap"], data["batch_size"], data["course_credits"],
+            room_type=data["room_type"], course_room_type=data["course_room_type"],
+            section_map=data["section_map"], blocked=self.blocked,
+        )
+        if self.objective == OBJECTIVE_DAY_SPREAD:
+            add_day_spread_objective(model, x, data["course_credits"])
+        return model, x, None
+
+    def build_model(self) -> cp_model.CpModel:
+        """Build the CP-SAT model without solving it (used for parameter tuning)."""
+        return self._build(self.problem_data())[0]
+
+    def solve(self, time_limit: Optional[float] = None, num_workers: Optional[int] = None,
+              callback: Optional[SolveProgressCallback] = None) -> List[Dict]:
+        data = self.problem_data()
+
+        build_start = time.perf_counter()
+        model, x, room_classes = self._build(data)
+        build_ms = (time.perf_counter() - build_start) * 1000
+
+        if callback is not None:
+            callback.watch(x, room_classes, has_objective=model.HasObjective())
+        solve_start = time.perf_counter()
+        solver, status = self._run_cp_solver(model, time_limit, num_workers, callback)
+        solve_ms = (time.perf_counter() - solve_start) * 1000
+
+        proto = model.Proto()
+        self.stats = {
+            "mode": self.mode,
+            "status": solver.StatusName(status),
+            "model_build_ms": round(build_ms, 2),
+            "solve_ms": round(solve_ms, 2),
+            "num_variables": len(proto.variables),
+            "num_constraints": len(proto.constraints),
+        }
+        if room_classes is not None:
+            self.stats["num_room_classes"] = len(room_classes)
+        if self.snapshots:
+            self.stats["snapshots"] = list(self.snapshots)
+        if self.solver_profile:
+            self.stats["solver_profile"] = self.solver_profile
+        self._objective_stats(model, solver, status)
+
         schedule = []
         if status == cp_model.OPTIMAL or status == cp_model.FEASIBLE:
-            for (c_id, t_id, r_id), var in x.items():
-                if solver.Value(var) == 1:
-                    schedule.append({
-                        "course_code": c_id,
-                        "room_name": r_id,
-                        "slot_id": t_id
-                    })
+            schedule = to_schedule(read_assignments(solver, x), room_classes)
         return schedule
+
+    def _objective_stats(self, model: cp_model.CpModel, solver: cp_model.CpSolver, status) -> None:
+        if not model.HasObjective():
+            return
+        self.stats["objective"] = self.objective
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.stats["objective_value"] = solver.ObjectiveValue()
+            self.stats["best_bound"] = solver.BestObjectiveBound()
+
+
+class DecomposedTimetableSolver(TimetableSolver):
+    """
+    Two-stage alternative to TimetableSolver.
+
+    Stage one solves course -> timeslot with CP-SAT (credits, faculty conflicts,
+    per-slot room-count capacity). Stage two matches rooms for each slot
+    independently. When a slot has no valid matching, only the courses placed in
+    that slot are re-solved; everything else stays fixed.
+    """
+
+    def __init__(self, courses: List[Any], rooms: List[Any], slots: List[Any],
+                 max_repairs: int = 5, snapshot_dir: Optional[str] = None, objective: str = OBJECTIVE_NONE):
+        super().__init__(courses, rooms, slots, snapshot_dir=snapshot_dir, objective=objective)
+        self.max_repairs = max_repairs
+
+    @property
+    def model_kind(self) -> str:
+        return "decomposed"
+
+    def _match_slots(self, by_slot: Dict[Any, List[Any]], compat, room_cap) -> Dict[Any, Any]:
+        """
+        Run the per-slot matchings. They run serially: the matching is pure
+        Python, so threads would only add overhead under the GIL.
+        """
+        return {t: match_rooms_for_slot(by_slot[t], compat, room_cap) for t in by_slot}
+
+    def solve(self, time_limit: Optional[float] = None, num_workers: Optional[int] = None,
+              callback: Optional[SolveProgressCallback] = None) -> List[Dict]:
+        data = self.problem_data()
+        course_ids = data["course_ids"]
+        slot_ids = data["slot_ids"]
+        room_cap = data["room_cap"]
+
+        build_start = time.perf_counter()
+        compat = compatible_rooms(
+            course_ids, data["room_ids"], room_cap, data["batch_size"],
+            room_type=data["room_type"], course_room_type=data["course_room_type"],
+        )
+        model, y = build_slot_assignment_csp(
+            course_ids, slot_ids, data["faculty_map"], data["course_credits"], compat,
+            section_map=data["section_map"],
+        )
+        if self.objective == OBJECTIVE_DAY_SPREAD:
+            add_day_spread_objective(model, y, data["course_credits"])
+        build_ms = (time.perf_counter() - build_start) * 1000
+        proto = model.Proto()
+        self.stats = {
+            "engine": ENGINE_DECOMPOSED,
+            "model_build_ms": round(build_ms, 2),
+            "num_variables": len(proto.variables),
+            "num_constraints": len(proto.constraints),
+            "repairs": 0,
+        }
+        if self.snapshot_dir:
+            self.stats["snapshots"] = self.snapshots
+
+        if callback is not None:
+            callback.watch(None, has_objective=model.HasObjective())
+        solve_start = time.perf_counter()
+        solver, status = self._run_cp_solver(model, time_limit, num_workers, callback)
+        self.stats["status"] = solver.StatusName(status)
+        if self.solver_profile:
+            self.stats["solver_profile"] = self.solver_profile
+        self._objective_stats(model, solver, status)
+        if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            self.stats["solve_ms"] = round((time.perf_counter() - solve_start) * 1000, 2)
+            return []
+
+        placed = set(read_assignments(solver, y))
+        by_slot: Dict[Any, List[Any]] = {}
+        for c, t in placed:
+            by_slot.setdefault(t, []).append(c)
+        matchings = self._match_slots(by_slot, compat, room_cap)
+
+        forbidden = []
+        while True:
+            failed = [t for t, m in matchings.items() if m is None]
+            if not failed:
+                break
+            if self.stats["repairs"] >= self.max_repairs:
+                self.stats["status"] = "ROOM_MATCHING_FAILED"
+                self.stats["solve_ms"] = round((time.perf_counter() - solve_start) * 1000, 2)
+                return []
+            self.stats["repairs"] += 1
+
+            # Re-solve only the sessions that sat in failed slots: every other
+            # assignment is pinned, and the failed combinations are cut off.
+            failed_set = set(failed)
+            forbidden.extend((t, list(by_slot[t])) for t in failed)
+            # Courses that were not in a failed slot keep all their sessions,
+            # since their credits are already met by the pinned ones.
+            fixed = {(c, t): 1 for (c, t) in placed if t not in failed_set}
+            repair_model, repair_y = build_slot_assignment_csp(
+                course_ids, slot_ids, data["faculty_map"], data["course_credits"], compat,
+                fixed=fixed, forbidden_sets=forbidden, section_map=data["section_map"],
+            )
+            solver, status = self._run_cp_solver(repair_model, time_limit, num_workers, None)
+            if status not in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+                self.stats["status"] = solver.StatusName(status)
+                self.stats["solve_ms"] = round((time.perf_counter() - solve_start) * 1000, 2)
+                return []
+
+            new_placed = set(read_assignments(solver, repair_y))
+            new_by_slot: Dict[Any, List[Any]] = {}
+            for c, t in new_placed:
+                new_by_slot.setdefault(t, []).append(c)
+            # Only slots whose course set changed need a new matching
+            changed = {
+                t: cs for t, cs in new_by_slot.items()
+                if sorted(map(str, cs)) != sorted(map(str, by_slot.get(t, [])))
+            }
+            for t in list(matchings):
+                if t not in new_by_slot:
+                    del matchings[t]
+            matchings.update(self._match_slots(changed, compat, room_cap))
+            placed, by_slot = new_placed, new_by_slot
+
+        self.stats["solve_ms"] = round((time.perf_counter() - solve_start) * 1000, 2)
+
+        schedule = []
+        for t, matching in matchings.items():
+            for c_id, r_id in matching.items():
+                schedule.append({
+                    "course_code": c_id,
+                    "room_name": r_id,
+                    "slot_id": t
+                })
+        return schedule
+
+
+# --- Pre-solve analysis ---
+
+# Families that can be dropped from the sparse model to explain infeasibility
+CONSTRAINT_FAMILIES = ("room_conflicts", "faculty_conflicts", "section_conflicts")
+# Relaxation solves shorter than this are not attempted
+MIN_RELAXATION_SECONDS = 0.5
+
+
+def presolve_checks(data: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Counting / pigeonhole checks that prove infeasibility without a solver.
+    data: TimetableSolver.problem_data()
+
+    Returns a list of structured reasons (empty if nothing is obviously wrong):
+    {"check": str, "message": str, plus the courses/rooms/faculty involved}.
+    """
+    course_ids = data["course_ids"]
+    n_slots = len(data["slot_ids"])
+    credits = data["course_credits"]
+    reasons: List[Dict[str, Any]] = []
+
+    compat = compatible_rooms(
+        course_ids, data["room_ids"], data["room_cap"], data["batch_size"],
+        room_type=data["room_type"], course_room_type=data["course_room_type"],
+    )
+
+    # 1. No room is large enough / of the right type
+    for c in course_ids:
+        if not compat[c]:
+            reasons.append({
+                "check": "no_compatible_room",
+                "message": f"No room can host {c} (batch of {data['batch_size'][c]}"
+                           + (f", needs {data['course_room_type'][c]}" if data["course_room_type"].get(c) else "")
+                           + ")",
+                "courses": [c],
+            })
+
+    # 2. A course needs more sessions than there are slots
+    for c in course_ids:
+        if credits[c] > n_slots:
+            reasons.append({
+                "check": "course_exceeds_slots",
+                "message": f"{c} needs {credits[c]} sessions but the week has only {n_slots} slots",
+                "courses": [c],
+            })
+
+    # 3. A faculty member / section owns more credit-hours than there are slots.
+    #    Like the model, courses without an instructor count as one "faculty".
+    for check, key, label, skip_none in (
+        ("faculty_overloaded", "faculty_map", "faculty", False),
+        ("section_overloaded", "section_map", "section", True),
+    ):
+        load: Dict[Any, List[str]] = {}
+        for c in course_ids:
+            owner = data[key].get(c)
+            if owner is not None or not skip_none:
+                load.setdefault(owner, []).append(c)
+        for owner, owned in load.items():
+            hours = sum(credits[c] for c in owned)
+            if len(owned) > 1 and hours > n_slots:
+                reasons.append({
+                    "check": check,
+                    "message": f"{label.capitalize()} {owner} has {hours} credit-hours but the week has only {n_slots} slots",
+                    label: str(owner),
+                    "courses": sorted(owned),
+                })
+
+    # 4. Courses that can only use a set of rooms need more sessions than
+    #    those rooms offer over the week (Hall's condition per compatible-room set)
+    #    Groups are bucketed by room: a group lies inside room_set when all of
+    #    its rooms are counted while walking room_set's buckets, which avoids
+    #    comparing every pair of groups.
+    groups: Dict[frozenset, List[str]] = {}
+    for c in course_ids:
+        if compat[c]:
+            groups.setdefault(frozenset(compat[c]), []).append(c)
+    by_room: Dict[Any, List[frozenset]] = {}
+    for group in groups:
+        for r in group:
+            by_room.setdefault(r, []).append(group)
+    for room_set in groups:
+        hits: Dict[frozenset, int] = {}
+        for r in room_set:
+            for group in by_room[r]:
+                hits[group] = hits.get(group, 0) + 1
+        members = [c for group, n in hits.items() if n == len(group) for c in groups[group]]
+        demand = sum(credits[c] for c in members)
+        supply = len(room_set) * n_slots
+        if demand > supply:
+            reasons.append({
+                "check": "room_capacity_exceeded",
+                "message": f"{len(members)} course(s) need {demand} sessions in rooms that offer only {supply} room-slots",
+                "courses": sorted(members),
+                "rooms": sorted(room_set, key=str),
+            })
+
+    return reasons
+
+
+def find_infeasible_families(data: Dict[str, Any], time_limit: float = 10.0,
+                             num_workers: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Explain an infeasible model by re-solving relaxations: each constraint family
+    is dropped in turn, and families whose removal makes the model feasible are
+    reported. Only worth running after presolve_checks found nothing.
+    time_limit is the budget for all relaxations together, shared evenly
+    between the families still to try.
+    """
+    culprits = []
+    deadline = time.monotonic() + time_limit
+    for i, family in enumerate(CONSTRAINT_FAMILIES):
+        remaining = (deadline - time.monotonic()) / (len(CONSTRAINT_FAMILIES) - i)
+        if remaining < MIN_RELAXATION_SECONDS:
+            break
+        model, _, _ = build_timetable_csp_sparse(
+            data["course_ids"], data["slot_ids"], data["room_ids"], data["faculty_map"],
+            data["room_cap"], data["batch_size"], data["course_credits"],
+            room_type=data["room_type"], course_room_type=data["course_room_type"],
+            section_map=data["section_map"], relax={family},
+        )
+        solver = cp_model.CpSolver()
+        configure_solver(solver, remaining, num_workers)
+        status = solver.Solve(model)
+        if status in (cp_model.OPTIMAL, cp_model.FEASIBLE):
+            culprits.append({
+                "check": "constraint_family",
+                "message": f"The timetable becomes feasible without {family.replace('_', ' ')}",
+                "family": family,
+            })
+    return culprits
@@ -0,0 +1,125 @@
+from typing import List, Dict, Any, Optional, Sequence
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.academic import TimetableSlot, Course, Room, TimeSlot, WeekDay
+
+# Public field name -> (column, table it needs joined; None = timetable_slots itself)
+TIMETABLE_FIELDS = {
+    "id": (TimetableSlot.id, None),
+    "semester": (TimetableSlot.semester, None),
+    "section": (TimetableSlot.section, None),
+    "is_published": (TimetableSlot.is_published, None),
+    "is_active": (TimetableSlot.is_active, None),
+    "start_date": (TimetableSlot.start_date, None),
+    "end_date": (TimetableSlot.end_date, None),
+    "recurrence_rule": (TimetableSlot.recurrence_rule, None),
+    "course_id": (TimetableSlot.course_id, None),
+    "course_code": (Course.code, Course),
+    "course_name": (Course.name, Course),
+    "department": (Course.department, Course),
+    "faculty_id": (Course.instructor_id, Course),
+    "room_id": (TimetableSlot.room_id, None),
+    "room_name": (Room.name, Room),
+    "building": (Room.building, Room),
+    "time_slot_id": (TimetableSlot.time_slot_id, None),
+    "day": (TimeSlot.day, TimeSlot),
+    "start_time": (TimeSlot.start_time, TimeSlot),
+    "end_time": (TimeSlot.end_time, TimeSlot),
+}
+DEFAULT_FIELDS = (
+    "id", "semester", "section", "is_published", "course_code", "course_name", "department",
+    "faculty_id", "room_name", "day", "start_time", "end_time",
+)
+MAX_PAGE_SIZE = 1000
+
+_JOINS = {
+    Course: TimetableSlot.course_id == Course.id,
+    Room: TimetableSlot.room_id == Room.id,
+    TimeSlot: TimetableSlot.time_slot_id == TimeSlot.id,
+}
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """Comma-separated field list -> validated names (ValueError on unknown ones)."""
+    if not fields:
+        return list(DEFAULT_FIELDS)
+    names = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in names if f not in TIMETABLE_FIELDS]
+    if unknown:
+        raise ValueError(f"Unknown field(s): {', '.join(unknown)}. Expected any of {sorted(TIMETABLE_FIELDS)}")
+    return list(dict.fromkeys(names))
+
+
+def query_timetable_slots(db: Session, fields: Sequence[str], limit: Optional[int] = 100,
+                          cursor: Optional[int] = None, semester: Optional[int] = None,
+                          section: Optional[str] = None, department: Optional[str] = None,
+                          room: Optional[str] = None, faculty_id: Optional[int] = None,
+                          day: Optional[str] = None, is_published: Optional[bool] = None,
+                          is_active: Optional[bool] = None,
+                          course_ids: Optional[Sequence[int]] = None) -> Dict[str, Any]:
+    """
+    One page of timetable slots, ordered by id, as plain dicts built from Core
+    result tuples. Only the tables the requested fields and filters need are
+    joined. Pass the returned next_cursor back as cursor for the next page
+    (keyset pagination, so deep pages cost the same as the first).
+    limit=None returns every matching row.
+    """
+    # The id is always selected so the cursor can be computed
+    columns = [TimetableSlot.id] + [TIMETABLE_FIELDS[f][0] for f in fields if f != "id"]
+    joins = {TIMETABLE_FIELDS[f][1] for f in fields} - {None}
+
+    conditions = []
+    if cursor is not None:
+        conditions.append(TimetableSlot.id > cursor)
+    if semester is not None:
+        conditions.append(TimetableSlot.semester == semester)
+    if section is not None:
+        conditions.append(TimetableSlot.section == section)
+    if is_published is not None:
+        conditions.append(TimetableSlot.is_published == is_published)
+    if is_active is not None:
+        conditions.append(TimetableSlot.is_active == is_active)
+    if course_ids is not None:
+        conditions.append(TimetableSlot.course_id.in_(list(course_ids)))
+    if department is not None:
+        conditions.append(Course.department == department)
+        joins.add(Course)
+    if faculty_id is not None:
+        conditions.append(Course.instructor_id == faculty_id)
+        joins.add(Course)
+    if room is not None:
+        conditions.append(Room.name == room)
+        joins.add(Room)
+    if day is not None:
+        conditions.append(TimeSlot.day == WeekDay(day))
+        joins.add(TimeSlot)
+
+    stmt = select(*columns).select_from(TimetableSlot)
+    for table in (Course, Room, TimeSlot):
+        if table in joins:
+            stmt = stmt.join(table, _JOINS[table])
+    stmt = stmt.where(*conditions).order_by(TimetableSlot.id)
+    if limit is not None:
+        stmt = stmt.limit(limit + 1)  # one extra row tells whether another page exists
+
+    rows = db.execute(stmt).all()
+    has_more = limit is not None and len(rows) > limit
+    if has_more:
+        rows = rows[:limit]
+
+    names = ["id"] + [f for f in fields if f != "id"]
+    include_id = "id" in fields
+    items = []
+    for row in rows:
+        item = dict(zip(names, row))
+        if isinstance(item.get("day"), WeekDay):
+            item["day"] = item["day"].value
+        if not include_id:
+            del item["id"]
+        items.append(item)
+
+    return {
+        "items": items,
+        "next_cursor": rows[-1][0] if has_more else None,
+        "limit": limit,
+    }
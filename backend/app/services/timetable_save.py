@@ -0,0 +1,151 @@
+import datetime
+from typing import List, Dict, Any, Tuple
+from sqlalchemy import insert, update, delete, tuple_
+from sqlalchemy.orm import Session
+from app.models.academic import TimetableSlot, Course, Room, TimeSlot, WeekDay
+from app.services.timetable_grid import parse_period
+
+
+def parse_schedule(schedule: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Validate "Day-HH:MM" -> {courseCode, courseName, room} entries.
+    Returns (entries with parsed day/start_time, keys that were skipped).
+    """
+    entries, skipped = [], []
+    for slot_key, entry in schedule.items():
+        if not entry:
+            continue
+        try:
+            day_str, time_str = slot_key.split('-')
+            entries.append({
+                "key": slot_key,
+                "day": WeekDay(day_str),
+                "start_time": parse_period(time_str),
+                "course_code": entry['courseCode'],
+                "course_name": entry.get('courseName'),
+                "room": entry['room'],
+            })
+        except Exception as e:
+            print(f"Error saving slot {slot_key}: {e}")
+            skipped.append(slot_key)
+    return entries, skipped
+
+
+def bulk_save_schedule(db: Session, schedule: Dict[str, Any], semester: int, section: str,
+                       department: str) -> Dict[str, Any]:
+    """
+    Save one section's weekly schedule with set-based statements.
+
+    Referenced courses, rooms and time slots are loaded with one query each
+    and missing ones are created in a batch. The schedule is then diffed
+    against the section's existing rows by time slot, and only the inserts,
+    updates and deletes are written, all in one transaction. Any change
+    unpublishes the whole section in that transaction, so it is never left
+    half published; it must be published again.
+    """
+    entries, skipped = parse_schedule(schedule)
+    created = {"courses": 0, "rooms": 0, "time_slots": 0}
+
+    # 1. Reference rows, one query per table
+    codes = {e["course_code"] for e in entries}
+    course_ids = dict(db.query(Course.code, Course.id).filter(Course.code.in_(codes)).all()) if codes else {}
+    new_courses = {}
+    for e in entries:
+        code = e["course_code"]
+        if code in course_ids or code in new_courses:
+            continue
+        if not e["course_name"]:
+            print(f"Error saving slot {e['key']}: unknown course {code} and no courseName to create it")
+            skipped.append(e["key"])
+            continue
+        # Create course if missing for demo
+        new_courses[code] = Course(code=code, name=e["course_name"], semester=semester, department=department)
+    entries = [e for e in entries if e["key"] not in skipped]
+
+    room_names = {e["room"] for e in entries}
+    room_ids = dict(db.query(Room.name, Room.id).filter(Room.name.in_(room_names)).all()) if room_names else {}
+    new_rooms = {
+        name: Room(name=name, capacity=60, room_type="Classroom")
+        for name in room_names if name not in room_ids
+    }
+
+    grid_keys = {(e["day"], e["start_time"]) for e in entries}
+    slot_ids = {}
+    if grid_keys:
+        rows = db.query(TimeSlot.id, TimeSlot.day, TimeSlot.start_time).filter(
+            tuple_(TimeSlot.day, TimeSlot.start_time).in_(list(grid_keys))
+        ).order_by(TimeSlot.id).all()
+        for row in rows:
+            slot_ids.setdefault((row.day, row.start_time), row.id)
+    new_slots = {}
+    for day, start_time in grid_keys - set(slot_ids):
+        end_time = (datetime.datetime.combine(datetime.date.today(), start_time) + datetime.timedelta(hours=1)).time()
+        new_slots[(day, start_time)] = TimeSlot(day=day, start_time=start_time, end_time=end_time)
+
+    if new_courses or new_rooms or new_slots:
+        db.add_all([*new_courses.values(), *new_rooms.values(), *new_slots.values()])
+        db.flush()
+        course_ids.update({code: c.id for code, c in new_courses.items()})
+        room_ids.update({name: r.id for name, r in new_rooms.items()})
+        slot_ids.update({key: s.id for key, s in new_slots.items()})
+        created = {"courses": len(new_courses), "rooms": len(new_rooms), "time_slots": len(new_slots)}
+
+    # 2. Desired state: time slot -> (course, room); a later entry for the same slot wins
+    desired: Dict[int, Tuple[int, int]] = {}
+    for e in entries:
+        desired[slot_ids[(e["day"], e["start_time"])]] = (course_ids[e["course_code"]], room_ids[e["room"]])
+
+    # 3. Diff against what the section has now
+    existing = db.query(
+        TimetableSlot.id, TimetableSlot.time_slot_id, TimetableSlot.course_id,
+        TimetableSlot.room_id, TimetableSlot.is_active,
+    ).filter(
+        TimetableSlot.semester == semester,
+        TimetableSlot.section == section,
+    ).order_by(TimetableSlot.id).all()
+
+    inserts, updates, deletes = [], [], []
+    unchanged = 0
+    matched = set()
+    for row in existing:
+        target = desired.get(row.time_slot_id)
+        if target is None or row.time_slot_id in matched:
+            deletes.append(row.id)
+            continue
+        matched.add(row.time_slot_id)
+        if (row.course_id, row.room_id) == target and row.is_active:
+            unchanged += 1
+        else:
+            updates.append({"id": row.id, "course_id": target[0], "room_id": target[1],
+                            "is_active": True, "is_published": False})
+    for time_slot_id, (course_id, room_id) in desired.items():
+        if time_slot_id not in matched:
+            inserts.append({"course_id": course_id, "room_id": room_id, "time_slot_id": time_slot_id,
+                            "section": section, "semester": semester, "is_published": False, "is_active": True})
+
+    # 4. Apply only the differences
+    if deletes:
+        db.execute(delete(TimetableSlot).where(TimetableSlot.id.in_(deletes)))
+    if updates:
+        db.execute(update(TimetableSlot), updates)
+    if inserts:
+        db.execute(insert(TimetableSlot), inserts)
+    unpublished = 0
+    if deletes or updates or inserts:
+        unpublished = db.execute(update(TimetableSlot).where(
+            TimetableSlot.semester == semester,
+            TimetableSlot.section == section,
+            TimetableSlot.is_published == True,
+        ).values(is_published=False)).rowcount
+    db.commit()
+
+    return {
+        "count": len(desired),
+        "inserted": len(inserts),
+        "updated": len(updates),
+        "deleted": len(deletes),
+        "unchanged": unchanged,
+        "unpublished": unpublished,
+        "skipped": len(skipped),
+        "created": created,
+    }
@@ -0,0 +1,84 @@
+"""
+Replay saved CP-SAT snapshots with different parameter sets and tabulate results.
+
+Snapshots are written by TimetableSolver(snapshot_dir=...), /timetable/generate
+with "snapshot": true and /timetable/reallocate?snapshot=true.
+
+Run from the backend directory:
+    python -m benchmarks.replay solver_snapshots --workers 1 8 --time-limits 10 60
+    python -m benchmarks.replay solver_snapshots/<dir> --params "search_branching: FIXED_SEARCH" --params ""
+"""
+import argparse
+import itertools
+import json
+import time
+
+from ortools.sat.python import cp_model
+
+from app.services.solver_snapshots import load_snapshot, find_snapshots, merge_text
+
+
+def replay(path, workers, time_limit, extra_params, use_saved_params):
+    model, saved_params, metadata = load_snapshot(path)
+    solver = cp_model.CpSolver()
+    if use_saved_params and saved_params:
+        merge_text(solver.parameters, saved_params)
+    if extra_params:
+        merge_text(solver.parameters, extra_params)
+    if workers is not None:
+        solver.parameters.num_workers = workers
+    if time_limit is not None:
+        solver.parameters.max_time_in_seconds = time_limit
+
+    start = time.perf_counter()
+    status = solver.Solve(model)
+    wall_ms = (time.perf_counter() - start) * 1000
+    return {
+        "snapshot": path,
+        "kind": metadata.get("kind"),
+        "workers": workers,
+        "time_limit": time_limit,
+        "params": extra_params,
+        "status": solver.StatusName(status),
+        "wall_ms": round(wall_ms, 2),
+        "objective": solver.ObjectiveValue() if status in (cp_model.OPTIMAL, cp_model.FEASIBLE) else None,
+        "best_bound": solver.BestObjectiveBound(),
+        "conflicts": solver.NumConflicts(),
+        "branches": solver.NumBranches(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="+", help="snapshot directories, or folders containing them")
+    parser.add_argument("--workers", nargs="+", type=int, default=[None])
+    parser.add_argument("--time-limits", nargs="+", type=float, default=[None])
+    parser.add_argument("--params", action="append", default=None,
+                        help="extra SatParameters in text format; repeat for several sets")
+    parser.add_argument("--ignore-saved-params", action="store_true",
+                        help="start from default parameters instead of the ones saved with the snapshot")
+    parser.add_argument("--output", help="write results JSON here")
+    args = parser.parse_args()
+
+    snapshots = [s for p in args.paths for s in find_snapshots(p)]
+    if not snapshots:
+        parser.error("no snapshots found")
+    param_sets = args.params or [""]
+
+    results = []
+    print(f"{'snapshot':<48}{'workers':>8}{'limit':>8}  {'params':<30}{'status':<12}{'wall ms':>10}{'objective':>12}")
+    for path, workers, limit, extra in itertools.product(snapshots, args.workers, args.time_limits, param_sets):
+        r = replay(path, workers, limit, extra, not args.ignore_saved_params)
+        results.append(r)
+        name = path if len(path) <= 46 else "..." + path[-43:]
+        print(f"{name:<48}{str(workers or '-'):>8}{str(limit or '-'):>8}  {(extra or 'saved')[:28]:<30}"
+              f"{r['status']:<12}{r['wall_ms']:>10.1f}{str(r['objective'] if r['objective'] is not None else '-'):>12}")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(results, fh, indent=2)
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
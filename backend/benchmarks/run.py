@@ -0,0 +1,161 @@
+"""
+Timetable solver benchmark suite.
+
+Runs TimetableSolver / DecomposedTimetableSolver on seeded synthetic campuses
+across size tiers and records build time, solve time, peak RSS, model size and
+solver status as JSON. Each run happens in a fresh process so peak RSS is per run.
+
+Run from the backend directory:
+    python -m benchmarks.run --tiers tiny small --output bench.json
+    python -m benchmarks.run --baseline benchmarks/baseline.json --save-baseline   # record
+    python -m benchmarks.run --baseline benchmarks/baseline.json                   # compare
+"""
+import argparse
+import json
+import multiprocessing
+import platform
+import sys
+import time
+
+ENGINES = ("rooms", "room_classes", "decomposed")
+FEASIBLE_STATUSES = ("OPTIMAL", "FEASIBLE")
+
+
+def _run_one(tier, engine, seed, time_limit, num_workers, queue):
+    """Child process: build + solve one problem and report stats."""
+    import resource
+    from app.services.timetable_opt import TimetableSolver, DecomposedTimetableSolver
+    from benchmarks.synthetic import TIERS, generate_campus
+
+    courses, rooms, slots = generate_campus(TIERS[tier], seed=seed)
+    if engine == "decomposed":
+        solver = DecomposedTimetableSolver(courses, rooms, slots)
+    else:
+        solver = TimetableSolver(courses, rooms, slots, mode=engine)
+
+    start = time.perf_counter()
+    schedule = solver.solve(time_limit=time_limit, num_workers=num_workers)
+    total_ms = (time.perf_counter() - start) * 1000
+
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+    stats = solver.stats
+    queue.put({
+        "tier": tier,
+        "engine": engine,
+        "seed": seed,
+        "courses": len(courses),
+        "rooms": len(rooms),
+        "slots": len(slots),
+        "status": stats.get("status"),
+        "model_build_ms": stats.get("model_build_ms"),
+        "solve_ms": stats.get("solve_ms"),
+        "total_ms": round(total_ms, 2),
+        "peak_rss_mb": round(peak_rss_mb, 1),
+        "num_variables": stats.get("num_variables"),
+        "num_constraints": stats.get("num_constraints"),
+        "sessions": len(schedule),
+    })
+
+
+def run_benchmark(tier, engine, seed, time_limit, num_workers):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run_one, args=(tier, engine, seed, time_limit, num_workers, queue))
+    proc.start()
+    proc.join()
+    if proc.exitcode != 0:
+        return {"tier": tier, "engine": engine, "seed": seed, "status": f"CRASHED({proc.exitcode})"}
+    return queue.get()
+
+
+def compare_to_baseline(results, baseline, tolerance, min_delta_ms):
+    """Return a list of human-readable regressions versus the baseline results."""
+    base = {(r["tier"], r["engine"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        b = base.get((r["tier"], r["engine"]))
+        if b is None:
+            continue
+        name = f"{r['tier']}/{r['engine']}"
+        if b.get("status") in FEASIBLE_STATUSES and r.get("status") not in FEASIBLE_STATUSES:
+            regressions.append(f"{name}: status {b['status']} -> {r.get('status')}")
+            continue
+        for metric in ("model_build_ms", "solve_ms", "total_ms"):
+            old, new = b.get(metric), r.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new - old > min_delta_ms:
+                regressions.append(f"{name}: {metric} {old:.1f} -> {new:.1f}")
+        for metric in ("num_variables", "num_constraints", "peak_rss_mb"):
+            old, new = b.get(metric), r.get(metric)
+            if old and new and new > old * (1 + tolerance):
+                regressions.append(f"{name}: {metric} {old} -> {new}")
+    return regressions
+
+
+def main():
+    from benchmarks.synthetic import TIERS
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tiers", nargs="+", choices=sorted(TIERS), default=["tiny", "small"])
+    parser.add_argument("--engines", nargs="+", choices=ENGINES, default=list(ENGINES))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--time-limit", type=float, default=60.0)
+    parser.add_argument("--workers", type=int, default=8, help="CP-SAT search workers")
+    parser.add_argument("--output", help="write results JSON here")
+    parser.add_argument("--baseline", help="baseline JSON to compare against (or to write with --save-baseline)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown (0.25 = 25%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=50.0, help="ignore timing changes smaller than this")
+    args = parser.parse_args()
+
+    import ortools
+    report = {
+        "meta": {
+            "seed": args.seed,
+            "time_limit": args.time_limit,
+            "workers": args.workers,
+            "python": platform.python_version(),
+            "ortools": ortools.__version__,
+            "machine": platform.machine(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "results": [],
+    }
+
+    print(f"{'tier':<8}{'engine':<14}{'status':<14}{'courses':>8}{'vars':>10}{'cons':>9}"
+          f"{'build ms':>11}{'solve ms':>11}{'rss MB':>9}")
+    for tier in args.tiers:
+        for engine in args.engines:
+            r = run_benchmark(tier, engine, args.seed, args.time_limit, args.workers)
+            report["results"].append(r)
+            print(f"{tier:<8}{engine:<14}{str(r.get('status')):<14}{r.get('courses', 0):>8}"
+                  f"{r.get('num_variables') or 0:>10}{r.get('num_constraints') or 0:>9}"
+                  f"{r.get('model_build_ms') or 0:>11.1f}{r.get('solve_ms') or 0:>11.1f}{r.get('peak_rss_mb') or 0:>9.1f}")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Results written to {args.output}")
+
+    if args.baseline and args.save_baseline:
+        with open(args.baseline, "w") as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Baseline saved to {args.baseline}")
+    elif args.baseline:
+        with open(args.baseline) as fh:
+            baseline = json.load(fh)
+        regressions = compare_to_baseline(report["results"], baseline, args.tolerance, args.min_delta_ms)
+        if regressions:
+            print("REGRESSIONS:")
+            for line in regressions:
+                print(f"  {line}")
+            sys.exit(1)
+        print("No regressions against baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Seeded synthetic institutions for timetable solver benchmarks.
+"""
+import random
+from dataclasses import dataclass, field
+from typing import List, Dict, Tuple
+
+from app.services.timetable_batch import BatchCourse, BatchRoom, BatchSlot
+
+
+@dataclass
+class SyntheticCampusConfig:
+    departments: int = 2
+    years: int = 4
+    sections_per_year: int = 2
+    courses_per_section: int = 5
+    instructors_per_department: int = 12
+    # credits -> relative weight
+    credit_distribution: Dict[int, float] = field(default_factory=lambda: {2: 1.0, 3: 3.0, 4: 2.0})
+    lab_fraction: float = 0.15  # share of courses that need a Lab
+    section_size: int = 60
+    # (capacity, room_type) -> number of rooms per department
+    room_mix: Dict[Tuple[int, str], int] = field(default_factory=lambda: {
+        (60, "Classroom"): 5,
+        (120, "Classroom"): 1,
+        (30, "Lab"): 2,
+    })
+    buildings: int = 2
+    days: int = 6
+    periods_per_day: int = 6
+
+
+# Size tiers used by benchmarks.run
+TIERS: Dict[str, SyntheticCampusConfig] = {
+    "tiny": SyntheticCampusConfig(departments=1, years=1, sections_per_year=2, courses_per_section=4),
+    "small": SyntheticCampusConfig(departments=1, years=2),
+    "medium": SyntheticCampusConfig(departments=2, years=4),
+    "large": SyntheticCampusConfig(departments=4, years=4, sections_per_year=3),
+}
+
+
+def generate_campus(config: SyntheticCampusConfig, seed: int = 0) -> Tuple[List[BatchCourse], List[BatchRoom], List[BatchSlot]]:
+    """Build (courses, rooms, slots) for TimetableSolver from a config and a seed."""
+    rng = random.Random(seed)
+    credit_values = list(config.credit_distribution)
+    credit_weights = [config.credit_distribution[c] for c in credit_values]
+
+    courses = []
+    rooms = []
+    for d in range(config.departments):
+        dept = f"D{d}"
+        instructors = [f"{dept}-F{i}" for i in range(config.instructors_per_department)]
+        for year in range(1, config.years + 1):
+            # Courses of a year are shared by its sections, and so is the instructor
+            for k in range(config.courses_per_section):
+                credits = rng.choices(credit_values, credit_weights)[0]
+                is_lab = rng.random() < config.lab_fraction
+                instructor = rng.choice(instructors)
+                for s in range(config.sections_per_year):
+                    section = f"{dept}-Y{year}-{chr(ord('A') + s)}"
+                    courses.append(BatchCourse(
+                        code=f"{dept}Y{year}C{k}-{chr(ord('A') + s)}",
+                        credits=credits,
+                        instructor_id=instructor,
+                        batch_size=config.section_size // 2 if is_lab else config.section_size,
+                        room_type="Lab" if is_lab else "Classroom",
+                        section=section,
+                    ))
+
+        for (capacity, room_type), count in sorted(config.room_mix.items()):
+            for i in range(count):
+                rooms.append(BatchRoom(
+                    name=f"{dept}-{room_type}-{capacity}-{i}",
+                    capacity=capacity,
+                    room_type=room_type,
+                    building=f"B{rng.randrange(config.buildings)}",
+                ))
+
+    slots = [BatchSlot(f"d{day}-p{period}") for day in range(config.days) for period in range(config.periods_per_day)]
+    return courses, rooms, slots
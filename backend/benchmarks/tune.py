@@ -0,0 +1,98 @@
+"""
+Auto-tune CP-SAT parameters for timetable solves.
+
+Runs the configurations in app.services.solver_tuning.PORTFOLIO on
+representative problems (synthetic tiers and/or saved snapshots), records
+time-to-first-feasible and time-to-optimal, and saves the winning
+configuration per model kind and size class to SOLVER_PROFILE_PATH. Production solves
+pick the tuned profile up automatically.
+
+Run from the backend directory:
+    python -m benchmarks.tune --tiers tiny small medium --time-limit 30 --parallel 2
+    python -m benchmarks.tune --snapshots solver_snapshots --dry-run
+"""
+import argparse
+import json
+
+from app.core.config import settings
+from app.services.solver_snapshots import load_snapshot, find_snapshots
+from app.services.solver_tuning import PORTFOLIO, run_portfolio, pick_winners, solver_profiles
+from app.services.timetable_opt import TimetableSolver, SOLVER_MODES
+from benchmarks.synthetic import TIERS, generate_campus
+
+
+# Snapshot "kind" (the solver class or model name) -> tuned profile kind
+SNAPSHOT_KINDS = {
+    "DecomposedTimetableSolver": "decomposed",
+    "IncrementalTimetableSolver": "incremental",
+    "reallocation": "reallocation",
+}
+
+
+def snapshot_model_kind(metadata):
+    """Profile kind of a snapshot; older snapshots predate the model_kind field."""
+    inputs = metadata.get("inputs", {})
+    if inputs.get("model_kind"):
+        return inputs["model_kind"]
+    if metadata.get("kind") in SNAPSHOT_KINDS:
+        return SNAPSHOT_KINDS[metadata["kind"]]
+    return inputs.get("mode")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tiers", nargs="*", choices=sorted(TIERS), default=["tiny", "small"])
+    parser.add_argument("--modes", nargs="+", choices=SOLVER_MODES, default=list(SOLVER_MODES))
+    parser.add_argument("--seeds", nargs="+", type=int, default=[1, 2])
+    parser.add_argument("--snapshots", nargs="*", default=[], help="snapshot directories to include")
+    parser.add_argument("--configs", nargs="+", help="subset of portfolio configuration names")
+    parser.add_argument("--time-limit", type=float, default=30.0)
+    parser.add_argument("--parallel", type=int, default=1, help="configurations solved at the same time")
+    parser.add_argument("--output", help="write raw results JSON here")
+    parser.add_argument("--dry-run", action="store_true", help="do not update the tuned profiles")
+    args = parser.parse_args()
+
+    problems = []
+    for tier in args.tiers:
+        for seed in args.seeds:
+            courses, rooms, slots = generate_campus(TIERS[tier], seed=seed)
+            for mode in args.modes:
+                solver = TimetableSolver(courses, rooms, slots, mode=mode)
+                problems.append((f"{tier}/{mode}/seed{seed}", solver.model_kind, solver.build_model()))
+    for path in args.snapshots:
+        for snap in find_snapshots(path):
+            model, _, metadata = load_snapshot(snap)
+            kind = snapshot_model_kind(metadata)
+            if kind is None:
+                print(f"Skipping {snap}: unknown model kind")
+                continue
+            problems.append((snap, kind, model))
+    if not problems:
+        parser.error("no problems to tune on")
+
+    configs = [c for c in PORTFOLIO if not args.configs or c["name"] in args.configs]
+    print(f"Tuning {len(configs)} configurations on {len(problems)} problems (time limit {args.time_limit}s)")
+    results = run_portfolio(problems, configs, time_limit=args.time_limit, parallel=args.parallel)
+
+    print(f"{'problem':<32}{'profile':<16}{'config':<28}{'status':<12}{'first s':>9}{'optimal s':>11}")
+    for r in sorted(results, key=lambda r: (r["problem"], r["config"])):
+        first = r["time_to_first_feasible"]
+        opt = r["time_to_optimal"]
+        print(f"{r['problem'][-31:]:<32}{r['profile']:<16}{r['config']:<28}{r['status']:<12}"
+              f"{(f'{first:.3f}' if first is not None else '-'):>9}{(f'{opt:.3f}' if opt is not None else '-'):>11}")
+
+    winners = pick_winners(results, args.time_limit, configs)
+    print("Winners per model kind and size class:")
+    for cls, w in sorted(winners.items()):
+        print(f"  {cls:<16} {w['name']:<28} mean score {w['mean_score']}s over {w['problems']} problem(s)")
+
+    if args.output:
+        with open(args.output, "w") as fh:
+            json.dump({"results": results, "winners": winners}, fh, indent=2)
+    if not args.dry_run:
+        solver_profiles.save(winners)
+        print(f"Tuned profiles saved to {settings.SOLVER_PROFILE_PATH}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import sqlite3
+import os
+
+# Composite indexes behind /attendance/query and /attendance/export (see Attendance.__table_args__)
+INDEXES = {
+    "ix_attendance_date": "attendance_date, id",
+    "ix_attendance_course_date": "course_code, attendance_date, id",
+    "ix_attendance_student_date": "student_id, attendance_date, id",
+    "ix_attendance_status_date": "status, attendance_date, id",
+}
+
+db_path = "sql_app.db"
+if os.path.exists(db_path):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        for name, columns in INDEXES.items():
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON attendance ({columns});")
+            print(f"Index {name} is in place")
+        conn.commit()
+        print("SUCCESS: Attendance query indexes created")
+    except sqlite3.OperationalError as e:
+        print(f"ERROR: {str(e)}")
+    finally:
+        conn.close()
+else:
+    print("DB file NOT found")
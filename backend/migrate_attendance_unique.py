@@ -0,0 +1,28 @@
+import sqlite3
+import os
+
+db_path = "sql_app.db"
+if os.path.exists(db_path):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        # Keep only the newest row of each (student, course, date, period) before enforcing uniqueness
+        cursor.execute("""
+            DELETE FROM attendance WHERE id NOT IN (
+                SELECT MAX(id) FROM attendance
+                GROUP BY student_id, course_code, attendance_date, period
+            );
+        """)
+        print(f"Removed {cursor.rowcount} duplicate attendance rows")
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS ux_attendance_key
+            ON attendance (student_id, course_code, attendance_date, period);
+        """)
+        conn.commit()
+        print("SUCCESS: Unique index ux_attendance_key is in place")
+    except sqlite3.OperationalError as e:
+        print(f"ERROR: {str(e)}")
+    finally:
+        conn.close()
+else:
+    print("DB file NOT found")
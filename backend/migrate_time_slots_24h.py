@@ -0,0 +1,29 @@
+import sqlite3
+import os
+
+# Time slots created from the frontend's grid labels stored the afternoon periods
+# in 12-hour form (01:20 for 13:20). Rewrite those to 24-hour times, see
+# app/services/timetable_grid.py.
+AFTERNOON = {"01:20": "13:20", "02:20": "14:20", "03:20": "15:20", "04:20": "16:20"}
+
+db_path = "sql_app.db"
+if os.path.exists(db_path):
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    try:
+        for column in ("start_time", "end_time"):
+            for old, new in AFTERNOON.items():
+                cursor.execute(
+                    f"UPDATE time_slots SET {column} = ? || substr({column}, 6) WHERE substr({column}, 1, 5) = ?;",
+                    (new, old),
+                )
+                if cursor.rowcount:
+                    print(f"{column}: {cursor.rowcount} slot(s) {old} -> {new}")
+        conn.commit()
+        print("SUCCESS: Time slots use 24-hour times")
+    except sqlite3.OperationalError as e:
+        print(f"ERROR: {str(e)}")
+    finally:
+        conn.close()
+else:
+    print("DB file NOT found")
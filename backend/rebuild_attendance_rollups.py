@@ -0,0 +1,18 @@
+"""
+Rebuild the attendance_rollups table from the attendance table.
+
+Run from the backend directory after backfilling or importing attendance:
+    python rebuild_attendance_rollups.py
+"""
+from app.db.session import SessionLocal, engine
+from app.models.base import Base
+from app.models import *
+from app.services.attendance_rollups import rebuild_rollups
+
+if __name__ == "__main__":
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        print(f"SUCCESS: Rebuilt {rebuild_rollups(db)} attendance rollups")
+    finally:
+        db.close()
@@ -0,0 +1,70 @@
+import datetime
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import models  # noqa: F401  registers every mapped class
+from app.models.academic import AttendanceRollup, Course
+from app.models.base import Base
+from app.models.user import Student
+from app.services.attendance_rollups import rebuild_rollups
+from app.services.attendance_upsert import upsert_attendance
+
+DAY = datetime.date(2026, 10, 19)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(autocommit=False, autoflush=False, bind=engine)()
+    session.add_all([
+        Student(id=1, enrollment_number="E1", semester=3),
+        Student(id=2, enrollment_number="E2", semester=3),
+        Course(code="CS301", name="Algorithms", semester=3),
+    ])
+    session.commit()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
+
+
+def mark(student_id, period, status):
+    return {"student_id": student_id, "course_code": "CS301", "attendance_date": DAY,
+            "period": period, "status": status}
+
+
+def rollups(db):
+    return sorted(
+        (r.student_id, r.course_code, r.semester, r.present, r.absent, r.late)
+        for r in db.query(AttendanceRollup)
+        if r.present or r.absent or r.late
+    )
+
+
+def assert_matches_rebuild(db):
+    incremental = rollups(db)
+    rebuild_rollups(db)
+    assert incremental == rollups(db)
+    return incremental
+
+
+def test_incremental_rollups_match_full_rebuild(db):
+    # Insert
+    result = upsert_attendance(db, [mark(1, 1, "Present"), mark(1, 2, "Absent"), mark(2, 1, "Late")])
+    assert result["inserted"] == 3
+    assert assert_matches_rebuild(db) == [(1, "CS301", 3, 1, 1, 0), (2, "CS301", 3, 0, 0, 1)]
+
+    # Status change moves a count between counters
+    result = upsert_attendance(db, [mark(1, 2, "Present")])
+    assert result["updated"] == 1
+    assert assert_matches_rebuild(db) == [(1, "CS301", 3, 2, 0, 0), (2, "CS301", 3, 0, 0, 1)]
+
+    # Re-submitting the same key, unchanged or twice in one batch, counts once
+    upsert_attendance(db, [mark(2, 1, "Late")])
+    upsert_attendance(db, [mark(2, 1, "Absent"), mark(2, 1, "Present")])
+    assert assert_matches_rebuild(db) == [(1, "CS301", 3, 2, 0, 0), (2, "CS301", 3, 1, 0, 0)]